@@ -3,21 +3,41 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import hashlib
 import logging
 import os
+import queue
+import ssl
 import subprocess
+import unicodedata
+from collections import OrderedDict, defaultdict, deque
+from functools import lru_cache
 from io import BytesIO
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import date, datetime, time
+from time import monotonic
 from decimal import Decimal, InvalidOperation
-from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
 
 import asyncpg
+import certifi
+from aiohttp import ClientSession, TCPConnector, hdrs
+from aiohttp.http import SERVER_SOFTWARE
 from asyncpg.exceptions import ForeignKeyViolationError
-from aiogram import BaseMiddleware, Bot, Dispatcher, F
-from aiogram.filters import Command, CommandStart
+from aiogram import BaseMiddleware, Bot, Dispatcher, F, __version__ as AIOGRAM_VERSION
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.filters import Command, CommandStart, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiogram.methods import Response, SendMessage, TelegramMethod
 from aiogram.types import (
     KeyboardButton,
     Message,
@@ -31,7 +51,26 @@ from zoneinfo import ZoneInfo
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 
-logging.basicConfig(level=logging.INFO)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Обработчики лишь кладут записи в очередь, а вывод в поток делает
+# отдельный поток QueueListener, чтобы логирование не блокировало цикл событий.
+def _setup_logging() -> None:
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+_setup_logging()
 
 # === Настройки окружения ===
 BOT_TOKEN = os.getenv("BOT_TOKEN")
@@ -43,6 +82,19 @@ DB_PORT = int(os.getenv("DB_PORT", "5432"))
 DB_NAME = os.getenv("DB_NAME", "botdb")
 DB_USER = os.getenv("DB_USER", "botuser")
 DB_PASS = os.getenv("DB_PASS", "botpass")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "5"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "25"))
+# Простаивающие соединения сверх минимума закрываются (по умолчанию через минуту),
+# а зависший запрос не держит соединение пула дольше таймаута.
+DB_POOL_INACTIVE_LIFETIME = float(os.getenv("DB_POOL_INACTIVE_LIFETIME", "60"))
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "30"))
+# После стольких запросов соединение пересоздаётся, освобождая память,
+# накопленную серверным процессом и кэшем подготовленных запросов.
+DB_POOL_MAX_QUERIES = int(os.getenv("DB_POOL_MAX_QUERIES", "50000"))
+# asyncpg готовит каждый запрос один раз на соединение и держит его в
+# LRU-кэше. Запросов в боте больше стандартных 100, поэтому кэш
+# увеличен, чтобы подготовленные запросы не вытесняли друг друга.
+DB_STATEMENT_CACHE_SIZE = 1024
 
 def _resolve_update_script_path() -> Path:
     env_path = os.getenv("UPDATE_SCRIPT_PATH")
@@ -62,41 +114,164 @@ db_pool: Optional[asyncpg.Pool] = None
 
 WARSAW_TZ = ZoneInfo("Europe/Warsaw")
 
+# Доступ и права пользователя кэшируются, чтобы мидлварь и проверка прав
+# в обработчиках не ходили в базу на каждое сообщение. Запись хранит
+# (срок годности, есть ли доступ, администратор ли) и сбрасывается при
+# изменении пользователя.
+ACCESS_CACHE_TTL = 300.0
+# Главный администратор заводится при каждом запуске, поэтому его
+# сообщения пропускаются без обращения к кэшу и базе.
+ADMIN_TG_ID = 37352491
+ADMIN_IDS = frozenset({ADMIN_TG_ID})
+# Отказы посторонним тоже кэшируются, поэтому кэш ограничен по размеру:
+# сверх лимита вытесняются давно не использованные записи вместе с их
+# блокировками.
+ACCESS_CACHE_MAX_SIZE = 10000
+_ACCESS_CACHE: OrderedDict[int, tuple[float, bool, bool]] = OrderedDict()
+_ACCESS_LOCKS: defaultdict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+# Список пользователей небольшой, поэтому при запуске он целиком
+# загружается в кэш доступа с долгим сроком жизни. Изменения таблицы users
+# приходят через LISTEN/NOTIFY и сбрасывают нужные записи.
+USERS_CHANGED_CHANNEL = "users_changed"
+users_listener: Optional[asyncpg.Connection] = None
+USERS_LISTENER_RETRY_DELAY = 30.0
+_users_listener_reconnect: Optional[asyncio.Task[None]] = None
+_ACCESS_REFRESH_TASKS: set[asyncio.Task[None]] = set()
+# Полуоткрытое соединение слушателя asyncpg не замечает, поэтому даже при
+# уведомлениях записи перечитываются не реже раза в час.
+ACCESS_CACHE_LISTENED_TTL = ACCESS_CACHE_TTL * 12
+
+# Справочник материалов пластика меняется только через настройки склада,
+# поэтому списки держатся в памяти и сбрасываются при любом изменении
+# материалов, толщин или цветов. Версия не даёт записать в кэш результат
+# запроса, начатого до сброса.
+_MATERIALS_CACHE: Dict[str, Any] = {}
+_MATERIALS_VERSION = 0
+
+MenuHandler = Callable[..., Awaitable[Any]]
+
 
 # === Проверка доступа пользователей ===
-async def user_has_access(tg_id: int) -> bool:
-    if db_pool is None:
-        logging.warning("Database pool is not initialised when checking access")
-        return False
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow("SELECT 1 FROM users WHERE tg_id = $1", tg_id)
-    return row is not None
+async def _get_user_access(tg_id: int) -> tuple[bool, bool]:
+    cached = _ACCESS_CACHE.get(tg_id)
+    if cached is not None and cached[0] > monotonic():
+        _ACCESS_CACHE.move_to_end(tg_id)
+        return cached[1], cached[2]
+    async with _ACCESS_LOCKS[tg_id]:
+        # Пока ждали блокировку, запись мог заполнить параллельный запрос.
+        cached = _ACCESS_CACHE.get(tg_id)
+        if cached is not None and cached[0] > monotonic():
+            return cached[1], cached[2]
+        if db_pool is None:
+            logging.warning("Database pool is not initialised when checking access")
+            return False, False
+        is_admin = await db_pool.fetchval(_SQL_USER_ACCESS, tg_id)
+        # Пользователь без записи получает None, у существующего флаг не NULL.
+        has_access = is_admin is not None
+        is_admin = bool(is_admin)
+        _store_user_access(tg_id, (monotonic() + ACCESS_CACHE_TTL, has_access, is_admin))
+    return has_access, is_admin
+
+
+def _store_user_access(tg_id: int, entry: tuple[float, bool, bool]) -> None:
+    _ACCESS_CACHE[tg_id] = entry
+    _ACCESS_CACHE.move_to_end(tg_id)
+    while len(_ACCESS_CACHE) > ACCESS_CACHE_MAX_SIZE:
+        evicted_id, _ = _ACCESS_CACHE.popitem(last=False)
+        # Блокировку, которую ещё держат, просто создадут заново — худшее
+        # последствие это один лишний запрос к базе.
+        _ACCESS_LOCKS.pop(evicted_id, None)
+
+
+def invalidate_user_access(tg_id: int) -> None:
+    _ACCESS_CACHE.pop(tg_id, None)
+
+
+async def _refresh_user_access(tg_id: int) -> None:
+    # Изменённая запись перечитывается сразу, чтобы следующее сообщение
+    # пользователя снова обслуживалось из кэша без запроса к базе.
+    if db_pool is None:
+        return
+    # Запись всегда перезаписывается или удаляется: параллельная проверка
+    # могла прочитать строку до изменения и положить в кэш устаревший доступ.
+    async with _ACCESS_LOCKS[tg_id]:
+        try:
+            is_admin = await db_pool.fetchval(_SQL_USER_ACCESS, tg_id)
+        except (OSError, asyncpg.PostgresError):
+            logging.exception("Failed to refresh access for user %s", tg_id)
+            invalidate_user_access(tg_id)
+            return
+        if users_listener is None:
+            invalidate_user_access(tg_id)
+        elif is_admin is None:
+            _store_user_access(tg_id, (monotonic() + ACCESS_CACHE_TTL, False, False))
+        else:
+            expires = monotonic() + ACCESS_CACHE_LISTENED_TTL
+            _store_user_access(tg_id, (expires, True, bool(is_admin)))
+
+
+def _on_users_changed(connection: Any, pid: int, channel: str, payload: str) -> None:
+    if not payload.isdigit():
+        return
+    tg_id = int(payload)
+    invalidate_user_access(tg_id)
+    task = asyncio.get_running_loop().create_task(_refresh_user_access(tg_id))
+    _ACCESS_REFRESH_TASKS.add(task)
+    task.add_done_callback(_ACCESS_REFRESH_TASKS.discard)
+
+
+def _on_users_listener_lost(connection: Any) -> None:
+    # Без уведомлений долгоживущие записи могут устареть. Пока слушатель
+    # переподключается, кэш работает только по TTL.
+    global users_listener, _users_listener_reconnect
+    logging.warning("Users change listener connection lost, access cache cleared")
+    users_listener = None
+    _ACCESS_CACHE.clear()
+    if _users_listener_reconnect is None or _users_listener_reconnect.done():
+        _users_listener_reconnect = asyncio.get_running_loop().create_task(
+            _reconnect_users_listener()
+        )
+
+
+async def _reconnect_users_listener() -> None:
+    while users_listener is None and db_pool is not None:
+        await asyncio.sleep(USERS_LISTENER_RETRY_DELAY)
+        await start_users_listener()
+    if users_listener is not None:
+        # Записи, попавшие в кэш без уведомлений, перечитываются заново.
+        _ACCESS_CACHE.clear()
+        logging.info("Users change listener reconnected")
 
 
 async def user_is_admin(tg_id: int) -> bool:
-    if db_pool is None:
-        logging.warning("Database pool is not initialised when checking admin role")
-        return False
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow("SELECT role FROM users WHERE tg_id = $1", tg_id)
-    if not row:
-        return False
-    role = (row["role"] or "").lower()
-    return "админист" in role or "admin" in role
+    _, is_admin = await _get_user_access(tg_id)
+    return is_admin
 
 
-async def ensure_admin_access(message: Message, state: Optional[FSMContext] = None) -> bool:
+async def ensure_admin_access(
+    message: Message,
+    state: Optional[FSMContext] = None,
+    is_admin: Optional[bool] = None,
+) -> bool:
     if not message.from_user:
         return False
-    if await user_is_admin(message.from_user.id):
+    # Права, найденные мидлварью, проверяем сразу; без них идём через кэш.
+    if is_admin is None:
+        is_admin = await user_is_admin(message.from_user.id)
+    if is_admin:
         return True
     if state is not None:
         await state.clear()
-    await message.answer("🚫 У вас недостаточно прав для управления настройками.", reply_markup=MAIN_MENU_KB)
+    await answer_prepared(message, SETTINGS_DENIED_REPLY)
     return False
 
 
 # === Мидлварь доступа ===
+# Отдельный логгер позволяет фильтровать записи о доступе, не трогая обработчики.
+access_logger = logging.getLogger("bot").getChild("access")
+
+
 class AccessControlMiddleware(BaseMiddleware):
     async def __call__(
         self,
@@ -104,582 +279,717 @@ class AccessControlMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any],
     ) -> Any:
-        user_id: Optional[int] = None
-        if isinstance(event, Message) and event.from_user:
-            user_id = event.from_user.id
-        if user_id is None:
+        # Пользователя события aiogram уже определил для любого типа
+        # обновления, поэтому мидлварь не привязана к Message.
+        user = data.get("event_from_user")
+        if user is None:
             return await handler(event, data)
-        if await user_has_access(user_id):
+        user_id = user.id
+        if user_id in ADMIN_IDS:
+            data["is_admin"] = True
             return await handler(event, data)
+        has_access, is_admin = await _get_user_access(user_id)
+        if has_access:
+            data["is_admin"] = is_admin
+            return await handler(event, data)
+        access_logger.info("Access denied for user %s", user_id)
         if isinstance(event, Message):
-            await event.answer("🚫 У вас нет доступа к этому боту. Обратитесь к администратору.")
+            await answer_prepared(event, ACCESS_DENIED_REPLY)
         return None
 
 
-# === Инициализация базы данных ===
-async def init_database() -> None:
-    global db_pool
-    db_pool = await asyncpg.create_pool(
-        host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASS, database=DB_NAME
-    )
+# === Мидлварь текста сообщения ===
+# Текст сообщения очищается от пробелов один раз и передаётся
+# обработчикам аргументом ``text``.
+class MessageTextMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Message):
+            data["text"] = (event.text or "").strip()
+        return await handler(event, data)
 
-    async with db_pool.acquire() as conn:
-        async with conn.transaction():
-            # Таблица пользователей
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    tg_id BIGINT UNIQUE NOT NULL,
-                    username TEXT NOT NULL,
-                    position TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            # Таблица склада пластиков
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS warehouse_plastics (
-                    id SERIAL PRIMARY KEY,
-                    article TEXT NOT NULL,
-                    material TEXT,
-                    thickness NUMERIC(10, 2),
-                    color TEXT,
-                    length NUMERIC(10, 2),
-                    width NUMERIC(10, 2),
-                    warehouse TEXT,
-                    comment TEXT,
-                    employee_id BIGINT,
-                    employee_name TEXT,
-                    arrival_date DATE,
-                    arrival_at TIMESTAMPTZ
-                )
-                """
-            )
-            await conn.execute(
-                """
-                ALTER TABLE warehouse_plastics
-                ADD COLUMN IF NOT EXISTS arrival_at TIMESTAMPTZ
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS written_off_plastics (
-                    id SERIAL PRIMARY KEY,
-                    source_id INTEGER,
-                    article TEXT NOT NULL,
-                    material TEXT,
-                    thickness NUMERIC(10, 2),
-                    color TEXT,
-                    length NUMERIC(10, 2),
-                    width NUMERIC(10, 2),
-                    warehouse TEXT,
-                    comment TEXT,
-                    employee_id BIGINT,
-                    employee_name TEXT,
-                    arrival_date DATE,
-                    arrival_at TIMESTAMPTZ,
-                    project TEXT,
-                    written_off_by_id BIGINT,
-                    written_off_by_name TEXT,
-                    written_off_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                ALTER TABLE written_off_plastics
-                ADD COLUMN IF NOT EXISTS written_off_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                """
-            )
-            # Таблица типов пластиков
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS plastic_material_types (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS plastic_material_thicknesses (
-                    id SERIAL PRIMARY KEY,
-                    material_id INTEGER NOT NULL REFERENCES plastic_material_types(id) ON DELETE CASCADE,
-                    thickness NUMERIC(10, 2) NOT NULL,
-                    UNIQUE(material_id, thickness)
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS plastic_material_colors (
-                    id SERIAL PRIMARY KEY,
-                    material_id INTEGER NOT NULL REFERENCES plastic_material_types(id) ON DELETE CASCADE,
-                    color TEXT NOT NULL,
-                    UNIQUE(material_id, color)
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS plastic_storage_locations (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS film_manufacturers (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_module_manufacturers (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_module_storage_locations (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_module_series (
-                    id SERIAL PRIMARY KEY,
-                    manufacturer_id INTEGER NOT NULL REFERENCES led_module_manufacturers(id) ON DELETE CASCADE,
-                    name TEXT NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now()),
-                    UNIQUE(manufacturer_id, name)
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_module_colors (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_module_power_options (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_module_voltage_options (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_module_lens_counts (
-                    id SERIAL PRIMARY KEY,
-                    value INTEGER UNIQUE NOT NULL CHECK (value > 0),
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS generated_led_modules (
-                    id SERIAL PRIMARY KEY,
-                    article TEXT UNIQUE NOT NULL,
-                    manufacturer_id INTEGER NOT NULL REFERENCES led_module_manufacturers(id) ON DELETE RESTRICT,
-                    series_id INTEGER NOT NULL REFERENCES led_module_series(id) ON DELETE RESTRICT,
-                    color_id INTEGER NOT NULL REFERENCES led_module_colors(id) ON DELETE RESTRICT,
-                    lens_count_id INTEGER NOT NULL REFERENCES led_module_lens_counts(id) ON DELETE RESTRICT,
-                    power_option_id INTEGER NOT NULL REFERENCES led_module_power_options(id) ON DELETE RESTRICT,
-                    voltage_option_id INTEGER NOT NULL REFERENCES led_module_voltage_options(id) ON DELETE RESTRICT,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS warehouse_led_modules (
-                    id SERIAL PRIMARY KEY,
-                    led_module_id INTEGER NOT NULL REFERENCES generated_led_modules(id) ON DELETE RESTRICT,
-                    article TEXT NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    added_by_id BIGINT,
-                    added_by_name TEXT,
-                    added_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                ALTER TABLE warehouse_led_modules
-                DROP CONSTRAINT IF EXISTS warehouse_led_modules_quantity_check
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS written_off_led_modules (
-                    id SERIAL PRIMARY KEY,
-                    led_module_id INTEGER NOT NULL REFERENCES generated_led_modules(id) ON DELETE RESTRICT,
-                    article TEXT NOT NULL,
-                    quantity INTEGER NOT NULL CHECK (quantity > 0),
-                    project TEXT,
-                    written_off_by_id BIGINT,
-                    written_off_by_name TEXT,
-                    written_off_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_strip_manufacturers (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_strip_series (
-                    id SERIAL PRIMARY KEY,
-                    manufacturer_id INTEGER NOT NULL REFERENCES led_strip_manufacturers(id) ON DELETE CASCADE,
-                    name TEXT NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now()),
-                    UNIQUE(manufacturer_id, name)
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_strip_color_options (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_strip_cut_options (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_strip_type_options (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_strip_bus_options (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_strip_led_count_options (
-                    id SERIAL PRIMARY KEY,
-                    value INTEGER UNIQUE NOT NULL CHECK (value > 0),
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_strip_voltage_options (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS led_strip_ip_options (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS power_supply_manufacturers (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS power_supply_power_options (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS power_supply_voltage_options (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS power_supply_ip_options (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS power_supply_series (
-                    id SERIAL PRIMARY KEY,
-                    manufacturer_id INTEGER NOT NULL REFERENCES power_supply_manufacturers(id) ON DELETE CASCADE,
-                    name TEXT NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now()),
-                    UNIQUE(manufacturer_id, name)
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS generated_power_supplies (
-                    id SERIAL PRIMARY KEY,
-                    article TEXT UNIQUE NOT NULL,
-                    manufacturer_id INTEGER NOT NULL REFERENCES power_supply_manufacturers(id) ON DELETE RESTRICT,
-                    series_id INTEGER NOT NULL REFERENCES power_supply_series(id) ON DELETE RESTRICT,
-                    power_option_id INTEGER NOT NULL REFERENCES power_supply_power_options(id) ON DELETE RESTRICT,
-                    voltage_option_id INTEGER NOT NULL REFERENCES power_supply_voltage_options(id) ON DELETE RESTRICT,
-                    ip_option_id INTEGER NOT NULL REFERENCES power_supply_ip_options(id) ON DELETE RESTRICT,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS warehouse_power_supplies (
-                    id SERIAL PRIMARY KEY,
-                    power_supply_id INTEGER NOT NULL REFERENCES generated_power_supplies(id) ON DELETE RESTRICT,
-                    article TEXT NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    added_by_id BIGINT,
-                    added_by_name TEXT,
-                    added_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS written_off_power_supplies (
-                    id SERIAL PRIMARY KEY,
-                    power_supply_id INTEGER NOT NULL REFERENCES generated_power_supplies(id) ON DELETE RESTRICT,
-                    article TEXT NOT NULL,
-                    quantity INTEGER NOT NULL CHECK (quantity > 0),
-                    order_reference TEXT,
-                    written_off_by_id BIGINT,
-                    written_off_by_name TEXT,
-                    written_off_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS film_series (
-                    id SERIAL PRIMARY KEY,
-                    manufacturer_id INTEGER NOT NULL REFERENCES film_manufacturers(id) ON DELETE CASCADE,
-                    name TEXT NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now()),
-                    UNIQUE(manufacturer_id, name)
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS film_storage_locations (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS order_types (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS task_types (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE SEQUENCE IF NOT EXISTS task_number_seq START 1
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id SERIAL PRIMARY KEY,
-                    task_number INTEGER NOT NULL UNIQUE DEFAULT nextval('task_number_seq'),
-                    task_type TEXT NOT NULL,
-                    comment TEXT,
-                    assignee_id BIGINT NOT NULL,
-                    assignee_name TEXT,
-                    assignee_position TEXT,
-                    due_date DATE NOT NULL,
-                    created_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now()),
-                    created_by_id BIGINT,
-                    created_by_name TEXT
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS clients (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    phone TEXT,
-                    contact_person TEXT,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS client_addresses (
-                    id SERIAL PRIMARY KEY,
-                    client_id INTEGER NOT NULL REFERENCES clients(id) ON DELETE CASCADE,
-                    address TEXT,
-                    google_maps_link TEXT,
-                    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE SEQUENCE IF NOT EXISTS order_number_seq START 1
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS orders (
-                    id SERIAL PRIMARY KEY,
-                    order_number INTEGER NOT NULL UNIQUE DEFAULT nextval('order_number_seq'),
-                    client_id INTEGER NOT NULL REFERENCES clients(id),
-                    client_name TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    order_type TEXT NOT NULL,
-                    folder_path TEXT NOT NULL,
-                    due_date DATE NOT NULL,
-                    is_urgent BOOLEAN NOT NULL DEFAULT FALSE,
-                    created_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now()),
-                    created_by_id BIGINT,
-                    created_by_name TEXT
-                )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS warehouse_films (
-                    id SERIAL PRIMARY KEY,
-                    article TEXT NOT NULL,
-                    manufacturer TEXT,
-                    series TEXT,
-                    color_code TEXT,
-                    color TEXT,
-                    width NUMERIC(10, 2),
-                    length NUMERIC(10, 2),
-                    warehouse TEXT,
-                    comment TEXT,
-                    employee_id BIGINT,
-                    employee_nick TEXT,
-                    recorded_at TIMESTAMPTZ
+
+# === Последовательная обработка обновлений чата ===
+# Поллинг запускает каждое обновление отдельной задачей, поэтому медленный
+# обработчик одного чата не задерживает другие. Блокировка на чат сохраняет
+# порядок сообщений внутри чата и не даёт двум обработчикам одновременно
+# менять его FSM. Очередь ожидающих обновлений чата ограничена.
+CHAT_PENDING_LIMIT = 64
+_CHAT_LOCKS: dict[int, asyncio.Lock] = {}
+_CHAT_PENDING: defaultdict[int, int] = defaultdict(int)
+
+
+class ChatOrderMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        chat = data.get("event_chat")
+        if chat is None:
+            return await handler(event, data)
+        chat_id = chat.id
+        if _CHAT_PENDING[chat_id] >= CHAT_PENDING_LIMIT:
+            logging.warning("Too many pending updates for chat %s, update dropped", chat_id)
+            return None
+        lock = _CHAT_LOCKS.get(chat_id)
+        if lock is None:
+            lock = _CHAT_LOCKS[chat_id] = asyncio.Lock()
+        _CHAT_PENDING[chat_id] += 1
+        try:
+            async with lock:
+                return await handler(event, data)
+        finally:
+            _CHAT_PENDING[chat_id] -= 1
+            if not _CHAT_PENDING[chat_id]:
+                del _CHAT_PENDING[chat_id]
+                del _CHAT_LOCKS[chat_id]
+
+
+# === Мидлварь отправки статичных клавиатур ===
+# JSON статичных клавиатур считается один раз при их создании в _kb,
+# а мидлварь сессии подставляет готовую строку в запрос, чтобы aiogram
+# не сериализовал одну и ту же клавиатуру заново при каждой отправке.
+_STATIC_MARKUP_JSON: dict[int, str] = {}
+
+
+class StaticMarkupMiddleware(BaseRequestMiddleware):
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        markup_json = _STATIC_MARKUP_JSON.get(id(getattr(method, "reply_markup", None)))
+        if markup_json is not None:
+            method = method.model_copy(update={"reply_markup": markup_json})
+        return await make_request(bot, method)
+
+
+# === Ограничение исходящих сообщений ===
+# Telegram допускает около 30 сообщений в секунду на бота; при всплеске
+# нажатий запросы ждут свободный токен в общей очереди, а не упираются
+# в ответы 429. В группу Telegram принимает не больше 20 сообщений в
+# минуту, поэтому для групп ведётся отдельное скользящее окно. Если 429
+# всё же пришёл, запрос повторяется после указанной Telegram паузы.
+TELEGRAM_RATE_LIMIT = 30.0
+TELEGRAM_GROUP_MESSAGES_PER_MINUTE = 20
+TELEGRAM_RETRY_ATTEMPTS = 2
+TELEGRAM_DNS_CACHE_TTL = 300
+TELEGRAM_KEEPALIVE_TIMEOUT = 75.0
+
+
+class TelegramRateLimiter:
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else rate
+        self._tokens = self._capacity
+        self._updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
                 )
-                """
-            )
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS written_off_films (
-                    id SERIAL PRIMARY KEY,
-                    source_id INTEGER,
-                    article TEXT NOT NULL,
-                    manufacturer TEXT,
-                    series TEXT,
-                    color_code TEXT,
-                    color TEXT,
-                    width NUMERIC(10, 2),
-                    length NUMERIC(10, 2),
-                    warehouse TEXT,
-                    comment TEXT,
-                    employee_id BIGINT,
-                    employee_nick TEXT,
-                    recorded_at TIMESTAMPTZ,
-                    project TEXT,
-                    written_off_by_id BIGINT,
-                    written_off_by_name TEXT,
-                    written_off_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class ChatWindowRateLimiter:
+    # Чаты упорядочены по последней отправке, поэтому чаты с полностью
+    # истёкшим окном снимаются с начала словаря. Блокировка чата живёт,
+    # пока её кто-то ждёт, как в ChatOrderMiddleware.
+    def __init__(self, limit: int, period: float) -> None:
+        self._limit = limit
+        self._period = period
+        self._sent: OrderedDict[Any, deque[float]] = OrderedDict()
+        self._locks: dict[Any, asyncio.Lock] = {}
+        self._pending: defaultdict[Any, int] = defaultdict(int)
+
+    async def acquire(self, chat_id: Any) -> None:
+        lock = self._locks.get(chat_id)
+        if lock is None:
+            lock = self._locks[chat_id] = asyncio.Lock()
+        self._pending[chat_id] += 1
+        try:
+            async with lock:
+                sent = self._sent.get(chat_id)
+                if sent is None:
+                    sent = self._sent[chat_id] = deque()
+                now = monotonic()
+                while sent and sent[0] <= now - self._period:
+                    sent.popleft()
+                if len(sent) >= self._limit:
+                    await asyncio.sleep(sent[0] + self._period - now)
+                    sent.popleft()
+                sent.append(monotonic())
+                self._sent.move_to_end(chat_id)
+                self._drop_expired_chats()
+        finally:
+            self._pending[chat_id] -= 1
+            if not self._pending[chat_id]:
+                del self._pending[chat_id]
+                del self._locks[chat_id]
+
+    def _drop_expired_chats(self) -> None:
+        threshold = monotonic() - self._period
+        while self._sent:
+            chat_id, sent = next(iter(self._sent.items()))
+            if sent and sent[-1] > threshold:
+                break
+            del self._sent[chat_id]
+
+
+class OutgoingRateLimitMiddleware(BaseRequestMiddleware):
+    def __init__(self, limiter: TelegramRateLimiter) -> None:
+        self._limiter = limiter
+        self._group_limiter = ChatWindowRateLimiter(
+            TELEGRAM_GROUP_MESSAGES_PER_MINUTE, 60.0
+        )
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+        if isinstance(chat_id, int) and chat_id < 0:
+            await self._group_limiter.acquire(chat_id)
+        for attempt in range(TELEGRAM_RETRY_ATTEMPTS + 1):
+            await self._limiter.acquire()
+            try:
+                result = await make_request(bot, method)
+                break
+            except TelegramRetryAfter as error:
+                if attempt == TELEGRAM_RETRY_ATTEMPTS:
+                    raise
+                logging.warning(
+                    "Telegram flood control for chat %s, retry in %s s",
+                    chat_id,
+                    error.retry_after,
                 )
-                """
-            )
-            await conn.execute(
-                """
-                ALTER TABLE written_off_films
-                ADD COLUMN IF NOT EXISTS written_off_at TIMESTAMPTZ DEFAULT timezone('utc', now())
-                """
-            )
+                await asyncio.sleep(error.retry_after)
+        return result
+
+
+# === Инициализация базы данных ===
+# Вся схема создаётся одним запросом: asyncpg отправляет текст без
+# параметров как простой запрос, и сервер выполняет все команды за один
+# обмен с базой. Команды идемпотентны, поэтому запуск безопасен повторно.
+SCHEMA_DDL = """
+-- Таблица пользователей
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    tg_id BIGINT UNIQUE NOT NULL,
+    username TEXT NOT NULL,
+    position TEXT NOT NULL,
+    role TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+-- Признак администратора вычисляется из роли при каждой записи
+ALTER TABLE users ADD COLUMN IF NOT EXISTS is_admin BOOLEAN GENERATED ALWAYS AS (
+    lower(role) LIKE '%админист%' OR lower(role) LIKE '%admin%'
+) STORED;
+
+-- Проверка доступа читает признак администратора прямо из индекса
+CREATE INDEX IF NOT EXISTS users_tg_id_is_admin_idx
+ON users (tg_id) INCLUDE (is_admin);
+
+-- Уведомление об изменениях пользователей для сброса кэша доступа
+CREATE OR REPLACE FUNCTION notify_users_changed() RETURNS trigger AS $$
+BEGIN
+    -- При смене tg_id сбрасываются записи и старого, и нового id;
+    -- одинаковые уведомления в одной транзакции сервер объединяет.
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('users_changed', OLD.tg_id::text);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM pg_notify('users_changed', NEW.tg_id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS users_changed_notify ON users;
+CREATE TRIGGER users_changed_notify
+AFTER INSERT OR UPDATE OR DELETE ON users
+FOR EACH ROW EXECUTE FUNCTION notify_users_changed();
+
+-- Таблица склада пластиков
+CREATE TABLE IF NOT EXISTS warehouse_plastics (
+    id SERIAL PRIMARY KEY,
+    article TEXT NOT NULL,
+    material TEXT,
+    thickness NUMERIC(10, 2),
+    color TEXT,
+    length NUMERIC(10, 2),
+    width NUMERIC(10, 2),
+    warehouse TEXT,
+    comment TEXT,
+    employee_id BIGINT,
+    employee_name TEXT,
+    arrival_date DATE,
+    arrival_at TIMESTAMPTZ
+);
+
+ALTER TABLE warehouse_plastics
+ADD COLUMN IF NOT EXISTS arrival_at TIMESTAMPTZ;
+
+-- Индексы под поиск листа по артикулу и расширенный поиск по материалу
+CREATE INDEX IF NOT EXISTS warehouse_plastics_article_idx
+ON warehouse_plastics (article);
+
+CREATE INDEX IF NOT EXISTS warehouse_plastics_lower_material_thickness_idx
+ON warehouse_plastics (LOWER(material), thickness);
+
+CREATE TABLE IF NOT EXISTS written_off_plastics (
+    id SERIAL PRIMARY KEY,
+    source_id INTEGER,
+    article TEXT NOT NULL,
+    material TEXT,
+    thickness NUMERIC(10, 2),
+    color TEXT,
+    length NUMERIC(10, 2),
+    width NUMERIC(10, 2),
+    warehouse TEXT,
+    comment TEXT,
+    employee_id BIGINT,
+    employee_name TEXT,
+    arrival_date DATE,
+    arrival_at TIMESTAMPTZ,
+    project TEXT,
+    written_off_by_id BIGINT,
+    written_off_by_name TEXT,
+    written_off_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
+);
+
+ALTER TABLE written_off_plastics
+ADD COLUMN IF NOT EXISTS written_off_at TIMESTAMPTZ DEFAULT timezone('utc', now());
+
+-- Таблица типов пластиков
+CREATE TABLE IF NOT EXISTS plastic_material_types (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS plastic_material_thicknesses (
+    id SERIAL PRIMARY KEY,
+    material_id INTEGER NOT NULL REFERENCES plastic_material_types(id) ON DELETE CASCADE,
+    thickness NUMERIC(10, 2) NOT NULL,
+    UNIQUE(material_id, thickness)
+);
+
+CREATE TABLE IF NOT EXISTS plastic_material_colors (
+    id SERIAL PRIMARY KEY,
+    material_id INTEGER NOT NULL REFERENCES plastic_material_types(id) ON DELETE CASCADE,
+    color TEXT NOT NULL,
+    UNIQUE(material_id, color)
+);
+
+-- Ключи для регистронезависимого поиска по индексу вместо LOWER(name)
+ALTER TABLE plastic_material_types
+ADD COLUMN IF NOT EXISTS name_key TEXT
+GENERATED ALWAYS AS (lower(normalize(name, NFC))) STORED;
+
+CREATE INDEX IF NOT EXISTS plastic_material_types_name_key_idx
+ON plastic_material_types (name_key);
+
+-- Индекс под сортировку списка материалов ORDER BY LOWER(name)
+CREATE INDEX IF NOT EXISTS plastic_material_types_lower_name_idx
+ON plastic_material_types (LOWER(name));
+
+ALTER TABLE plastic_material_colors
+ADD COLUMN IF NOT EXISTS color_key TEXT
+GENERATED ALWAYS AS (lower(normalize(color, NFC))) STORED;
+
+CREATE INDEX IF NOT EXISTS plastic_material_colors_color_key_idx
+ON plastic_material_colors (material_id, color_key);
+
+CREATE TABLE IF NOT EXISTS plastic_storage_locations (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS film_manufacturers (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_module_manufacturers (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_module_storage_locations (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_module_series (
+    id SERIAL PRIMARY KEY,
+    manufacturer_id INTEGER NOT NULL REFERENCES led_module_manufacturers(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now()),
+    UNIQUE(manufacturer_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS led_module_colors (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_module_power_options (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_module_voltage_options (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_module_lens_counts (
+    id SERIAL PRIMARY KEY,
+    value INTEGER UNIQUE NOT NULL CHECK (value > 0),
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS generated_led_modules (
+    id SERIAL PRIMARY KEY,
+    article TEXT UNIQUE NOT NULL,
+    manufacturer_id INTEGER NOT NULL REFERENCES led_module_manufacturers(id) ON DELETE RESTRICT,
+    series_id INTEGER NOT NULL REFERENCES led_module_series(id) ON DELETE RESTRICT,
+    color_id INTEGER NOT NULL REFERENCES led_module_colors(id) ON DELETE RESTRICT,
+    lens_count_id INTEGER NOT NULL REFERENCES led_module_lens_counts(id) ON DELETE RESTRICT,
+    power_option_id INTEGER NOT NULL REFERENCES led_module_power_options(id) ON DELETE RESTRICT,
+    voltage_option_id INTEGER NOT NULL REFERENCES led_module_voltage_options(id) ON DELETE RESTRICT,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS warehouse_led_modules (
+    id SERIAL PRIMARY KEY,
+    led_module_id INTEGER NOT NULL REFERENCES generated_led_modules(id) ON DELETE RESTRICT,
+    article TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    added_by_id BIGINT,
+    added_by_name TEXT,
+    added_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
+);
+
+ALTER TABLE warehouse_led_modules
+DROP CONSTRAINT IF EXISTS warehouse_led_modules_quantity_check;
+
+CREATE TABLE IF NOT EXISTS written_off_led_modules (
+    id SERIAL PRIMARY KEY,
+    led_module_id INTEGER NOT NULL REFERENCES generated_led_modules(id) ON DELETE RESTRICT,
+    article TEXT NOT NULL,
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    project TEXT,
+    written_off_by_id BIGINT,
+    written_off_by_name TEXT,
+    written_off_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_strip_manufacturers (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_strip_series (
+    id SERIAL PRIMARY KEY,
+    manufacturer_id INTEGER NOT NULL REFERENCES led_strip_manufacturers(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now()),
+    UNIQUE(manufacturer_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS led_strip_color_options (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_strip_cut_options (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_strip_type_options (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_strip_bus_options (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_strip_led_count_options (
+    id SERIAL PRIMARY KEY,
+    value INTEGER UNIQUE NOT NULL CHECK (value > 0),
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_strip_voltage_options (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS led_strip_ip_options (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS power_supply_manufacturers (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS power_supply_power_options (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS power_supply_voltage_options (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS power_supply_ip_options (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS power_supply_series (
+    id SERIAL PRIMARY KEY,
+    manufacturer_id INTEGER NOT NULL REFERENCES power_supply_manufacturers(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now()),
+    UNIQUE(manufacturer_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS generated_power_supplies (
+    id SERIAL PRIMARY KEY,
+    article TEXT UNIQUE NOT NULL,
+    manufacturer_id INTEGER NOT NULL REFERENCES power_supply_manufacturers(id) ON DELETE RESTRICT,
+    series_id INTEGER NOT NULL REFERENCES power_supply_series(id) ON DELETE RESTRICT,
+    power_option_id INTEGER NOT NULL REFERENCES power_supply_power_options(id) ON DELETE RESTRICT,
+    voltage_option_id INTEGER NOT NULL REFERENCES power_supply_voltage_options(id) ON DELETE RESTRICT,
+    ip_option_id INTEGER NOT NULL REFERENCES power_supply_ip_options(id) ON DELETE RESTRICT,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS warehouse_power_supplies (
+    id SERIAL PRIMARY KEY,
+    power_supply_id INTEGER NOT NULL REFERENCES generated_power_supplies(id) ON DELETE RESTRICT,
+    article TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    added_by_id BIGINT,
+    added_by_name TEXT,
+    added_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS written_off_power_supplies (
+    id SERIAL PRIMARY KEY,
+    power_supply_id INTEGER NOT NULL REFERENCES generated_power_supplies(id) ON DELETE RESTRICT,
+    article TEXT NOT NULL,
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    order_reference TEXT,
+    written_off_by_id BIGINT,
+    written_off_by_name TEXT,
+    written_off_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS film_series (
+    id SERIAL PRIMARY KEY,
+    manufacturer_id INTEGER NOT NULL REFERENCES film_manufacturers(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now()),
+    UNIQUE(manufacturer_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS film_storage_locations (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS order_types (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS task_types (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE SEQUENCE IF NOT EXISTS task_number_seq START 1;
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id SERIAL PRIMARY KEY,
+    task_number INTEGER NOT NULL UNIQUE DEFAULT nextval('task_number_seq'),
+    task_type TEXT NOT NULL,
+    comment TEXT,
+    assignee_id BIGINT NOT NULL,
+    assignee_name TEXT,
+    assignee_position TEXT,
+    due_date DATE NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now()),
+    created_by_id BIGINT,
+    created_by_name TEXT
+);
+
+CREATE TABLE IF NOT EXISTS clients (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    phone TEXT,
+    contact_person TEXT,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE TABLE IF NOT EXISTS client_addresses (
+    id SERIAL PRIMARY KEY,
+    client_id INTEGER NOT NULL REFERENCES clients(id) ON DELETE CASCADE,
+    address TEXT,
+    google_maps_link TEXT,
+    created_at TIMESTAMPTZ DEFAULT timezone('utc', now())
+);
+
+CREATE SEQUENCE IF NOT EXISTS order_number_seq START 1;
+
+CREATE TABLE IF NOT EXISTS orders (
+    id SERIAL PRIMARY KEY,
+    order_number INTEGER NOT NULL UNIQUE DEFAULT nextval('order_number_seq'),
+    client_id INTEGER NOT NULL REFERENCES clients(id),
+    client_name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    order_type TEXT NOT NULL,
+    folder_path TEXT NOT NULL,
+    due_date DATE NOT NULL,
+    is_urgent BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now()),
+    created_by_id BIGINT,
+    created_by_name TEXT
+);
+
+CREATE TABLE IF NOT EXISTS warehouse_films (
+    id SERIAL PRIMARY KEY,
+    article TEXT NOT NULL,
+    manufacturer TEXT,
+    series TEXT,
+    color_code TEXT,
+    color TEXT,
+    width NUMERIC(10, 2),
+    length NUMERIC(10, 2),
+    warehouse TEXT,
+    comment TEXT,
+    employee_id BIGINT,
+    employee_nick TEXT,
+    recorded_at TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS written_off_films (
+    id SERIAL PRIMARY KEY,
+    source_id INTEGER,
+    article TEXT NOT NULL,
+    manufacturer TEXT,
+    series TEXT,
+    color_code TEXT,
+    color TEXT,
+    width NUMERIC(10, 2),
+    length NUMERIC(10, 2),
+    warehouse TEXT,
+    comment TEXT,
+    employee_id BIGINT,
+    employee_nick TEXT,
+    recorded_at TIMESTAMPTZ,
+    project TEXT,
+    written_off_by_id BIGINT,
+    written_off_by_name TEXT,
+    written_off_at TIMESTAMPTZ NOT NULL DEFAULT timezone('utc', now())
+);
+
+ALTER TABLE written_off_films
+ADD COLUMN IF NOT EXISTS written_off_at TIMESTAMPTZ DEFAULT timezone('utc', now());
+
+-- Отпечаток применённой схемы
+CREATE TABLE IF NOT EXISTS schema_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    ddl_hash TEXT NOT NULL
+);
+"""
+# ALTER TABLE берёт эксклюзивную блокировку даже когда менять нечего, поэтому
+# при совпадении отпечатка SCHEMA_DDL миграция при запуске пропускается.
+SCHEMA_HASH = hashlib.sha256(SCHEMA_DDL.encode()).hexdigest()
+_SQL_SCHEMA_HASH = "SELECT ddl_hash FROM schema_state"
+_SQL_SAVE_SCHEMA_HASH = """
+INSERT INTO schema_state (ddl_hash) VALUES ($1)
+ON CONFLICT (id) DO UPDATE SET ddl_hash = EXCLUDED.ddl_hash
+"""
+
+
+async def init_database() -> None:
+    global db_pool
+    db_pool = await asyncpg.create_pool(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASS,
+        database=DB_NAME,
+        min_size=DB_POOL_MIN,
+        max_size=DB_POOL_MAX,
+        max_queries=DB_POOL_MAX_QUERIES,
+        max_inactive_connection_lifetime=DB_POOL_INACTIVE_LIFETIME,
+        command_timeout=DB_COMMAND_TIMEOUT,
+        statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+    )
+    # Подписываемся до загрузки пользователей, чтобы не пропустить изменения.
+    await start_users_listener()
+
+    async with db_pool.acquire() as conn:
+        try:
+            schema_current = await conn.fetchval(_SQL_SCHEMA_HASH) == SCHEMA_HASH
+        except asyncpg.UndefinedTableError:
+            schema_current = False
+        async with conn.transaction():
+            if not schema_current:
+                await conn.execute(SCHEMA_DDL)
+                await conn.execute(_SQL_SAVE_SCHEMA_HASH, SCHEMA_HASH)
             # Добавляем администратора
             await conn.execute(
                 """
@@ -689,16 +999,47 @@ async def init_database() -> None:
                 SET username = EXCLUDED.username,
                     position = EXCLUDED.position,
                     role = EXCLUDED.role
+                WHERE (users.username, users.position, users.role)
+                    IS DISTINCT FROM (EXCLUDED.username, EXCLUDED.position, EXCLUDED.role)
                 """,
-                37352491,
+                ADMIN_TG_ID,
                 "DooMka",
                 "Администратор",
                 "администратор с полными правами и доступом",
             )
+            rows = await conn.fetch(_SQL_ALL_USER_ACCESS)
+
+    ttl = ACCESS_CACHE_LISTENED_TTL if users_listener is not None else ACCESS_CACHE_TTL
+    expires = monotonic() + ttl
+    _ACCESS_CACHE.clear()
+    for row in rows:
+        _store_user_access(row["tg_id"], (expires, True, row["is_admin"]))
+
+
+async def start_users_listener() -> None:
+    global users_listener
+    try:
+        users_listener = await asyncpg.connect(
+            host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASS, database=DB_NAME
+        )
+        await users_listener.add_listener(USERS_CHANGED_CHANNEL, _on_users_changed)
+    except (OSError, asyncpg.PostgresError):
+        logging.exception("Failed to subscribe to users changes, access cache uses TTL only")
+        if users_listener is not None:
+            await users_listener.close()
+        users_listener = None
+        return
+    users_listener.add_termination_listener(_on_users_listener_lost)
 
 
 async def close_database() -> None:
-    global db_pool
+    global db_pool, users_listener
+    if _users_listener_reconnect is not None:
+        _users_listener_reconnect.cancel()
+    if users_listener is not None:
+        users_listener.remove_termination_listener(_on_users_listener_lost)
+        await users_listener.close()
+        users_listener = None
     if db_pool:
         await db_pool.close()
         db_pool = None
@@ -708,7 +1049,6 @@ async def close_database() -> None:
 async def on_startup(bot: Bot) -> None:
     await init_database()
     logging.info("✅ Бот запущен и подключён к базе данных.")
-    print("✅ Бот запущен и подключён к базе данных.")
 
 
 async def on_shutdown(bot: Bot) -> None:
@@ -719,7 +1059,44 @@ async def on_shutdown(bot: Bot) -> None:
 dp = Dispatcher()
 dp.startup.register(on_startup)
 dp.shutdown.register(on_shutdown)
+dp.update.outer_middleware(ChatOrderMiddleware())
 dp.message.outer_middleware(AccessControlMiddleware())
+dp.message.outer_middleware(MessageTextMiddleware())
+
+
+# === Маршрутизация кнопок меню ===
+# Кнопки меню ищутся по точному тексту в словаре вместо перебора отдельного
+# фильтра `F.text == ...` на каждый обработчик. Обработчик-маршрутизатор
+# регистрируется раньше обработчиков FSM, поэтому кнопки меню имеют приоритет
+# над вводом в состояниях; тексты, которые обрабатывают сами состояния
+# (например, «❌ Отмена»), регистрируются отдельно. Права администратора
+# для кнопок с admin_only проверяются здесь же, до вызова обработчика.
+MENU_ROUTES: Dict[str, CallableObject] = {}
+ADMIN_MENU_BUTTONS: set[str] = set()
+
+
+def menu_button(
+    *texts: str, admin_only: bool = False
+) -> Callable[[MenuHandler], MenuHandler]:
+    def decorator(handler: MenuHandler) -> MenuHandler:
+        for text in texts:
+            if text in MENU_ROUTES:
+                raise ValueError(f"Кнопка «{text}» уже зарегистрирована")
+            MENU_ROUTES[text] = CallableObject(handler)
+            if admin_only:
+                ADMIN_MENU_BUTTONS.add(text)
+        return handler
+
+    return decorator
+
+
+@dp.message(F.text.in_(MENU_ROUTES))
+async def handle_menu_button(message: Message, **data: Any) -> Any:
+    if message.text in ADMIN_MENU_BUTTONS and not await ensure_admin_access(
+        message, data.get("state"), is_admin=data.get("is_admin")
+    ):
+        return None
+    return await MENU_ROUTES[message.text].call(message, **data)
 
 
 # === FSM ===
@@ -1039,21 +1416,21 @@ class WriteOffWarehousePlasticStates(StatesGroup):
 
 
 # === Клавиатуры ===
-MAIN_MENU_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [
-            KeyboardButton(text="🏢 Склад"),
-            KeyboardButton(text="⚙️ Настройки"),
-        ],
-        [
-            KeyboardButton(text="Клиенты"),
-            KeyboardButton(text="Заказы"),
-        ],
-        [
-            KeyboardButton(text="Задачи"),
-        ],
-    ],
-    resize_keyboard=True,
+def _kb(*rows: tuple[str, ...]) -> ReplyKeyboardMarkup:
+    # Статичные клавиатуры собираются один раз при импорте из заведомо
+    # корректных строк, поэтому pydantic-валидацию кнопок можно пропустить.
+    markup = ReplyKeyboardMarkup.model_construct(
+        keyboard=[[KeyboardButton.model_construct(text=text) for text in row] for row in rows],
+        resize_keyboard=True,
+    )
+    _STATIC_MARKUP_JSON[id(markup)] = markup.model_dump_json(exclude_none=True)
+    return markup
+
+
+MAIN_MENU_KB = _kb(
+    ("🏢 Склад", "⚙️ Настройки"),
+    ("Клиенты", "Заказы"),
+    ("Задачи",),
 )
 
 TASKS_CREATE_TASK_TEXT = "Создать задачу"
@@ -1061,14 +1438,11 @@ TASKS_VIEW_TASKS_TEXT = "Посмотреть задачи"
 TASKS_SETTINGS_TEXT = "⚙️ Настройки задач"
 TASKS_SETTINGS_BACK_TEXT = "⬅️ Назад к задачам"
 
-TASKS_MENU_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=TASKS_CREATE_TASK_TEXT)],
-        [KeyboardButton(text=TASKS_VIEW_TASKS_TEXT)],
-        [KeyboardButton(text=TASKS_SETTINGS_TEXT)],
-        [KeyboardButton(text="⬅️ Главное меню")],
-    ],
-    resize_keyboard=True,
+TASKS_MENU_KB = _kb(
+    (TASKS_CREATE_TASK_TEXT,),
+    (TASKS_VIEW_TASKS_TEXT,),
+    (TASKS_SETTINGS_TEXT,),
+    ("⬅️ Главное меню",),
 )
 
 TASKS_SETTINGS_TASK_TYPES_TEXT = "🗂️ Виды задач"
@@ -1076,22 +1450,16 @@ TASK_TYPES_ADD_TEXT = "➕ Добавить вид задачи"
 TASK_TYPES_DELETE_TEXT = "➖ Удалить вид задачи"
 TASK_TYPES_BACK_TEXT = "⬅️ Назад к настройкам задач"
 
-TASKS_SETTINGS_MENU_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=TASKS_SETTINGS_TASK_TYPES_TEXT)],
-        [KeyboardButton(text=TASKS_SETTINGS_BACK_TEXT)],
-        [KeyboardButton(text="⬅️ Главное меню")],
-    ],
-    resize_keyboard=True,
+TASKS_SETTINGS_MENU_KB = _kb(
+    (TASKS_SETTINGS_TASK_TYPES_TEXT,),
+    (TASKS_SETTINGS_BACK_TEXT,),
+    ("⬅️ Главное меню",),
 )
 
-TASK_TYPES_MENU_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=TASK_TYPES_ADD_TEXT)],
-        [KeyboardButton(text=TASK_TYPES_DELETE_TEXT)],
-        [KeyboardButton(text=TASK_TYPES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+TASK_TYPES_MENU_KB = _kb(
+    (TASK_TYPES_ADD_TEXT,),
+    (TASK_TYPES_DELETE_TEXT,),
+    (TASK_TYPES_BACK_TEXT,),
 )
 
 ORDERS_NEW_ORDER_TEXT = "🆕 Новый заказ"
@@ -1103,61 +1471,43 @@ ORDER_TYPE_ADD_TEXT = "➕ Добавить тип заказа"
 ORDER_TYPE_DELETE_TEXT = "➖ Удалить тип заказа"
 ORDER_TYPE_BACK_TEXT = "⬅️ Назад к настройкам заказов"
 
-ORDERS_MENU_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=ORDERS_NEW_ORDER_TEXT)],
-        [KeyboardButton(text=ORDERS_IN_PROGRESS_TEXT)],
-        [KeyboardButton(text=ORDERS_SETTINGS_TEXT)],
-        [KeyboardButton(text="⬅️ Главное меню")],
-    ],
-    resize_keyboard=True,
+ORDERS_MENU_KB = _kb(
+    (ORDERS_NEW_ORDER_TEXT,),
+    (ORDERS_IN_PROGRESS_TEXT,),
+    (ORDERS_SETTINGS_TEXT,),
+    ("⬅️ Главное меню",),
 )
 
-ORDERS_SETTINGS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=ORDERS_SETTINGS_ORDER_TYPE_TEXT)],
-        [KeyboardButton(text=ORDERS_SETTINGS_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+ORDERS_SETTINGS_KB = _kb(
+    (ORDERS_SETTINGS_ORDER_TYPE_TEXT,),
+    (ORDERS_SETTINGS_BACK_TEXT,),
 )
 
-ORDERS_ORDER_TYPE_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=ORDER_TYPE_ADD_TEXT)],
-        [KeyboardButton(text=ORDER_TYPE_DELETE_TEXT)],
-        [KeyboardButton(text=ORDER_TYPE_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+ORDERS_ORDER_TYPE_KB = _kb(
+    (ORDER_TYPE_ADD_TEXT,),
+    (ORDER_TYPE_DELETE_TEXT,),
+    (ORDER_TYPE_BACK_TEXT,),
 )
 
 CLIENTS_ADD_CLIENT_TEXT = "➕ Добавить клиента"
 CLIENTS_SEARCH_CLIENT_TEXT = "🔍 Поиск клиента"
 
-CLIENTS_MENU_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=CLIENTS_ADD_CLIENT_TEXT)],
-        [KeyboardButton(text=CLIENTS_SEARCH_CLIENT_TEXT)],
-        [KeyboardButton(text="⬅️ Главное меню")],
-    ],
-    resize_keyboard=True,
+CLIENTS_MENU_KB = _kb(
+    (CLIENTS_ADD_CLIENT_TEXT,),
+    (CLIENTS_SEARCH_CLIENT_TEXT,),
+    ("⬅️ Главное меню",),
 )
 
-SETTINGS_MENU_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="👥 Пользователи")],
-        [KeyboardButton(text="🔄 Перезагрузить")],
-        [KeyboardButton(text="⬅️ Главное меню")],
-    ],
-    resize_keyboard=True,
+SETTINGS_MENU_KB = _kb(
+    ("👥 Пользователи",),
+    ("🔄 Перезагрузить",),
+    ("⬅️ Главное меню",),
 )
 
-USERS_MENU_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="➕ Добавить пользователя")],
-        [KeyboardButton(text="📋 Посмотреть всех пользователей")],
-        [KeyboardButton(text="⬅️ Назад в настройки")],
-    ],
-    resize_keyboard=True,
+USERS_MENU_KB = _kb(
+    ("➕ Добавить пользователя",),
+    ("📋 Посмотреть всех пользователей",),
+    ("⬅️ Назад в настройки",),
 )
 
 WAREHOUSE_ELECTRICS_TEXT = "⚡ Электрика"
@@ -1173,15 +1523,12 @@ WAREHOUSE_POWER_SUPPLIES_WRITE_OFF_TEXT = "➖ Списать Блок пита
 WAREHOUSE_POWER_SUPPLIES_STOCK_TEXT = "📦 Остаток Блоков питания на складе"
 WAREHOUSE_POWER_SUPPLIES_BACK_TO_ELECTRICS_TEXT = "⬅️ Назад к разделу «Электрика»"
 
-WAREHOUSE_MENU_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="🧱 Пластики")],
-        [KeyboardButton(text="🎞️ Пленки")],
-        [KeyboardButton(text=WAREHOUSE_ELECTRICS_TEXT)],
-        [KeyboardButton(text="⚙️ Настройки склада")],
-        [KeyboardButton(text="⬅️ Главное меню")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_MENU_KB = _kb(
+    ("🧱 Пластики",),
+    ("🎞️ Пленки",),
+    (WAREHOUSE_ELECTRICS_TEXT,),
+    ("⚙️ Настройки склада",),
+    ("⬅️ Главное меню",),
 )
 
 WAREHOUSE_SETTINGS_ELECTRICS_TEXT = "⚡ Электрика ⚙️"
@@ -1191,46 +1538,34 @@ LED_MODULES_BASE_MENU_TEXT = "Led модули baza"
 WAREHOUSE_SETTINGS_ELECTRICS_POWER_SUPPLIES_TEXT = "🔌 Блоки питания ⚙️"
 WAREHOUSE_SETTINGS_BACK_TO_ELECTRICS_TEXT = "⬅️ Назад к электрике"
 
-WAREHOUSE_SETTINGS_MENU_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="🧱 Пластик")],
-        [KeyboardButton(text="🎞️ Пленки ⚙️")],
-        [KeyboardButton(text=WAREHOUSE_SETTINGS_ELECTRICS_TEXT)],
-        [KeyboardButton(text="⬅️ Назад к складу")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_MENU_KB = _kb(
+    ("🧱 Пластик",),
+    ("🎞️ Пленки ⚙️",),
+    (WAREHOUSE_SETTINGS_ELECTRICS_TEXT,),
+    ("⬅️ Назад к складу",),
 )
 
-WAREHOUSE_SETTINGS_PLASTIC_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="📦 Материал")],
-        [KeyboardButton(text="📏 Толщина")],
-        [KeyboardButton(text="🎨 Цвет")],
-        [KeyboardButton(text="🏷️ Место хранения")],
-        [KeyboardButton(text="⬅️ Назад к складу")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_PLASTIC_KB = _kb(
+    ("📦 Материал",),
+    ("📏 Толщина",),
+    ("🎨 Цвет",),
+    ("🏷️ Место хранения",),
+    ("⬅️ Назад к складу",),
 )
 
-WAREHOUSE_SETTINGS_FILM_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="🏭 Производитель")],
-        [KeyboardButton(text="🎬 Серия")],
-        [KeyboardButton(text="🏬 Склад")],
-        [KeyboardButton(text="⬅️ Назад к складу")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_FILM_KB = _kb(
+    ("🏭 Производитель",),
+    ("🎬 Серия",),
+    ("🏬 Склад",),
+    ("⬅️ Назад к складу",),
 )
 
-WAREHOUSE_SETTINGS_ELECTRICS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=WAREHOUSE_SETTINGS_ELECTRICS_LED_STRIPS_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_SETTINGS_ELECTRICS_LED_MODULES_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_SETTINGS_ELECTRICS_POWER_SUPPLIES_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_SETTINGS_BACK_TO_ELECTRICS_TEXT)],
-        [KeyboardButton(text="⬅️ Назад к складу")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_ELECTRICS_KB = _kb(
+    (WAREHOUSE_SETTINGS_ELECTRICS_LED_STRIPS_TEXT,),
+    (WAREHOUSE_SETTINGS_ELECTRICS_LED_MODULES_TEXT,),
+    (WAREHOUSE_SETTINGS_ELECTRICS_POWER_SUPPLIES_TEXT,),
+    (WAREHOUSE_SETTINGS_BACK_TO_ELECTRICS_TEXT,),
+    ("⬅️ Назад к складу",),
 )
 
 LED_MODULES_MANUFACTURERS_MENU_TEXT = "🏭 Производитель Led модулей"
@@ -1305,320 +1640,221 @@ POWER_SUPPLIES_ADD_IP_TEXT = "➕ Добавить IP блока питания"
 POWER_SUPPLIES_REMOVE_IP_TEXT = "➖ Удалить IP блока питания"
 POWER_SUPPLIES_BACK_TEXT = "⬅️ Назад к блокам питания"
 
-WAREHOUSE_SETTINGS_LED_STRIPS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_STRIPS_MANUFACTURERS_MENU_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_SERIES_MENU_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_COLORS_MENU_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_CUT_MENU_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_TYPE_MENU_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_BUS_MENU_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_LED_COUNT_MENU_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_VOLTAGE_MENU_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_IP_MENU_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_SETTINGS_BACK_TO_ELECTRICS_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_STRIPS_KB = _kb(
+    (LED_STRIPS_MANUFACTURERS_MENU_TEXT,),
+    (LED_STRIPS_SERIES_MENU_TEXT,),
+    (LED_STRIPS_COLORS_MENU_TEXT,),
+    (LED_STRIPS_CUT_MENU_TEXT,),
+    (LED_STRIPS_TYPE_MENU_TEXT,),
+    (LED_STRIPS_BUS_MENU_TEXT,),
+    (LED_STRIPS_LED_COUNT_MENU_TEXT,),
+    (LED_STRIPS_VOLTAGE_MENU_TEXT,),
+    (LED_STRIPS_IP_MENU_TEXT,),
+    (WAREHOUSE_SETTINGS_BACK_TO_ELECTRICS_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_MODULES_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_MODULES_MANUFACTURERS_MENU_TEXT)],
-        [KeyboardButton(text=LED_MODULES_SERIES_MENU_TEXT)],
-        [KeyboardButton(text=LED_MODULES_STORAGE_MENU_TEXT)],
-        [KeyboardButton(text=LED_MODULES_BASE_MENU_TEXT)],
-        [KeyboardButton(text=LED_MODULES_COLORS_MENU_TEXT)],
-        [KeyboardButton(text=LED_MODULES_POWER_MENU_TEXT)],
-        [KeyboardButton(text=LED_MODULES_VOLTAGE_MENU_TEXT)],
-        [KeyboardButton(text=LED_MODULES_LENS_MENU_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_SETTINGS_BACK_TO_ELECTRICS_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_MODULES_KB = _kb(
+    (LED_MODULES_MANUFACTURERS_MENU_TEXT,),
+    (LED_MODULES_SERIES_MENU_TEXT,),
+    (LED_MODULES_STORAGE_MENU_TEXT,),
+    (LED_MODULES_BASE_MENU_TEXT,),
+    (LED_MODULES_COLORS_MENU_TEXT,),
+    (LED_MODULES_POWER_MENU_TEXT,),
+    (LED_MODULES_VOLTAGE_MENU_TEXT,),
+    (LED_MODULES_LENS_MENU_TEXT,),
+    (WAREHOUSE_SETTINGS_BACK_TO_ELECTRICS_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_MODULES_BASE_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_MODULES_GENERATE_TEXT)],
-        [KeyboardButton(text=LED_MODULES_DELETE_TEXT)],
-        [KeyboardButton(text=LED_MODULES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_MODULES_BASE_KB = _kb(
+    (LED_MODULES_GENERATE_TEXT,),
+    (LED_MODULES_DELETE_TEXT,),
+    (LED_MODULES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_MODULES_MANUFACTURERS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_MODULES_ADD_MANUFACTURER_TEXT)],
-        [KeyboardButton(text=LED_MODULES_REMOVE_MANUFACTURER_TEXT)],
-        [KeyboardButton(text=LED_MODULES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_MODULES_MANUFACTURERS_KB = _kb(
+    (LED_MODULES_ADD_MANUFACTURER_TEXT,),
+    (LED_MODULES_REMOVE_MANUFACTURER_TEXT,),
+    (LED_MODULES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_MODULES_SERIES_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_MODULES_ADD_SERIES_TEXT)],
-        [KeyboardButton(text=LED_MODULES_REMOVE_SERIES_TEXT)],
-        [KeyboardButton(text=LED_MODULES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_MODULES_SERIES_KB = _kb(
+    (LED_MODULES_ADD_SERIES_TEXT,),
+    (LED_MODULES_REMOVE_SERIES_TEXT,),
+    (LED_MODULES_BACK_TEXT,),
 )
 
 
-WAREHOUSE_SETTINGS_LED_MODULES_STORAGE_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_MODULES_ADD_STORAGE_TEXT)],
-        [KeyboardButton(text=LED_MODULES_REMOVE_STORAGE_TEXT)],
-        [KeyboardButton(text=LED_MODULES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_MODULES_STORAGE_KB = _kb(
+    (LED_MODULES_ADD_STORAGE_TEXT,),
+    (LED_MODULES_REMOVE_STORAGE_TEXT,),
+    (LED_MODULES_BACK_TEXT,),
 )
 
 
-WAREHOUSE_SETTINGS_LED_MODULES_COLORS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_MODULES_ADD_COLOR_TEXT)],
-        [KeyboardButton(text=LED_MODULES_REMOVE_COLOR_TEXT)],
-        [KeyboardButton(text=LED_MODULES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_MODULES_COLORS_KB = _kb(
+    (LED_MODULES_ADD_COLOR_TEXT,),
+    (LED_MODULES_REMOVE_COLOR_TEXT,),
+    (LED_MODULES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_MODULES_POWER_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_MODULES_ADD_POWER_TEXT)],
-        [KeyboardButton(text=LED_MODULES_REMOVE_POWER_TEXT)],
-        [KeyboardButton(text=LED_MODULES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_MODULES_POWER_KB = _kb(
+    (LED_MODULES_ADD_POWER_TEXT,),
+    (LED_MODULES_REMOVE_POWER_TEXT,),
+    (LED_MODULES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_MODULES_VOLTAGE_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_MODULES_ADD_VOLTAGE_TEXT)],
-        [KeyboardButton(text=LED_MODULES_REMOVE_VOLTAGE_TEXT)],
-        [KeyboardButton(text=LED_MODULES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_MODULES_VOLTAGE_KB = _kb(
+    (LED_MODULES_ADD_VOLTAGE_TEXT,),
+    (LED_MODULES_REMOVE_VOLTAGE_TEXT,),
+    (LED_MODULES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_MODULES_LENS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_MODULES_ADD_LENS_COUNT_TEXT)],
-        [KeyboardButton(text=LED_MODULES_REMOVE_LENS_COUNT_TEXT)],
-        [KeyboardButton(text=LED_MODULES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_MODULES_LENS_KB = _kb(
+    (LED_MODULES_ADD_LENS_COUNT_TEXT,),
+    (LED_MODULES_REMOVE_LENS_COUNT_TEXT,),
+    (LED_MODULES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_STRIPS_MANUFACTURERS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_STRIPS_ADD_MANUFACTURER_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_REMOVE_MANUFACTURER_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_STRIPS_MANUFACTURERS_KB = _kb(
+    (LED_STRIPS_ADD_MANUFACTURER_TEXT,),
+    (LED_STRIPS_REMOVE_MANUFACTURER_TEXT,),
+    (LED_STRIPS_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_STRIPS_SERIES_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_STRIPS_ADD_SERIES_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_REMOVE_SERIES_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_STRIPS_SERIES_KB = _kb(
+    (LED_STRIPS_ADD_SERIES_TEXT,),
+    (LED_STRIPS_REMOVE_SERIES_TEXT,),
+    (LED_STRIPS_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_STRIPS_COLORS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_STRIPS_ADD_COLOR_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_REMOVE_COLOR_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_STRIPS_COLORS_KB = _kb(
+    (LED_STRIPS_ADD_COLOR_TEXT,),
+    (LED_STRIPS_REMOVE_COLOR_TEXT,),
+    (LED_STRIPS_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_STRIPS_CUT_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_STRIPS_ADD_CUT_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_REMOVE_CUT_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_STRIPS_CUT_KB = _kb(
+    (LED_STRIPS_ADD_CUT_TEXT,),
+    (LED_STRIPS_REMOVE_CUT_TEXT,),
+    (LED_STRIPS_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_STRIPS_TYPE_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_STRIPS_ADD_TYPE_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_REMOVE_TYPE_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_STRIPS_TYPE_KB = _kb(
+    (LED_STRIPS_ADD_TYPE_TEXT,),
+    (LED_STRIPS_REMOVE_TYPE_TEXT,),
+    (LED_STRIPS_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_STRIPS_BUS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_STRIPS_ADD_BUS_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_REMOVE_BUS_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_STRIPS_BUS_KB = _kb(
+    (LED_STRIPS_ADD_BUS_TEXT,),
+    (LED_STRIPS_REMOVE_BUS_TEXT,),
+    (LED_STRIPS_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_STRIPS_LED_COUNT_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_STRIPS_ADD_LED_COUNT_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_REMOVE_LED_COUNT_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_STRIPS_LED_COUNT_KB = _kb(
+    (LED_STRIPS_ADD_LED_COUNT_TEXT,),
+    (LED_STRIPS_REMOVE_LED_COUNT_TEXT,),
+    (LED_STRIPS_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_STRIPS_VOLTAGE_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_STRIPS_ADD_VOLTAGE_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_REMOVE_VOLTAGE_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_STRIPS_VOLTAGE_KB = _kb(
+    (LED_STRIPS_ADD_VOLTAGE_TEXT,),
+    (LED_STRIPS_REMOVE_VOLTAGE_TEXT,),
+    (LED_STRIPS_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_LED_STRIPS_IP_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=LED_STRIPS_ADD_IP_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_REMOVE_IP_TEXT)],
-        [KeyboardButton(text=LED_STRIPS_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_LED_STRIPS_IP_KB = _kb(
+    (LED_STRIPS_ADD_IP_TEXT,),
+    (LED_STRIPS_REMOVE_IP_TEXT,),
+    (LED_STRIPS_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_POWER_SUPPLIES_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=POWER_SUPPLIES_MANUFACTURERS_MENU_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_SERIES_MENU_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_BASE_MENU_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_POWER_MENU_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_VOLTAGE_MENU_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_IP_MENU_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_SETTINGS_BACK_TO_ELECTRICS_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_POWER_SUPPLIES_KB = _kb(
+    (POWER_SUPPLIES_MANUFACTURERS_MENU_TEXT,),
+    (POWER_SUPPLIES_SERIES_MENU_TEXT,),
+    (POWER_SUPPLIES_BASE_MENU_TEXT,),
+    (POWER_SUPPLIES_POWER_MENU_TEXT,),
+    (POWER_SUPPLIES_VOLTAGE_MENU_TEXT,),
+    (POWER_SUPPLIES_IP_MENU_TEXT,),
+    (WAREHOUSE_SETTINGS_BACK_TO_ELECTRICS_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_POWER_SUPPLIES_BASE_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=POWER_SUPPLIES_GENERATE_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_DELETE_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_POWER_SUPPLIES_BASE_KB = _kb(
+    (POWER_SUPPLIES_GENERATE_TEXT,),
+    (POWER_SUPPLIES_DELETE_TEXT,),
+    (POWER_SUPPLIES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_POWER_SUPPLIES_MANUFACTURERS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=POWER_SUPPLIES_ADD_MANUFACTURER_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_REMOVE_MANUFACTURER_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_POWER_SUPPLIES_MANUFACTURERS_KB = _kb(
+    (POWER_SUPPLIES_ADD_MANUFACTURER_TEXT,),
+    (POWER_SUPPLIES_REMOVE_MANUFACTURER_TEXT,),
+    (POWER_SUPPLIES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_POWER_SUPPLIES_SERIES_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=POWER_SUPPLIES_ADD_SERIES_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_REMOVE_SERIES_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_POWER_SUPPLIES_SERIES_KB = _kb(
+    (POWER_SUPPLIES_ADD_SERIES_TEXT,),
+    (POWER_SUPPLIES_REMOVE_SERIES_TEXT,),
+    (POWER_SUPPLIES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_POWER_SUPPLIES_POWER_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=POWER_SUPPLIES_ADD_POWER_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_REMOVE_POWER_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_POWER_SUPPLIES_POWER_KB = _kb(
+    (POWER_SUPPLIES_ADD_POWER_TEXT,),
+    (POWER_SUPPLIES_REMOVE_POWER_TEXT,),
+    (POWER_SUPPLIES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_POWER_SUPPLIES_VOLTAGE_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=POWER_SUPPLIES_ADD_VOLTAGE_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_REMOVE_VOLTAGE_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_POWER_SUPPLIES_VOLTAGE_KB = _kb(
+    (POWER_SUPPLIES_ADD_VOLTAGE_TEXT,),
+    (POWER_SUPPLIES_REMOVE_VOLTAGE_TEXT,),
+    (POWER_SUPPLIES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_POWER_SUPPLIES_IP_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=POWER_SUPPLIES_ADD_IP_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_REMOVE_IP_TEXT)],
-        [KeyboardButton(text=POWER_SUPPLIES_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_POWER_SUPPLIES_IP_KB = _kb(
+    (POWER_SUPPLIES_ADD_IP_TEXT,),
+    (POWER_SUPPLIES_REMOVE_IP_TEXT,),
+    (POWER_SUPPLIES_BACK_TEXT,),
 )
 
-WAREHOUSE_SETTINGS_PLASTIC_MATERIALS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="➕ Добавить материал")],
-        [KeyboardButton(text="➖ Удалить материал")],
-        [KeyboardButton(text="⬅️ Назад к пластику")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_PLASTIC_MATERIALS_KB = _kb(
+    ("➕ Добавить материал",),
+    ("➖ Удалить материал",),
+    ("⬅️ Назад к пластику",),
 )
 
-WAREHOUSE_SETTINGS_PLASTIC_THICKNESS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="➕ Добавить толщину")],
-        [KeyboardButton(text="➖ Удалить толщину")],
-        [KeyboardButton(text="⬅️ Назад к пластику")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_PLASTIC_THICKNESS_KB = _kb(
+    ("➕ Добавить толщину",),
+    ("➖ Удалить толщину",),
+    ("⬅️ Назад к пластику",),
 )
 
-WAREHOUSE_SETTINGS_PLASTIC_COLORS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="➕ Добавить цвет")],
-        [KeyboardButton(text="➖ Удалить цвет")],
-        [KeyboardButton(text="⬅️ Назад к пластику")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_PLASTIC_COLORS_KB = _kb(
+    ("➕ Добавить цвет",),
+    ("➖ Удалить цвет",),
+    ("⬅️ Назад к пластику",),
 )
 
-WAREHOUSE_SETTINGS_PLASTIC_STORAGE_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="➕ Добавить место хранения")],
-        [KeyboardButton(text="➖ Удалить место хранения")],
-        [KeyboardButton(text="⬅️ Назад к пластику")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_PLASTIC_STORAGE_KB = _kb(
+    ("➕ Добавить место хранения",),
+    ("➖ Удалить место хранения",),
+    ("⬅️ Назад к пластику",),
 )
 
-WAREHOUSE_SETTINGS_FILM_MANUFACTURERS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="➕ Добавить производителя")],
-        [KeyboardButton(text="➖ Удалить производителя")],
-        [KeyboardButton(text="⬅️ Назад к пленкам")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_FILM_MANUFACTURERS_KB = _kb(
+    ("➕ Добавить производителя",),
+    ("➖ Удалить производителя",),
+    ("⬅️ Назад к пленкам",),
 )
 
-WAREHOUSE_SETTINGS_FILM_SERIES_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="➕ Добавить серию")],
-        [KeyboardButton(text="➖ Удалить серию")],
-        [KeyboardButton(text="⬅️ Назад к пленкам")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_FILM_SERIES_KB = _kb(
+    ("➕ Добавить серию",),
+    ("➖ Удалить серию",),
+    ("⬅️ Назад к пленкам",),
 )
 
-WAREHOUSE_SETTINGS_FILM_STORAGE_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="➕ Добавить место хранения пленки")],
-        [KeyboardButton(text="➖ Удалить место хранения пленки")],
-        [KeyboardButton(text="⬅️ Назад к пленкам")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_SETTINGS_FILM_STORAGE_KB = _kb(
+    ("➕ Добавить место хранения пленки",),
+    ("➖ Удалить место хранения пленки",),
+    ("⬅️ Назад к пленкам",),
 )
 
 WAREHOUSE_FILMS_ADD_TEXT = "➕ Добавить пленку"
@@ -1634,87 +1870,57 @@ WAREHOUSE_FILMS_SEARCH_BY_COLOR_TEXT = "По цвету"
 WAREHOUSE_FILMS_SEARCH_BACK_TEXT = "⬅️ Назад к пленкам"
 FILM_SEARCH_RESULTS_LIMIT = 15
 
-WAREHOUSE_FILMS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [
-            KeyboardButton(text=WAREHOUSE_FILMS_ADD_TEXT),
-            KeyboardButton(text=WAREHOUSE_FILMS_WRITE_OFF_TEXT),
-        ],
-        [
-            KeyboardButton(text=WAREHOUSE_FILMS_COMMENT_TEXT),
-            KeyboardButton(text=WAREHOUSE_FILMS_MOVE_TEXT),
-        ],
-        [
-            KeyboardButton(text=WAREHOUSE_FILMS_SEARCH_TEXT),
-            KeyboardButton(text=WAREHOUSE_FILMS_EXPORT_TEXT),
-        ],
-        [KeyboardButton(text="⬅️ Назад к складу")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_FILMS_KB = _kb(
+    (WAREHOUSE_FILMS_ADD_TEXT, WAREHOUSE_FILMS_WRITE_OFF_TEXT),
+    (WAREHOUSE_FILMS_COMMENT_TEXT, WAREHOUSE_FILMS_MOVE_TEXT),
+    (WAREHOUSE_FILMS_SEARCH_TEXT, WAREHOUSE_FILMS_EXPORT_TEXT),
+    ("⬅️ Назад к складу",),
 )
 
-WAREHOUSE_FILMS_SEARCH_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=WAREHOUSE_FILMS_SEARCH_BY_ARTICLE_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_FILMS_SEARCH_BY_NUMBER_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_FILMS_SEARCH_BY_COLOR_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_FILMS_SEARCH_BACK_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_FILMS_SEARCH_KB = _kb(
+    (WAREHOUSE_FILMS_SEARCH_BY_ARTICLE_TEXT,),
+    (WAREHOUSE_FILMS_SEARCH_BY_NUMBER_TEXT,),
+    (WAREHOUSE_FILMS_SEARCH_BY_COLOR_TEXT,),
+    (WAREHOUSE_FILMS_SEARCH_BACK_TEXT,),
 )
 
-WAREHOUSE_PLASTICS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text="➕ Добавить"), KeyboardButton(text="++добавить пачку")],
-        [KeyboardButton(text="➖ Списать"), KeyboardButton(text="💬 Комментировать")],
-        [KeyboardButton(text="🔁 Переместить"), KeyboardButton(text="🔍 Найти")],
-        [KeyboardButton(text="📤 Экспорт")],
-        [KeyboardButton(text="⬅️ Назад к складу")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_PLASTICS_KB = _kb(
+    ("➕ Добавить", "++добавить пачку"),
+    ("➖ Списать", "💬 Комментировать"),
+    ("🔁 Переместить", "🔍 Найти"),
+    ("📤 Экспорт",),
+    ("⬅️ Назад к складу",),
 )
 
-WAREHOUSE_ELECTRICS_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=WAREHOUSE_ELECTRICS_LED_STRIPS_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_ELECTRICS_LED_MODULES_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_ELECTRICS_POWER_SUPPLIES_TEXT)],
-        [KeyboardButton(text="⬅️ Назад к складу")],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_ELECTRICS_KB = _kb(
+    (WAREHOUSE_ELECTRICS_LED_STRIPS_TEXT,),
+    (WAREHOUSE_ELECTRICS_LED_MODULES_TEXT,),
+    (WAREHOUSE_ELECTRICS_POWER_SUPPLIES_TEXT,),
+    ("⬅️ Назад к складу",),
 )
 
-WAREHOUSE_LED_MODULES_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=WAREHOUSE_LED_MODULES_ADD_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_LED_MODULES_STOCK_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_LED_MODULES_WRITE_OFF_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_LED_MODULES_BACK_TO_ELECTRICS_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_LED_MODULES_KB = _kb(
+    (WAREHOUSE_LED_MODULES_ADD_TEXT,),
+    (WAREHOUSE_LED_MODULES_STOCK_TEXT,),
+    (WAREHOUSE_LED_MODULES_WRITE_OFF_TEXT,),
+    (WAREHOUSE_LED_MODULES_BACK_TO_ELECTRICS_TEXT,),
 )
 
-WAREHOUSE_POWER_SUPPLIES_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=WAREHOUSE_POWER_SUPPLIES_ADD_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_POWER_SUPPLIES_WRITE_OFF_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_POWER_SUPPLIES_STOCK_TEXT)],
-        [KeyboardButton(text=WAREHOUSE_POWER_SUPPLIES_BACK_TO_ELECTRICS_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_POWER_SUPPLIES_KB = _kb(
+    (WAREHOUSE_POWER_SUPPLIES_ADD_TEXT,),
+    (WAREHOUSE_POWER_SUPPLIES_WRITE_OFF_TEXT,),
+    (WAREHOUSE_POWER_SUPPLIES_STOCK_TEXT,),
+    (WAREHOUSE_POWER_SUPPLIES_BACK_TO_ELECTRICS_TEXT,),
 )
 
 SEARCH_BY_ARTICLE_TEXT = "🔢 Поиск по артикулу"
 ADVANCED_SEARCH_TEXT = "🧭 Расширенный поиск"
 BACK_TO_PLASTICS_MENU_TEXT = "⬅️ Назад к меню пластика"
 
-WAREHOUSE_PLASTICS_SEARCH_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [KeyboardButton(text=SEARCH_BY_ARTICLE_TEXT)],
-        [KeyboardButton(text=ADVANCED_SEARCH_TEXT)],
-        [KeyboardButton(text=BACK_TO_PLASTICS_MENU_TEXT)],
-    ],
-    resize_keyboard=True,
+WAREHOUSE_PLASTICS_SEARCH_KB = _kb(
+    (SEARCH_BY_ARTICLE_TEXT,),
+    (ADVANCED_SEARCH_TEXT,),
+    (BACK_TO_PLASTICS_MENU_TEXT,),
 )
 
 ADVANCED_SEARCH_SKIP_MATERIAL_TEXT = "➡️ Далее"
@@ -1734,33 +1940,134 @@ def build_article_input_keyboard(
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
 
 
-CANCEL_KB = build_article_input_keyboard()
+CANCEL_KB = _kb((CANCEL_TEXT,))
 
-SKIP_OR_CANCEL_KB = ReplyKeyboardMarkup(
-    keyboard=[[KeyboardButton(text=SKIP_TEXT)], [KeyboardButton(text=CANCEL_TEXT)]],
-    resize_keyboard=True,
+SKIP_OR_CANCEL_KB = _kb(
+    (SKIP_TEXT,),
+    (CANCEL_TEXT,),
 )
 
 ORDER_URGENCY_YES_TEXT = "Да"
 ORDER_URGENCY_NO_TEXT = "Нет"
 
-ORDER_URGENCY_KB = ReplyKeyboardMarkup(
-    keyboard=[
-        [
-            KeyboardButton(text=ORDER_URGENCY_YES_TEXT),
-            KeyboardButton(text=ORDER_URGENCY_NO_TEXT),
-        ],
-        [KeyboardButton(text=CANCEL_TEXT)],
-    ],
-    resize_keyboard=True,
+ORDER_URGENCY_KB = _kb(
+    (ORDER_URGENCY_YES_TEXT, ORDER_URGENCY_NO_TEXT),
+    (CANCEL_TEXT,),
+)
+
+
+# Ответы, подготовленные с deduplicate=True, — статичные сообщения об
+# ошибках. Если тот же пользователь получил такой ответ в этом чате меньше
+# секунды назад (двойное нажатие, повторный неверный ввод), он не
+# отправляется повторно, а answer_prepared возвращает None.
+DUPLICATE_REPLY_WINDOW = 1.0
+DUPLICATE_REPLY_SENDERS = 1024
+_DEDUPLICATED_REPLIES: set[int] = set()
+_LAST_PREPARED_REPLIES: OrderedDict[tuple[int, int], tuple[float, SendMessage]] = OrderedDict()
+
+
+def prepare_reply(
+    text: str,
+    reply_markup: Optional[ReplyKeyboardMarkup] = None,
+    *,
+    deduplicate: bool = False,
+) -> SendMessage:
+    """Собирает неизменный ответ один раз, чтобы не валидировать его при каждой отправке."""
+    prepared = SendMessage(chat_id=0, text=text, reply_markup=reply_markup)
+    if deduplicate:
+        _DEDUPLICATED_REPLIES.add(id(prepared))
+    return prepared
+
+
+def _is_duplicate_reply(message: Message, prepared: SendMessage) -> bool:
+    sender_id = message.from_user.id if message.from_user else 0
+    key = (message.chat.id, sender_id)
+    now = monotonic()
+    last = _LAST_PREPARED_REPLIES.get(key)
+    if last is not None and last[0] > now and last[1] is prepared:
+        return True
+    _LAST_PREPARED_REPLIES[key] = (now + DUPLICATE_REPLY_WINDOW, prepared)
+    _LAST_PREPARED_REPLIES.move_to_end(key)
+    if len(_LAST_PREPARED_REPLIES) > DUPLICATE_REPLY_SENDERS:
+        _LAST_PREPARED_REPLIES.popitem(last=False)
+    return False
+
+
+async def answer_prepared(message: Message, prepared: SendMessage) -> Optional[Message]:
+    if id(prepared) in _DEDUPLICATED_REPLIES and _is_duplicate_reply(message, prepared):
+        return None
+    reply = prepared.model_copy(update={"chat_id": message.chat.id})
+    return await reply.as_(message.bot)
+
+
+START_REPLY = prepare_reply("👋 Привет! Выберите действие:", MAIN_MENU_KB)
+BACK_TO_MAIN_REPLY = prepare_reply("Главное меню.", MAIN_MENU_KB)
+ACCESS_DENIED_REPLY = prepare_reply(
+    "🚫 У вас нет доступа к этому боту. Обратитесь к администратору.",
+    deduplicate=True,
+)
+SETTINGS_DENIED_REPLY = prepare_reply(
+    "🚫 У вас недостаточно прав для управления настройками.", MAIN_MENU_KB
+)
+EMPTY_NAME_REPLY = prepare_reply(
+    "⚠️ Название не может быть пустым. Попробуйте снова.", deduplicate=True
+)
+EMPTY_VALUE_REPLY = prepare_reply(
+    "⚠️ Значение не может быть пустым. Попробуйте снова.", deduplicate=True
 )
 
 
-async def _process_cancel_if_requested(message: Message, state: FSMContext) -> bool:
-    if (message.text or "").strip() != CANCEL_TEXT:
+def _is_cancel_text(text: Optional[str]) -> bool:
+    if text == CANCEL_TEXT:
+        return True
+    # strip() нужен только для текста, обрамлённого пробелами.
+    if not text or not (text[0].isspace() or text[-1].isspace()):
         return False
-    await handle_cancel(message, state)
-    return True
+    return text.strip() == CANCEL_TEXT
+
+
+# Сценарии настроек отменяются общим handle_cancel. Этот обработчик
+# регистрируется раньше обработчиков состояний, поэтому «Отмена» в них
+# перехватывается одной проверкой фильтра, а не в начале каждого шага.
+CANCELLABLE_SETTINGS_STATES = (
+    GenerateLedModuleStates,
+    GeneratePowerSupplyStates,
+    ManageFilmManufacturerStates,
+    ManageFilmSeriesStates,
+    ManageFilmStorageStates,
+    ManageLedModuleColorStates,
+    ManageLedModuleLensStates,
+    ManageLedModuleManufacturerStates,
+    ManageLedModulePowerStates,
+    ManageLedModuleSeriesStates,
+    ManageLedModuleStorageStates,
+    ManageLedModuleVoltageStates,
+    ManageLedStripBusStates,
+    ManageLedStripColorStates,
+    ManageLedStripCutStates,
+    ManageLedStripIpStates,
+    ManageLedStripLedCountStates,
+    ManageLedStripManufacturerStates,
+    ManageLedStripSeriesStates,
+    ManageLedStripTypeStates,
+    ManageLedStripVoltageStates,
+    ManageOrderTypeStates,
+    ManagePlasticMaterialStates,
+    ManagePowerSupplyBaseStates,
+    ManagePowerSupplyIpStates,
+    ManagePowerSupplyManufacturerStates,
+    ManagePowerSupplyPowerStates,
+    ManagePowerSupplySeriesStates,
+    ManagePowerSupplyVoltageStates,
+    ManageTaskTypeStates,
+)
+
+
+@dp.message(StateFilter(*CANCELLABLE_SETTINGS_STATES), F.text.func(_is_cancel_text))
+async def handle_settings_flow_cancel(
+    message: Message, state: FSMContext, is_admin: Optional[bool] = None
+) -> None:
+    await handle_cancel(message, state, is_admin)
 
 
 async def _cancel_add_user_flow(message: Message, state: FSMContext) -> None:
@@ -1906,6 +2213,57 @@ async def _cancel_generate_led_module_flow(message: Message, state: FSMContext)
 
 
 # === Работа с БД ===
+# Тексты самых частых запросов вынесены в константы: asyncpg кэширует
+# подготовленные выражения соединения по тексту запроса, и одна общая
+# строка гарантирует, что все вызовы попадают в одну запись кэша, а не
+# разбирают и планируют запрос заново.
+_SQL_USER_ACCESS = "SELECT is_admin FROM users WHERE tg_id = $1"
+_SQL_ALL_USER_ACCESS = "SELECT tg_id, is_admin FROM users"
+_SQL_UPSERT_USER = """
+INSERT INTO users (tg_id, username, position, role, created_at)
+VALUES ($1, $2, $3, $4, COALESCE($5, timezone('utc', now())))
+ON CONFLICT (tg_id) DO UPDATE
+SET username = EXCLUDED.username,
+    position = EXCLUDED.position,
+    role = EXCLUDED.role,
+    created_at = CASE
+        WHEN $5 IS NULL THEN users.created_at
+        ELSE EXCLUDED.created_at
+    END
+"""
+_SQL_MATERIAL_TYPES = "SELECT name FROM plastic_material_types ORDER BY LOWER(name)"
+_SQL_MATERIAL_ID_BY_NAME = (
+    "SELECT id FROM plastic_material_types WHERE name_key = lower(normalize($1, NFC))"
+)
+# Толщины и цвета агрегируются один раз по всей таблице и присоединяются
+# к материалам, а не считаются коррелированным подзапросом на каждую строку.
+_SQL_MATERIALS_WITH_ATTRIBUTES = """
+WITH t AS (
+    SELECT material_id, ARRAY_AGG(thickness::FLOAT8 ORDER BY thickness) AS thicknesses
+    FROM plastic_material_thicknesses
+    GROUP BY material_id
+),
+c AS (
+    SELECT material_id, ARRAY_AGG(color ORDER BY LOWER(color)) AS colors
+    FROM plastic_material_colors
+    GROUP BY material_id
+)
+SELECT p.name,
+       COALESCE(t.thicknesses, ARRAY[]::FLOAT8[]) AS thicknesses,
+       COALESCE(c.colors, ARRAY[]::TEXT[]) AS colors
+FROM plastic_material_types p
+LEFT JOIN t ON t.material_id = p.id
+LEFT JOIN c ON c.material_id = p.id
+ORDER BY LOWER(p.name)
+"""
+
+
+def _affected_rows(status: str) -> int:
+    # execute возвращает тег команды вида "DELETE 3"; число в конце —
+    # количество затронутых строк.
+    return int(status.rsplit(" ", 1)[-1])
+
+
 async def upsert_user_in_db(
     tg_id: int,
     username: str,
@@ -1915,39 +2273,22 @@ async def upsert_user_in_db(
 ) -> None:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        await conn.execute(
-            """
-            INSERT INTO users (tg_id, username, position, role, created_at)
-            VALUES ($1, $2, $3, $4, COALESCE($5, timezone('utc', now())))
-            ON CONFLICT (tg_id) DO UPDATE
-            SET username = EXCLUDED.username,
-                position = EXCLUDED.position,
-                role = EXCLUDED.role,
-                created_at = CASE
-                    WHEN $5 IS NULL THEN users.created_at
-                    ELSE EXCLUDED.created_at
-                END
-            """,
-            tg_id,
-            username,
-            position,
-            role,
-            created_at,
-        )
+    await db_pool.execute(
+        _SQL_UPSERT_USER, tg_id, username, position, role, created_at
+    )
+    invalidate_user_access(tg_id)
 
 
 async def fetch_all_users_from_db() -> list[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT tg_id, username, position, role, created_at
-            FROM users
-            ORDER BY created_at DESC NULLS LAST, id DESC
-            """
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT tg_id, username, position, role, created_at
+        FROM users
+        ORDER BY created_at DESC NULLS LAST, id DESC
+        """
+    )
     return [dict(row) for row in rows]
 
 
@@ -1958,18 +2299,17 @@ async def create_client_in_db(
 ) -> int:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO clients (name, phone, contact_person)
-            VALUES ($1, $2, $3)
-            RETURNING id
-            """,
-            name,
-            phone,
-            contact_person,
-        )
-    return int(row["id"])
+    client_id = await db_pool.fetchval(
+        """
+        INSERT INTO clients (name, phone, contact_person)
+        VALUES ($1, $2, $3)
+        RETURNING id
+        """,
+        name,
+        phone,
+        contact_person,
+    )
+    return int(client_id)
 
 
 async def add_client_address_in_db(
@@ -1979,18 +2319,17 @@ async def add_client_address_in_db(
 ) -> int:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO client_addresses (client_id, address, google_maps_link)
-            VALUES ($1, $2, $3)
-            RETURNING id
-            """,
-            client_id,
-            address,
-            google_maps_link,
-        )
-    return int(row["id"])
+    address_id = await db_pool.fetchval(
+        """
+        INSERT INTO client_addresses (client_id, address, google_maps_link)
+        VALUES ($1, $2, $3)
+        RETURNING id
+        """,
+        client_id,
+        address,
+        google_maps_link,
+    )
+    return int(address_id)
 
 
 async def search_clients_by_name(
@@ -2054,64 +2393,59 @@ async def search_clients_by_name(
 async def fetch_order_types() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM order_types ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM order_types ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_task_types() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM task_types ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM task_types ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_next_order_number() -> int:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT COALESCE(MAX(order_number), 0) + 1 AS next_number FROM orders"
-        )
-    return int(row["next_number"] or 1)
+    next_number = await db_pool.fetchval(
+        "SELECT COALESCE(MAX(order_number), 0) + 1 FROM orders"
+    )
+    return int(next_number or 1)
 
 
 async def fetch_next_task_number() -> int:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT COALESCE(MAX(task_number), 0) + 1 AS next_number FROM tasks"
-        )
-    return int(row["next_number"] or 1)
+    next_number = await db_pool.fetchval(
+        "SELECT COALESCE(MAX(task_number), 0) + 1 FROM tasks"
+    )
+    return int(next_number or 1)
 
 
 async def fetch_all_orders() -> list[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                id,
-                order_number,
-                client_name,
-                title,
-                order_type,
-                folder_path,
-                due_date,
-                is_urgent,
-                created_at,
-                created_by_name
-            FROM orders
-            ORDER BY due_date ASC, order_number ASC
-            """
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT
+            id,
+            order_number,
+            client_name,
+            title,
+            order_type,
+            folder_path,
+            due_date,
+            is_urgent,
+            created_at,
+            created_by_name
+        FROM orders
+        ORDER BY due_date ASC, order_number ASC
+        """
+    )
     return [dict(row) for row in rows]
 
 
@@ -2128,25 +2462,9 @@ async def create_order_in_db(
 ) -> Dict[str, Any]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO orders (
-                client_id,
-                client_name,
-                title,
-                order_type,
-                folder_path,
-                due_date,
-                is_urgent,
-                created_by_id,
-                created_by_name
-            )
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-            RETURNING id, order_number, client_id, client_name, title, order_type,
-                      folder_path, due_date, is_urgent, created_at, created_by_id,
-                      created_by_name
-            """,
+    row = await db_pool.fetchrow(
+        """
+        INSERT INTO orders (
             client_id,
             client_name,
             title,
@@ -2155,8 +2473,23 @@ async def create_order_in_db(
             due_date,
             is_urgent,
             created_by_id,
-            created_by_name,
-        )
+            created_by_name
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+        RETURNING id, order_number, client_id, client_name, title, order_type,
+                  folder_path, due_date, is_urgent, created_at, created_by_id,
+                  created_by_name
+        """,
+        client_id,
+        client_name,
+        title,
+        order_type,
+        folder_path,
+        due_date,
+        is_urgent,
+        created_by_id,
+        created_by_name,
+    )
     if row is None:
         raise RuntimeError("Failed to insert order")
     return dict(row)
@@ -2174,33 +2507,9 @@ async def create_task_in_db(
 ) -> Dict[str, Any]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO tasks (
-                task_type,
-                comment,
-                assignee_id,
-                assignee_name,
-                assignee_position,
-                due_date,
-                created_by_id,
-                created_by_name
-            )
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-            RETURNING
-                id,
-                task_number,
-                task_type,
-                comment,
-                assignee_id,
-                assignee_name,
-                assignee_position,
-                due_date,
-                created_at,
-                created_by_id,
-                created_by_name
-            """,
+    row = await db_pool.fetchrow(
+        """
+        INSERT INTO tasks (
             task_type,
             comment,
             assignee_id,
@@ -2208,8 +2517,31 @@ async def create_task_in_db(
             assignee_position,
             due_date,
             created_by_id,
-            created_by_name,
+            created_by_name
         )
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+        RETURNING
+            id,
+            task_number,
+            task_type,
+            comment,
+            assignee_id,
+            assignee_name,
+            assignee_position,
+            due_date,
+            created_at,
+            created_by_id,
+            created_by_name
+        """,
+        task_type,
+        comment,
+        assignee_id,
+        assignee_name,
+        assignee_position,
+        due_date,
+        created_by_id,
+        created_by_name,
+    )
     if row is None:
         raise RuntimeError("Failed to insert task")
     return dict(row)
@@ -2219,87 +2551,118 @@ async def fetch_tasks_overview(limit: int = 15) -> list[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     limit_value = max(1, int(limit))
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                id,
-                task_number,
-                task_type,
-                comment,
-                assignee_id,
-                assignee_name,
-                assignee_position,
-                due_date,
-                created_at,
-                created_by_id,
-                created_by_name
-            FROM tasks
-            ORDER BY due_date ASC, task_number ASC
-            LIMIT $1
-            """,
-            limit_value,
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT
+            id,
+            task_number,
+            task_type,
+            comment,
+            assignee_id,
+            assignee_name,
+            assignee_position,
+            due_date,
+            created_at,
+            created_by_id,
+            created_by_name
+        FROM tasks
+        ORDER BY due_date ASC, task_number ASC
+        LIMIT $1
+        """,
+        limit_value,
+    )
     return [dict(row) for row in rows]
 
 
+def invalidate_materials_cache() -> None:
+    global _MATERIALS_VERSION
+    _MATERIALS_VERSION += 1
+    _MATERIALS_CACHE.clear()
+    _build_choice_keyboard.cache_clear()
+
+
 async def fetch_plastic_material_types() -> list[str]:
-    if db_pool is None:
-        raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM plastic_material_types ORDER BY LOWER(name)"
-        )
-    return [row["name"] for row in rows]
+    cached = _MATERIALS_CACHE.get("types")
+    if cached is not None:
+        return list(cached)
+    if db_pool is None:
+        raise RuntimeError("Database pool is not initialised")
+    version = _MATERIALS_VERSION
+    rows = await db_pool.fetch(_SQL_MATERIAL_TYPES)
+    materials = [row["name"] for row in rows]
+    if version == _MATERIALS_VERSION:
+        _MATERIALS_CACHE["types"] = materials
+        # Выбор материала с клавиатуры ищется по этому индексу; при
+        # совпадении ключей остаётся первый материал, как при переборе списка.
+        index: Dict[str, str] = {}
+        for material in materials:
+            index.setdefault(material.lower(), material)
+        _MATERIALS_CACHE["types_index"] = index
+        # Ключи считаются той же функцией, что и при поиске: lower() в
+        # Python и в PostgreSQL расходятся на отдельных символах, поэтому
+        # по набору отсекаются только найденные дубликаты, а промах
+        # проверяет база.
+        _MATERIALS_CACHE["keys"] = {_material_key(name) for name in materials}
+    return list(materials)
+
+
+async def find_plastic_material_type(name: str) -> Optional[str]:
+    materials = await fetch_plastic_material_types()
+    index = _MATERIALS_CACHE.get("types_index")
+    if index is None:
+        # Кэш сбросили во время запроса — ищем по только что прочитанному списку.
+        return next((item for item in materials if item.lower() == name.lower()), None)
+    return index.get(name.lower())
+
+
+def _material_key(name: str) -> str:
+    # Python-аналог name_key из базы (lower(normalize(name, NFC))); для
+    # отдельных символов результат может отличаться от lower() сервера.
+    return unicodedata.normalize("NFC", name).lower()
 
 
 async def fetch_plastic_storage_locations() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM plastic_storage_locations ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM plastic_storage_locations ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_film_manufacturers() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM film_manufacturers ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM film_manufacturers ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_led_module_manufacturers() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_module_manufacturers ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_module_manufacturers ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_led_module_storage_locations() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_module_storage_locations ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_module_storage_locations ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_led_strip_manufacturers() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_strip_manufacturers ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_strip_manufacturers ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
@@ -2335,15 +2698,14 @@ async def fetch_led_strip_manufacturers_with_series() -> list[dict[str, Any]]:
 async def get_led_strip_manufacturer_by_name(name: str) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT id, name
-            FROM led_strip_manufacturers
-            WHERE LOWER(name) = LOWER($1)
-            """,
-            name,
-        )
+    row = await db_pool.fetchrow(
+        """
+        SELECT id, name
+        FROM led_strip_manufacturers
+        WHERE LOWER(name) = LOWER($1)
+        """,
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "name": row["name"]}
@@ -2376,110 +2738,99 @@ async def fetch_led_strip_series_by_manufacturer(manufacturer_name: str) -> list
 async def fetch_led_strip_colors() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_strip_color_options ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_strip_color_options ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_led_strip_cut_options() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_strip_cut_options ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_strip_cut_options ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_led_strip_type_options() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_strip_type_options ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_strip_type_options ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_led_strip_bus_options() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_strip_bus_options ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_strip_bus_options ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_led_strip_led_counts() -> list[int]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT value FROM led_strip_led_count_options ORDER BY value"
-        )
+    rows = await db_pool.fetch(
+        "SELECT value FROM led_strip_led_count_options ORDER BY value"
+    )
     return [row["value"] for row in rows]
 
 
 async def fetch_led_strip_voltage_options() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_strip_voltage_options ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_strip_voltage_options ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_led_strip_ip_options() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_strip_ip_options ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_strip_ip_options ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_power_supply_manufacturers() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM power_supply_manufacturers ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM power_supply_manufacturers ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_power_supply_power_options() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM power_supply_power_options ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM power_supply_power_options ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_power_supply_voltage_options() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM power_supply_voltage_options ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM power_supply_voltage_options ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_power_supply_ip_options() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM power_supply_ip_options ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM power_supply_ip_options ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
@@ -2488,15 +2839,14 @@ async def get_power_supply_manufacturer_by_name(
 ) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT id, name
-            FROM power_supply_manufacturers
-            WHERE LOWER(name) = LOWER($1)
-            """,
-            name,
-        )
+    row = await db_pool.fetchrow(
+        """
+        SELECT id, name
+        FROM power_supply_manufacturers
+        WHERE LOWER(name) = LOWER($1)
+        """,
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "name": row["name"]}
@@ -2539,16 +2889,15 @@ async def fetch_power_supply_series_by_manufacturer(
         return []
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT name
-            FROM power_supply_series
-            WHERE manufacturer_id = $1
-            ORDER BY LOWER(name)
-            """,
-            manufacturer["id"],
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT name
+        FROM power_supply_series
+        WHERE manufacturer_id = $1
+        ORDER BY LOWER(name)
+        """,
+        manufacturer["id"],
+    )
     return [row["name"] for row in rows]
 
 
@@ -2557,16 +2906,15 @@ async def get_power_supply_series_by_name(
 ) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT id, manufacturer_id, name
-            FROM power_supply_series
-            WHERE manufacturer_id = $1 AND LOWER(name) = LOWER($2)
-            """,
-            manufacturer_id,
-            name,
-        )
+    row = await db_pool.fetchrow(
+        """
+        SELECT id, manufacturer_id, name
+        FROM power_supply_series
+        WHERE manufacturer_id = $1 AND LOWER(name) = LOWER($2)
+        """,
+        manufacturer_id,
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "manufacturer_id": row["manufacturer_id"], "name": row["name"]}
@@ -2575,11 +2923,10 @@ async def get_power_supply_series_by_name(
 async def get_power_supply_power_option_by_name(name: str) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT id, name FROM power_supply_power_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
+    row = await db_pool.fetchrow(
+        "SELECT id, name FROM power_supply_power_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "name": row["name"]}
@@ -2588,11 +2935,10 @@ async def get_power_supply_power_option_by_name(name: str) -> Optional[dict[str,
 async def get_power_supply_voltage_option_by_name(name: str) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT id, name FROM power_supply_voltage_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
+    row = await db_pool.fetchrow(
+        "SELECT id, name FROM power_supply_voltage_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "name": row["name"]}
@@ -2601,11 +2947,10 @@ async def get_power_supply_voltage_option_by_name(name: str) -> Optional[dict[st
 async def get_power_supply_ip_option_by_name(name: str) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT id, name FROM power_supply_ip_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
+    row = await db_pool.fetchrow(
+        "SELECT id, name FROM power_supply_ip_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "name": row["name"]}
@@ -2616,15 +2961,14 @@ async def get_led_module_manufacturer_by_name(
 ) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT id, name
-            FROM led_module_manufacturers
-            WHERE LOWER(name) = LOWER($1)
-            """,
-            name,
-        )
+    row = await db_pool.fetchrow(
+        """
+        SELECT id, name
+        FROM led_module_manufacturers
+        WHERE LOWER(name) = LOWER($1)
+        """,
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "name": row["name"]}
@@ -2662,186 +3006,178 @@ async def fetch_led_module_manufacturers_with_series() -> list[dict[str, Any]]:
 async def fetch_led_module_colors() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_module_colors ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_module_colors ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_led_module_power_options() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_module_power_options ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_module_power_options ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_led_module_voltage_options() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM led_module_voltage_options ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM led_module_voltage_options ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_generated_led_modules_with_details() -> list[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                glm.article,
-                manufacturer.name AS manufacturer,
-                series.name AS series,
-                color.name AS color,
-                lens.value AS lens_count,
-                power.name AS power,
-                voltage.name AS voltage
-            FROM generated_led_modules AS glm
-            JOIN led_module_manufacturers AS manufacturer ON manufacturer.id = glm.manufacturer_id
-            JOIN led_module_series AS series ON series.id = glm.series_id
-            JOIN led_module_colors AS color ON color.id = glm.color_id
-            JOIN led_module_lens_counts AS lens ON lens.id = glm.lens_count_id
-            JOIN led_module_power_options AS power ON power.id = glm.power_option_id
-            JOIN led_module_voltage_options AS voltage ON voltage.id = glm.voltage_option_id
-            ORDER BY glm.created_at DESC NULLS LAST, glm.id DESC
-            """
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT
+            glm.article,
+            manufacturer.name AS manufacturer,
+            series.name AS series,
+            color.name AS color,
+            lens.value AS lens_count,
+            power.name AS power,
+            voltage.name AS voltage
+        FROM generated_led_modules AS glm
+        JOIN led_module_manufacturers AS manufacturer ON manufacturer.id = glm.manufacturer_id
+        JOIN led_module_series AS series ON series.id = glm.series_id
+        JOIN led_module_colors AS color ON color.id = glm.color_id
+        JOIN led_module_lens_counts AS lens ON lens.id = glm.lens_count_id
+        JOIN led_module_power_options AS power ON power.id = glm.power_option_id
+        JOIN led_module_voltage_options AS voltage ON voltage.id = glm.voltage_option_id
+        ORDER BY glm.created_at DESC NULLS LAST, glm.id DESC
+        """
+    )
     return [dict(row) for row in rows]
 
 
 async def fetch_generated_power_supplies_with_details() -> list[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                gps.article,
-                manufacturer.name AS manufacturer,
-                series.name AS series,
-                power.name AS power,
-                voltage.name AS voltage,
-                ip.name AS ip
-            FROM generated_power_supplies AS gps
-            JOIN power_supply_manufacturers AS manufacturer ON manufacturer.id = gps.manufacturer_id
-            JOIN power_supply_series AS series ON series.id = gps.series_id
-            JOIN power_supply_power_options AS power ON power.id = gps.power_option_id
-            JOIN power_supply_voltage_options AS voltage ON voltage.id = gps.voltage_option_id
-            JOIN power_supply_ip_options AS ip ON ip.id = gps.ip_option_id
-            ORDER BY gps.created_at DESC NULLS LAST, gps.id DESC
-            """
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT
+            gps.article,
+            manufacturer.name AS manufacturer,
+            series.name AS series,
+            power.name AS power,
+            voltage.name AS voltage,
+            ip.name AS ip
+        FROM generated_power_supplies AS gps
+        JOIN power_supply_manufacturers AS manufacturer ON manufacturer.id = gps.manufacturer_id
+        JOIN power_supply_series AS series ON series.id = gps.series_id
+        JOIN power_supply_power_options AS power ON power.id = gps.power_option_id
+        JOIN power_supply_voltage_options AS voltage ON voltage.id = gps.voltage_option_id
+        JOIN power_supply_ip_options AS ip ON ip.id = gps.ip_option_id
+        ORDER BY gps.created_at DESC NULLS LAST, gps.id DESC
+        """
+    )
     return [dict(row) for row in rows]
 
 
 async def fetch_power_supply_stock_summary() -> list[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                gps.article,
-                manufacturer.name AS manufacturer,
-                series.name AS series,
-                power.name AS power,
-                voltage.name AS voltage,
-                ip.name AS ip,
-                COALESCE(SUM(wps.quantity), 0) AS total_quantity
-            FROM generated_power_supplies AS gps
-            JOIN power_supply_manufacturers AS manufacturer ON manufacturer.id = gps.manufacturer_id
-            JOIN power_supply_series AS series ON series.id = gps.series_id
-            JOIN power_supply_power_options AS power ON power.id = gps.power_option_id
-            JOIN power_supply_voltage_options AS voltage ON voltage.id = gps.voltage_option_id
-            JOIN power_supply_ip_options AS ip ON ip.id = gps.ip_option_id
-            LEFT JOIN warehouse_power_supplies AS wps ON wps.power_supply_id = gps.id
-            GROUP BY
-                gps.id,
-                gps.article,
-                manufacturer.name,
-                series.name,
-                power.name,
-                voltage.name,
-                ip.name
-            HAVING COALESCE(SUM(wps.quantity), 0) > 0
-            ORDER BY total_quantity DESC, LOWER(gps.article)
-            """,
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT
+            gps.article,
+            manufacturer.name AS manufacturer,
+            series.name AS series,
+            power.name AS power,
+            voltage.name AS voltage,
+            ip.name AS ip,
+            COALESCE(SUM(wps.quantity), 0) AS total_quantity
+        FROM generated_power_supplies AS gps
+        JOIN power_supply_manufacturers AS manufacturer ON manufacturer.id = gps.manufacturer_id
+        JOIN power_supply_series AS series ON series.id = gps.series_id
+        JOIN power_supply_power_options AS power ON power.id = gps.power_option_id
+        JOIN power_supply_voltage_options AS voltage ON voltage.id = gps.voltage_option_id
+        JOIN power_supply_ip_options AS ip ON ip.id = gps.ip_option_id
+        LEFT JOIN warehouse_power_supplies AS wps ON wps.power_supply_id = gps.id
+        GROUP BY
+            gps.id,
+            gps.article,
+            manufacturer.name,
+            series.name,
+            power.name,
+            voltage.name,
+            ip.name
+        HAVING COALESCE(SUM(wps.quantity), 0) > 0
+        ORDER BY total_quantity DESC, LOWER(gps.article)
+        """,
+    )
     return [dict(row) for row in rows]
 
 
 async def fetch_led_module_stock_summary() -> list[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                glm.article,
-                manufacturer.name AS manufacturer,
-                series.name AS series,
-                color.name AS color,
-                lens.value AS lens_count,
-                power.name AS power,
-                voltage.name AS voltage,
-                COALESCE(SUM(wlm.quantity), 0) AS total_quantity
-            FROM generated_led_modules AS glm
-            JOIN led_module_manufacturers AS manufacturer ON manufacturer.id = glm.manufacturer_id
-            JOIN led_module_series AS series ON series.id = glm.series_id
-            JOIN led_module_colors AS color ON color.id = glm.color_id
-            JOIN led_module_lens_counts AS lens ON lens.id = glm.lens_count_id
-            JOIN led_module_power_options AS power ON power.id = glm.power_option_id
-            JOIN led_module_voltage_options AS voltage ON voltage.id = glm.voltage_option_id
-            LEFT JOIN warehouse_led_modules AS wlm ON wlm.led_module_id = glm.id
-            GROUP BY
-                glm.id,
-                glm.article,
-                manufacturer.name,
-                series.name,
-                color.name,
-                lens.value,
-                power.name,
-                voltage.name
-            HAVING COALESCE(SUM(wlm.quantity), 0) > 0
-            ORDER BY total_quantity DESC, LOWER(glm.article)
-            """,
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT
+            glm.article,
+            manufacturer.name AS manufacturer,
+            series.name AS series,
+            color.name AS color,
+            lens.value AS lens_count,
+            power.name AS power,
+            voltage.name AS voltage,
+            COALESCE(SUM(wlm.quantity), 0) AS total_quantity
+        FROM generated_led_modules AS glm
+        JOIN led_module_manufacturers AS manufacturer ON manufacturer.id = glm.manufacturer_id
+        JOIN led_module_series AS series ON series.id = glm.series_id
+        JOIN led_module_colors AS color ON color.id = glm.color_id
+        JOIN led_module_lens_counts AS lens ON lens.id = glm.lens_count_id
+        JOIN led_module_power_options AS power ON power.id = glm.power_option_id
+        JOIN led_module_voltage_options AS voltage ON voltage.id = glm.voltage_option_id
+        LEFT JOIN warehouse_led_modules AS wlm ON wlm.led_module_id = glm.id
+        GROUP BY
+            glm.id,
+            glm.article,
+            manufacturer.name,
+            series.name,
+            color.name,
+            lens.value,
+            power.name,
+            voltage.name
+        HAVING COALESCE(SUM(wlm.quantity), 0) > 0
+        ORDER BY total_quantity DESC, LOWER(glm.article)
+        """,
+    )
     return [dict(row) for row in rows]
 
 
 async def get_generated_led_module_details(module_id: int) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT
-                glm.id,
-                glm.article,
-                manufacturer.name AS manufacturer,
-                series.name AS series,
-                color.name AS color,
-                lens.value AS lens_count,
-                power.name AS power,
-                voltage.name AS voltage
-            FROM generated_led_modules AS glm
-            JOIN led_module_manufacturers AS manufacturer ON manufacturer.id = glm.manufacturer_id
-            JOIN led_module_series AS series ON series.id = glm.series_id
-            JOIN led_module_colors AS color ON color.id = glm.color_id
-            JOIN led_module_lens_counts AS lens ON lens.id = glm.lens_count_id
-            JOIN led_module_power_options AS power ON power.id = glm.power_option_id
-            JOIN led_module_voltage_options AS voltage ON voltage.id = glm.voltage_option_id
-            WHERE glm.id = $1
-            """,
-            module_id,
-        )
+    row = await db_pool.fetchrow(
+        """
+        SELECT
+            glm.id,
+            glm.article,
+            manufacturer.name AS manufacturer,
+            series.name AS series,
+            color.name AS color,
+            lens.value AS lens_count,
+            power.name AS power,
+            voltage.name AS voltage
+        FROM generated_led_modules AS glm
+        JOIN led_module_manufacturers AS manufacturer ON manufacturer.id = glm.manufacturer_id
+        JOIN led_module_series AS series ON series.id = glm.series_id
+        JOIN led_module_colors AS color ON color.id = glm.color_id
+        JOIN led_module_lens_counts AS lens ON lens.id = glm.lens_count_id
+        JOIN led_module_power_options AS power ON power.id = glm.power_option_id
+        JOIN led_module_voltage_options AS voltage ON voltage.id = glm.voltage_option_id
+        WHERE glm.id = $1
+        """,
+        module_id,
+    )
     if row is None:
         return None
     return dict(row)
@@ -2850,27 +3186,26 @@ async def get_generated_led_module_details(module_id: int) -> Optional[dict[str,
 async def get_generated_power_supply_details(power_supply_id: int) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT
-                gps.id,
-                gps.article,
-                manufacturer.name AS manufacturer,
-                series.name AS series,
-                power.name AS power,
-                voltage.name AS voltage,
-                ip.name AS ip
-            FROM generated_power_supplies AS gps
-            JOIN power_supply_manufacturers AS manufacturer ON manufacturer.id = gps.manufacturer_id
-            JOIN power_supply_series AS series ON series.id = gps.series_id
-            JOIN power_supply_power_options AS power ON power.id = gps.power_option_id
-            JOIN power_supply_voltage_options AS voltage ON voltage.id = gps.voltage_option_id
-            JOIN power_supply_ip_options AS ip ON ip.id = gps.ip_option_id
-            WHERE gps.id = $1
-            """,
-            power_supply_id,
-        )
+    row = await db_pool.fetchrow(
+        """
+        SELECT
+            gps.id,
+            gps.article,
+            manufacturer.name AS manufacturer,
+            series.name AS series,
+            power.name AS power,
+            voltage.name AS voltage,
+            ip.name AS ip
+        FROM generated_power_supplies AS gps
+        JOIN power_supply_manufacturers AS manufacturer ON manufacturer.id = gps.manufacturer_id
+        JOIN power_supply_series AS series ON series.id = gps.series_id
+        JOIN power_supply_power_options AS power ON power.id = gps.power_option_id
+        JOIN power_supply_voltage_options AS voltage ON voltage.id = gps.voltage_option_id
+        JOIN power_supply_ip_options AS ip ON ip.id = gps.ip_option_id
+        WHERE gps.id = $1
+        """,
+        power_supply_id,
+    )
     if row is None:
         return None
     return dict(row)
@@ -2879,10 +3214,9 @@ async def get_generated_power_supply_details(power_supply_id: int) -> Optional[d
 async def fetch_led_module_lens_counts() -> list[int]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT value FROM led_module_lens_counts ORDER BY value"
-        )
+    rows = await db_pool.fetch(
+        "SELECT value FROM led_module_lens_counts ORDER BY value"
+    )
     return [row["value"] for row in rows]
 
 
@@ -2894,16 +3228,15 @@ async def fetch_led_module_series_by_manufacturer(
         return []
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT name
-            FROM led_module_series
-            WHERE manufacturer_id = $1
-            ORDER BY LOWER(name)
-            """,
-            manufacturer["id"],
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT name
+        FROM led_module_series
+        WHERE manufacturer_id = $1
+        ORDER BY LOWER(name)
+        """,
+        manufacturer["id"],
+    )
     return [row["name"] for row in rows]
 
 
@@ -2912,16 +3245,15 @@ async def get_led_module_series_by_name(
 ) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT id, manufacturer_id, name
-            FROM led_module_series
-            WHERE manufacturer_id = $1 AND LOWER(name) = LOWER($2)
-            """,
-            manufacturer_id,
-            name,
-        )
+    row = await db_pool.fetchrow(
+        """
+        SELECT id, manufacturer_id, name
+        FROM led_module_series
+        WHERE manufacturer_id = $1 AND LOWER(name) = LOWER($2)
+        """,
+        manufacturer_id,
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "manufacturer_id": row["manufacturer_id"], "name": row["name"]}
@@ -2930,11 +3262,10 @@ async def get_led_module_series_by_name(
 async def get_led_module_color_by_name(name: str) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT id, name FROM led_module_colors WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
+    row = await db_pool.fetchrow(
+        "SELECT id, name FROM led_module_colors WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "name": row["name"]}
@@ -2943,11 +3274,10 @@ async def get_led_module_color_by_name(name: str) -> Optional[dict[str, Any]]:
 async def get_led_module_power_option_by_name(name: str) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT id, name FROM led_module_power_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
+    row = await db_pool.fetchrow(
+        "SELECT id, name FROM led_module_power_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "name": row["name"]}
@@ -2956,11 +3286,10 @@ async def get_led_module_power_option_by_name(name: str) -> Optional[dict[str, A
 async def get_led_module_voltage_option_by_name(name: str) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT id, name FROM led_module_voltage_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
+    row = await db_pool.fetchrow(
+        "SELECT id, name FROM led_module_voltage_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "name": row["name"]}
@@ -2969,11 +3298,10 @@ async def get_led_module_voltage_option_by_name(name: str) -> Optional[dict[str,
 async def get_led_module_lens_count_by_value(value: int) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT id, value FROM led_module_lens_counts WHERE value = $1",
-            value,
-        )
+    row = await db_pool.fetchrow(
+        "SELECT id, value FROM led_module_lens_counts WHERE value = $1",
+        value,
+    )
     if row is None:
         return None
     return {"id": row["id"], "value": row["value"]}
@@ -2982,16 +3310,15 @@ async def get_led_module_lens_count_by_value(value: int) -> Optional[dict[str, A
 async def get_generated_power_supply_by_article(article: str) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT id, article, manufacturer_id, series_id, power_option_id,
-                   voltage_option_id, ip_option_id, created_at
-            FROM generated_power_supplies
-            WHERE LOWER(article) = LOWER($1)
-            """,
-            article,
-        )
+    row = await db_pool.fetchrow(
+        """
+        SELECT id, article, manufacturer_id, series_id, power_option_id,
+               voltage_option_id, ip_option_id, created_at
+        FROM generated_power_supplies
+        WHERE LOWER(article) = LOWER($1)
+        """,
+        article,
+    )
     if row is None:
         return None
     return dict(row)
@@ -3000,30 +3327,28 @@ async def get_generated_power_supply_by_article(article: str) -> Optional[dict[s
 async def delete_generated_power_supply(power_supply_id: int) -> str:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        try:
-            result = await conn.execute(
-                "DELETE FROM generated_power_supplies WHERE id = $1",
-                power_supply_id,
-            )
-        except ForeignKeyViolationError:
-            return "in_use"
-    return "deleted" if result.endswith(" 1") else "not_found"
+    try:
+        result = await db_pool.execute(
+            "DELETE FROM generated_power_supplies WHERE id = $1",
+            power_supply_id,
+        )
+    except ForeignKeyViolationError:
+        return "in_use"
+    return "deleted" if _affected_rows(result) > 0 else "not_found"
 
 
 async def get_generated_led_module_by_article(article: str) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT id, article, manufacturer_id, series_id, color_id,
-                   lens_count_id, power_option_id, voltage_option_id, created_at
-            FROM generated_led_modules
-            WHERE LOWER(article) = LOWER($1)
-            """,
-            article,
-        )
+    row = await db_pool.fetchrow(
+        """
+        SELECT id, article, manufacturer_id, series_id, color_id,
+               lens_count_id, power_option_id, voltage_option_id, created_at
+        FROM generated_led_modules
+        WHERE LOWER(article) = LOWER($1)
+        """,
+        article,
+    )
     if row is None:
         return None
     return dict(row)
@@ -3040,29 +3365,28 @@ async def insert_generated_power_supply(
 ) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO generated_power_supplies (
-                article,
-                manufacturer_id,
-                series_id,
-                power_option_id,
-                voltage_option_id,
-                ip_option_id
-            )
-            VALUES ($1, $2, $3, $4, $5, $6)
-            ON CONFLICT (article) DO NOTHING
-            RETURNING id, article, manufacturer_id, series_id, power_option_id,
-                      voltage_option_id, ip_option_id, created_at
-            """,
+    row = await db_pool.fetchrow(
+        """
+        INSERT INTO generated_power_supplies (
             article,
             manufacturer_id,
             series_id,
             power_option_id,
             voltage_option_id,
-            ip_option_id,
-        )
+            ip_option_id
+        )
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (article) DO NOTHING
+        RETURNING id, article, manufacturer_id, series_id, power_option_id,
+                  voltage_option_id, ip_option_id, created_at
+        """,
+        article,
+        manufacturer_id,
+        series_id,
+        power_option_id,
+        voltage_option_id,
+        ip_option_id,
+    )
     if row is None:
         return None
     return dict(row)
@@ -3079,34 +3403,33 @@ async def insert_warehouse_power_supply_record(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     added_at = datetime.now(WARSAW_TZ)
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO warehouse_power_supplies (
-                power_supply_id,
-                article,
-                quantity,
-                added_by_id,
-                added_by_name,
-                added_at
-            )
-            VALUES ($1, $2, $3, $4, $5, $6)
-            RETURNING
-                id,
-                power_supply_id,
-                article,
-                quantity,
-                added_by_id,
-                added_by_name,
-                added_at
-            """,
+    row = await db_pool.fetchrow(
+        """
+        INSERT INTO warehouse_power_supplies (
             power_supply_id,
             article,
             quantity,
             added_by_id,
             added_by_name,
-            added_at,
+            added_at
         )
+        VALUES ($1, $2, $3, $4, $5, $6)
+        RETURNING
+            id,
+            power_supply_id,
+            article,
+            quantity,
+            added_by_id,
+            added_by_name,
+            added_at
+        """,
+        power_supply_id,
+        article,
+        quantity,
+        added_by_id,
+        added_by_name,
+        added_at,
+    )
     if row is None:
         return {}
     return dict(row)
@@ -3115,15 +3438,14 @@ async def insert_warehouse_power_supply_record(
 async def get_power_supply_stock_quantity(power_supply_id: int) -> int:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        value = await conn.fetchval(
-            """
-            SELECT COALESCE(SUM(quantity), 0)
-            FROM warehouse_power_supplies
-            WHERE power_supply_id = $1
-            """,
-            power_supply_id,
-        )
+    value = await db_pool.fetchval(
+        """
+        SELECT COALESCE(SUM(quantity), 0)
+        FROM warehouse_power_supplies
+        WHERE power_supply_id = $1
+        """,
+        power_supply_id,
+    )
     return int(value or 0)
 
 
@@ -3153,7 +3475,7 @@ async def write_off_power_supply_stock(
             )
             if available is None or int(available) < quantity:
                 return None
-            ledger_row = await conn.fetchrow(
+            ledger_id = await conn.fetchval(
                 """
                 INSERT INTO warehouse_power_supplies (
                     power_supply_id,
@@ -3173,7 +3495,7 @@ async def write_off_power_supply_stock(
                 written_off_by_name,
                 now_warsaw,
             )
-            if ledger_row is None:
+            if ledger_id is None:
                 return None
             written_off_row = await conn.fetchrow(
                 """
@@ -3222,31 +3544,30 @@ async def insert_generated_led_module(
 ) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO generated_led_modules (
-                article,
-                manufacturer_id,
-                series_id,
-                color_id,
-                lens_count_id,
-                power_option_id,
-                voltage_option_id
-            )
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
-            ON CONFLICT (article) DO NOTHING
-            RETURNING id, article, manufacturer_id, series_id, color_id,
-                      lens_count_id, power_option_id, voltage_option_id, created_at
-            """,
+    row = await db_pool.fetchrow(
+        """
+        INSERT INTO generated_led_modules (
             article,
             manufacturer_id,
             series_id,
             color_id,
             lens_count_id,
             power_option_id,
-            voltage_option_id,
-        )
+            voltage_option_id
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        ON CONFLICT (article) DO NOTHING
+        RETURNING id, article, manufacturer_id, series_id, color_id,
+                  lens_count_id, power_option_id, voltage_option_id, created_at
+        """,
+        article,
+        manufacturer_id,
+        series_id,
+        color_id,
+        lens_count_id,
+        power_option_id,
+        voltage_option_id,
+    )
     if row is None:
         return None
     return dict(row)
@@ -3263,27 +3584,26 @@ async def insert_warehouse_led_module_record(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     added_at = datetime.now(WARSAW_TZ)
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO warehouse_led_modules (
-                led_module_id,
-                article,
-                quantity,
-                added_by_id,
-                added_by_name,
-                added_at
-            )
-            VALUES ($1, $2, $3, $4, $5, $6)
-            RETURNING id, led_module_id, article, quantity, added_by_id, added_by_name, added_at
-            """,
+    row = await db_pool.fetchrow(
+        """
+        INSERT INTO warehouse_led_modules (
             led_module_id,
             article,
             quantity,
             added_by_id,
             added_by_name,
-            added_at,
-        )
+            added_at
+        )
+        VALUES ($1, $2, $3, $4, $5, $6)
+        RETURNING id, led_module_id, article, quantity, added_by_id, added_by_name, added_at
+        """,
+        led_module_id,
+        article,
+        quantity,
+        added_by_id,
+        added_by_name,
+        added_at,
+    )
     if row is None:
         return {}
     return dict(row)
@@ -3292,11 +3612,10 @@ async def insert_warehouse_led_module_record(
 async def get_led_module_stock_quantity(led_module_id: int) -> int:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        value = await conn.fetchval(
-            "SELECT COALESCE(SUM(quantity), 0) FROM warehouse_led_modules WHERE led_module_id = $1",
-            led_module_id,
-        )
+    value = await db_pool.fetchval(
+        "SELECT COALESCE(SUM(quantity), 0) FROM warehouse_led_modules WHERE led_module_id = $1",
+        led_module_id,
+    )
     return int(value or 0)
 
 
@@ -3322,7 +3641,7 @@ async def write_off_led_module_stock(
             )
             if available is None or int(available) < quantity:
                 return None
-            ledger_row = await conn.fetchrow(
+            ledger_id = await conn.fetchval(
                 """
                 INSERT INTO warehouse_led_modules (
                     led_module_id,
@@ -3342,7 +3661,7 @@ async def write_off_led_module_stock(
                 written_off_by_name,
                 now_warsaw,
             )
-            if ledger_row is None:
+            if ledger_id is None:
                 return None
             written_off_row = await conn.fetchrow(
                 """
@@ -3382,10 +3701,9 @@ async def write_off_led_module_stock(
 async def fetch_film_storage_locations() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT name FROM film_storage_locations ORDER BY LOWER(name)"
-        )
+    rows = await db_pool.fetch(
+        "SELECT name FROM film_storage_locations ORDER BY LOWER(name)"
+    )
     return [row["name"] for row in rows]
 
 
@@ -3394,11 +3712,10 @@ async def get_film_manufacturer_by_name(
 ) -> Optional[dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT id, name FROM film_manufacturers WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
+    row = await db_pool.fetchrow(
+        "SELECT id, name FROM film_manufacturers WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
     if row is None:
         return None
     return {"id": row["id"], "name": row["name"]}
@@ -3439,30 +3756,28 @@ async def fetch_film_series_by_manufacturer(manufacturer_name: str) -> list[str]
         return []
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT name
-            FROM film_series
-            WHERE manufacturer_id = $1
-            ORDER BY LOWER(name)
-            """,
-            manufacturer["id"],
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT name
+        FROM film_series
+        WHERE manufacturer_id = $1
+        ORDER BY LOWER(name)
+        """,
+        manufacturer["id"],
+    )
     return [row["name"] for row in rows]
 
 
 async def fetch_max_plastic_article() -> Optional[int]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        value = await conn.fetchval(
-            """
-            SELECT MAX(article::BIGINT)
-            FROM warehouse_plastics
-            WHERE article ~ '^[0-9]+$'
-            """
-        )
+    value = await db_pool.fetchval(
+        """
+        SELECT MAX(article::BIGINT)
+        FROM warehouse_plastics
+        WHERE article ~ '^[0-9]+$'
+        """
+    )
     if value is None:
         return None
     try:
@@ -3474,14 +3789,13 @@ async def fetch_max_plastic_article() -> Optional[int]:
 async def fetch_max_film_article() -> Optional[int]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        value = await conn.fetchval(
-            """
-            SELECT MAX(article::BIGINT)
-            FROM warehouse_films
-            WHERE article ~ '^[0-9]+$'
-            """
-        )
+    value = await db_pool.fetchval(
+        """
+        SELECT MAX(article::BIGINT)
+        FROM warehouse_films
+        WHERE article ~ '^[0-9]+$'
+        """
+    )
     if value is None:
         return None
     try:
@@ -3493,71 +3807,81 @@ async def fetch_max_film_article() -> Optional[int]:
 async def insert_order_type(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO order_types (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO order_types (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def insert_task_type(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO task_types (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO task_types (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_task_type(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM task_types WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM task_types WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_plastic_material_type(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO plastic_material_types (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
+    # Известный дубликат отсекаем без запроса к базе.
+    keys = _MATERIALS_CACHE.get("keys")
+    if keys is not None and _material_key(name) in keys:
+        return False
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO plastic_material_types (name)
+        SELECT $1
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM plastic_material_types
+            WHERE name_key = lower(normalize($1, NFC))
         )
-    return row is not None
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    if inserted_id is None:
+        return False
+    invalidate_materials_cache()
+    return True
 
 
 async def delete_plastic_material_type(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM plastic_material_types WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM plastic_material_types WHERE name_key = lower(normalize($1, NFC))",
+        name,
+    )
+    if _affected_rows(result) == 0:
+        return False
+    invalidate_materials_cache()
+    return True
 
 
 async def insert_plastic_storage_location(name: str) -> bool:
@@ -3570,7 +3894,7 @@ async def insert_plastic_storage_location(name: str) -> bool:
         )
         if existing_id:
             return False
-        row = await conn.fetchrow(
+        inserted_id = await conn.fetchval(
             """
             INSERT INTO plastic_storage_locations (name)
             VALUES ($1)
@@ -3578,61 +3902,57 @@ async def insert_plastic_storage_location(name: str) -> bool:
             """,
             name,
         )
-    return row is not None
+    return inserted_id is not None
 
 
 async def delete_plastic_storage_location(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM plastic_storage_locations WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM plastic_storage_locations WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_film_manufacturer(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO film_manufacturers (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO film_manufacturers (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_film_manufacturer(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM film_manufacturers WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM film_manufacturers WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_module_manufacturer(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_module_manufacturers (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_module_manufacturers (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def insert_led_module_storage_location(name: str) -> bool:
@@ -3645,7 +3965,7 @@ async def insert_led_module_storage_location(name: str) -> bool:
         )
         if existing_id:
             return False
-        row = await conn.fetchrow(
+        inserted_id = await conn.fetchval(
             """
             INSERT INTO led_module_storage_locations (name)
             VALUES ($1)
@@ -3653,42 +3973,40 @@ async def insert_led_module_storage_location(name: str) -> bool:
             """,
             name,
         )
-    return row is not None
+    return inserted_id is not None
 
 
 async def delete_led_module_manufacturer(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_module_manufacturers WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_module_manufacturers WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def delete_led_module_storage_location(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_module_storage_locations WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_module_storage_locations WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_module_color(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     async with db_pool.acquire() as conn:
-        existing = await conn.fetchrow(
+        existing = await conn.fetchval(
             "SELECT 1 FROM led_module_colors WHERE LOWER(name) = LOWER($1)",
             name,
         )
         if existing:
             return False
-        row = await conn.fetchrow(
+        inserted_id = await conn.fetchval(
             """
             INSERT INTO led_module_colors (name)
             VALUES ($1)
@@ -3696,34 +4014,32 @@ async def insert_led_module_color(name: str) -> bool:
             """,
             name,
         )
-    return row is not None
+    return inserted_id is not None
 
 
 async def delete_led_module_color(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_module_colors WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_module_colors WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_module_lens_count(value: int) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_module_lens_counts (value)
-            VALUES ($1)
-            ON CONFLICT (value) DO NOTHING
-            RETURNING id
-            """,
-            value,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_module_lens_counts (value)
+        VALUES ($1)
+        ON CONFLICT (value) DO NOTHING
+        RETURNING id
+        """,
+        value,
+    )
+    return inserted_id is not None
 
 
 async def insert_led_module_series(
@@ -3732,17 +4048,16 @@ async def insert_led_module_series(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     async with db_pool.acquire() as conn:
-        manufacturer_row = await conn.fetchrow(
+        manufacturer_id = await conn.fetchval(
             """
-            SELECT id, name
+            SELECT id
             FROM led_module_manufacturers
             WHERE LOWER(name) = LOWER($1)
             """,
             manufacturer_name,
         )
-        if manufacturer_row is None:
+        if manufacturer_id is None:
             return "manufacturer_not_found"
-        manufacturer_id = manufacturer_row["id"]
         existing_id = await conn.fetchval(
             """
             SELECT id
@@ -3754,7 +4069,7 @@ async def insert_led_module_series(
         )
         if existing_id:
             return "already_exists"
-        row = await conn.fetchrow(
+        inserted_id = await conn.fetchval(
             """
             INSERT INTO led_module_series (manufacturer_id, name)
             VALUES ($1, $2)
@@ -3763,7 +4078,7 @@ async def insert_led_module_series(
             manufacturer_id,
             series_name,
         )
-    return "inserted" if row else "error"
+    return "inserted" if inserted_id else "error"
 
 
 async def delete_led_module_series(
@@ -3772,7 +4087,7 @@ async def delete_led_module_series(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     async with db_pool.acquire() as conn:
-        manufacturer_row = await conn.fetchrow(
+        manufacturer_id = await conn.fetchval(
             """
             SELECT id
             FROM led_module_manufacturers
@@ -3780,109 +4095,102 @@ async def delete_led_module_series(
             """,
             manufacturer_name,
         )
-        if manufacturer_row is None:
+        if manufacturer_id is None:
             return "manufacturer_not_found"
         result = await conn.execute(
             """
             DELETE FROM led_module_series
             WHERE manufacturer_id = $1 AND LOWER(name) = LOWER($2)
             """,
-            manufacturer_row["id"],
+            manufacturer_id,
             series_name,
         )
-    return "deleted" if result.endswith(" 1") else "not_found"
+    return "deleted" if _affected_rows(result) > 0 else "not_found"
 
 
 async def delete_led_module_lens_count(value: int) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_module_lens_counts WHERE value = $1",
-            value,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_module_lens_counts WHERE value = $1",
+        value,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_module_power_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_module_power_options (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_module_power_options (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_led_module_power_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_module_power_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_module_power_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_module_voltage_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_module_voltage_options (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_module_voltage_options (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_led_module_voltage_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_module_voltage_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_module_voltage_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_strip_manufacturer(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_strip_manufacturers (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_strip_manufacturers (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_led_strip_manufacturer(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_strip_manufacturers WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_strip_manufacturers WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_strip_series(
@@ -3891,16 +4199,15 @@ async def insert_led_strip_series(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     async with db_pool.acquire() as conn:
-        manufacturer_row = await conn.fetchrow(
+        manufacturer_id = await conn.fetchval(
             """
             SELECT id FROM led_strip_manufacturers
             WHERE LOWER(name) = LOWER($1)
             """,
             manufacturer_name,
         )
-        if manufacturer_row is None:
+        if manufacturer_id is None:
             return "manufacturer_not_found"
-        manufacturer_id = manufacturer_row["id"]
         existing_id = await conn.fetchval(
             """
             SELECT id FROM led_strip_series
@@ -3911,7 +4218,7 @@ async def insert_led_strip_series(
         )
         if existing_id:
             return "already_exists"
-        row = await conn.fetchrow(
+        inserted_id = await conn.fetchval(
             """
             INSERT INTO led_strip_series (manufacturer_id, name)
             VALUES ($1, $2)
@@ -3920,7 +4227,7 @@ async def insert_led_strip_series(
             manufacturer_id,
             series_name,
         )
-    return "inserted" if row else "error"
+    return "inserted" if inserted_id else "error"
 
 
 async def delete_led_strip_series(
@@ -3929,321 +4236,299 @@ async def delete_led_strip_series(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     async with db_pool.acquire() as conn:
-        manufacturer_row = await conn.fetchrow(
+        manufacturer_id = await conn.fetchval(
             """
             SELECT id FROM led_strip_manufacturers
             WHERE LOWER(name) = LOWER($1)
             """,
             manufacturer_name,
         )
-        if manufacturer_row is None:
+        if manufacturer_id is None:
             return "manufacturer_not_found"
         result = await conn.execute(
             """
             DELETE FROM led_strip_series
             WHERE manufacturer_id = $1 AND LOWER(name) = LOWER($2)
             """,
-            manufacturer_row["id"],
+            manufacturer_id,
             series_name,
         )
-    return "deleted" if result.endswith(" 1") else "not_found"
+    return "deleted" if _affected_rows(result) > 0 else "not_found"
 
 
 async def insert_led_strip_color_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_strip_color_options (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_strip_color_options (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_led_strip_color_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_strip_color_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_strip_color_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_strip_cut_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_strip_cut_options (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_strip_cut_options (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_led_strip_cut_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_strip_cut_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_strip_cut_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_strip_type_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_strip_type_options (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_strip_type_options (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_led_strip_type_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_strip_type_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_strip_type_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_strip_bus_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_strip_bus_options (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_strip_bus_options (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_led_strip_bus_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_strip_bus_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_strip_bus_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_strip_led_count(value: int) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_strip_led_count_options (value)
-            VALUES ($1)
-            ON CONFLICT (value) DO NOTHING
-            RETURNING id
-            """,
-            value,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_strip_led_count_options (value)
+        VALUES ($1)
+        ON CONFLICT (value) DO NOTHING
+        RETURNING id
+        """,
+        value,
+    )
+    return inserted_id is not None
 
 
 async def delete_led_strip_led_count(value: int) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_strip_led_count_options WHERE value = $1",
-            value,
-        )
-    return result.endswith(" 1")
-
-
-async def insert_led_strip_voltage_option(name: str) -> bool:
-    if db_pool is None:
-        raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_strip_voltage_options (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    result = await db_pool.execute(
+        "DELETE FROM led_strip_led_count_options WHERE value = $1",
+        value,
+    )
+    return _affected_rows(result) > 0
+
+
+async def insert_led_strip_voltage_option(name: str) -> bool:
+    if db_pool is None:
+        raise RuntimeError("Database pool is not initialised")
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_strip_voltage_options (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_led_strip_voltage_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_strip_voltage_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_strip_voltage_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_led_strip_ip_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO led_strip_ip_options (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO led_strip_ip_options (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_led_strip_ip_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM led_strip_ip_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM led_strip_ip_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_power_supply_manufacturer(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO power_supply_manufacturers (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO power_supply_manufacturers (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_power_supply_manufacturer(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM power_supply_manufacturers WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM power_supply_manufacturers WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_power_supply_power_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO power_supply_power_options (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO power_supply_power_options (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_power_supply_power_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM power_supply_power_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM power_supply_power_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_power_supply_voltage_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO power_supply_voltage_options (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO power_supply_voltage_options (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_power_supply_voltage_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM power_supply_voltage_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM power_supply_voltage_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_power_supply_ip_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO power_supply_ip_options (name)
-            VALUES ($1)
-            ON CONFLICT (name) DO NOTHING
-            RETURNING id
-            """,
-            name,
-        )
-    return row is not None
+    inserted_id = await db_pool.fetchval(
+        """
+        INSERT INTO power_supply_ip_options (name)
+        VALUES ($1)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id
+        """,
+        name,
+    )
+    return inserted_id is not None
 
 
 async def delete_power_supply_ip_option(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM power_supply_ip_options WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM power_supply_ip_options WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
 async def insert_power_supply_series(
@@ -4252,16 +4537,15 @@ async def insert_power_supply_series(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     async with db_pool.acquire() as conn:
-        manufacturer_row = await conn.fetchrow(
+        manufacturer_id = await conn.fetchval(
             """
             SELECT id FROM power_supply_manufacturers
             WHERE LOWER(name) = LOWER($1)
             """,
             manufacturer_name,
         )
-        if manufacturer_row is None:
+        if manufacturer_id is None:
             return "manufacturer_not_found"
-        manufacturer_id = manufacturer_row["id"]
         existing_id = await conn.fetchval(
             """
             SELECT id FROM power_supply_series
@@ -4272,7 +4556,7 @@ async def insert_power_supply_series(
         )
         if existing_id:
             return "already_exists"
-        row = await conn.fetchrow(
+        inserted_id = await conn.fetchval(
             """
             INSERT INTO power_supply_series (manufacturer_id, name)
             VALUES ($1, $2)
@@ -4281,7 +4565,7 @@ async def insert_power_supply_series(
             manufacturer_id,
             series_name,
         )
-    return "inserted" if row else "error"
+    return "inserted" if inserted_id else "error"
 
 
 async def delete_power_supply_series(
@@ -4290,24 +4574,24 @@ async def delete_power_supply_series(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     async with db_pool.acquire() as conn:
-        manufacturer_row = await conn.fetchrow(
+        manufacturer_id = await conn.fetchval(
             """
             SELECT id FROM power_supply_manufacturers
             WHERE LOWER(name) = LOWER($1)
             """,
             manufacturer_name,
         )
-        if manufacturer_row is None:
+        if manufacturer_id is None:
             return "manufacturer_not_found"
         result = await conn.execute(
             """
             DELETE FROM power_supply_series
             WHERE manufacturer_id = $1 AND LOWER(name) = LOWER($2)
             """,
-            manufacturer_row["id"],
+            manufacturer_id,
             series_name,
         )
-    return "deleted" if result.endswith(" 1") else "not_found"
+    return "deleted" if _affected_rows(result) > 0 else "not_found"
 
 
 async def insert_film_series(
@@ -4316,13 +4600,12 @@ async def insert_film_series(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     async with db_pool.acquire() as conn:
-        manufacturer_row = await conn.fetchrow(
-            "SELECT id, name FROM film_manufacturers WHERE LOWER(name) = LOWER($1)",
+        manufacturer_id = await conn.fetchval(
+            "SELECT id FROM film_manufacturers WHERE LOWER(name) = LOWER($1)",
             manufacturer_name,
         )
-        if manufacturer_row is None:
+        if manufacturer_id is None:
             return "manufacturer_not_found"
-        manufacturer_id = manufacturer_row["id"]
         existing_id = await conn.fetchval(
             """
             SELECT id FROM film_series
@@ -4333,7 +4616,7 @@ async def insert_film_series(
         )
         if existing_id:
             return "already_exists"
-        row = await conn.fetchrow(
+        inserted_id = await conn.fetchval(
             """
             INSERT INTO film_series (manufacturer_id, name)
             VALUES ($1, $2)
@@ -4342,7 +4625,7 @@ async def insert_film_series(
             manufacturer_id,
             series_name,
         )
-    return "inserted" if row else "error"
+    return "inserted" if inserted_id else "error"
 
 
 async def delete_film_series(
@@ -4351,21 +4634,21 @@ async def delete_film_series(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     async with db_pool.acquire() as conn:
-        manufacturer_row = await conn.fetchrow(
+        manufacturer_id = await conn.fetchval(
             "SELECT id FROM film_manufacturers WHERE LOWER(name) = LOWER($1)",
             manufacturer_name,
         )
-        if manufacturer_row is None:
+        if manufacturer_id is None:
             return "manufacturer_not_found"
         result = await conn.execute(
             """
             DELETE FROM film_series
             WHERE manufacturer_id = $1 AND LOWER(name) = LOWER($2)
             """,
-            manufacturer_row["id"],
+            manufacturer_id,
             series_name,
         )
-    return "deleted" if result.endswith(" 1") else "not_found"
+    return "deleted" if _affected_rows(result) > 0 else "not_found"
 
 
 async def insert_film_storage_location(name: str) -> bool:
@@ -4378,7 +4661,7 @@ async def insert_film_storage_location(name: str) -> bool:
         )
         if existing_id:
             return False
-        row = await conn.fetchrow(
+        inserted_id = await conn.fetchval(
             """
             INSERT INTO film_storage_locations (name)
             VALUES ($1)
@@ -4386,100 +4669,115 @@ async def insert_film_storage_location(name: str) -> bool:
             """,
             name,
         )
-    return row is not None
+    return inserted_id is not None
 
 
 async def delete_film_storage_location(name: str) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            "DELETE FROM film_storage_locations WHERE LOWER(name) = LOWER($1)",
-            name,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        "DELETE FROM film_storage_locations WHERE LOWER(name) = LOWER($1)",
+        name,
+    )
+    return _affected_rows(result) > 0
 
 
-async def fetch_materials_with_thicknesses() -> list[dict[str, Any]]:
+async def fetch_materials_with_thicknesses() -> list[asyncpg.Record]:
+    # Толщины здесь нужны только для вывода, поэтому читаются как float8:
+    # это дешевле, чем собирать Decimal на каждое значение массива.
+    # Для сравнения с вводом пользователя используйте fetch_material_thicknesses.
+    # Записи asyncpg отдаются как есть: они неизменяемы и поддерживают
+    # ["name"] и .get(), так что копировать их в dict незачем.
+    cached = _MATERIALS_CACHE.get("with_attributes")
+    if cached is not None:
+        return list(cached)
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT p.name,
-                   COALESCE(
-                       (
-                           SELECT ARRAY_AGG(t.thickness ORDER BY t.thickness)
-                           FROM plastic_material_thicknesses t
-                           WHERE t.material_id = p.id
-                       ),
-                       ARRAY[]::NUMERIC[]
-                   ) AS thicknesses,
-                   COALESCE(
-                       (
-                           SELECT ARRAY_AGG(c.color ORDER BY LOWER(c.color))
-                           FROM plastic_material_colors c
-                           WHERE c.material_id = p.id
-                       ),
-                       ARRAY[]::TEXT[]
-                   ) AS colors
-            FROM plastic_material_types p
-            ORDER BY LOWER(p.name)
-            """
+    version = _MATERIALS_VERSION
+    rows = await db_pool.fetch(_SQL_MATERIALS_WITH_ATTRIBUTES)
+    if version == _MATERIALS_VERSION:
+        _MATERIALS_CACHE["with_attributes"] = rows
+        # Индексы материалов, у которых есть толщины или цвета, для выбора
+        # материала при удалении значения.
+        for attribute in ("thicknesses", "colors"):
+            index: Dict[str, asyncpg.Record] = {}
+            for row in rows:
+                if row.get(attribute):
+                    index.setdefault(row["name"].lower(), row)
+            _MATERIALS_CACHE[f"{attribute}_index"] = index
+    return list(rows)
+
+
+async def find_material_with_attribute(
+    name: str, attribute: str
+) -> Optional[asyncpg.Record]:
+    materials = await fetch_materials_with_thicknesses()
+    index = _MATERIALS_CACHE.get(f"{attribute}_index")
+    if index is None:
+        return next(
+            (
+                item
+                for item in materials
+                if item["name"].lower() == name.lower() and item.get(attribute)
+            ),
+            None,
         )
-    return [dict(row) for row in rows]
+    return index.get(name.lower())
 
 
 async def fetch_material_thicknesses(material_name: str) -> list[Decimal]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT t.thickness
-            FROM plastic_material_thicknesses t
-            JOIN plastic_material_types p ON p.id = t.material_id
-            WHERE LOWER(p.name) = LOWER($1)
-            ORDER BY t.thickness
-            """,
-            material_name,
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT t.thickness
+        FROM plastic_material_thicknesses t
+        JOIN plastic_material_types p ON p.id = t.material_id
+        WHERE p.name_key = lower(normalize($1, NFC))
+        ORDER BY t.thickness
+        """,
+        material_name,
+    )
     return [row["thickness"] for row in rows]
 
 
 async def insert_material_thickness(material_name: str, thickness: Decimal) -> str:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        material_id = await conn.fetchval(
-            "SELECT id FROM plastic_material_types WHERE LOWER(name) = LOWER($1)",
-            material_name,
-        )
-        if material_id is None:
-            return "material_not_found"
-        row = await conn.fetchrow(
-            """
+    # Поиск материала и вставка толщины выполняются одним запросом;
+    # material_id отличает «материал не найден» от «толщина уже есть».
+    row = await db_pool.fetchrow(
+        """
+        WITH m AS (
+            SELECT id
+            FROM plastic_material_types
+            WHERE name_key = lower(normalize($1, NFC))
+            LIMIT 1
+        ),
+        inserted AS (
             INSERT INTO plastic_material_thicknesses (material_id, thickness)
-            VALUES ($1, $2)
+            SELECT id, $2 FROM m
             ON CONFLICT (material_id, thickness) DO NOTHING
             RETURNING id
-            """,
-            material_id,
-            thickness,
         )
-        if row:
-            return "added"
+        SELECT (SELECT id FROM m) AS material_id, (SELECT id FROM inserted) AS inserted_id
+        """,
+        material_name,
+        thickness,
+    )
+    if row["material_id"] is None:
+        return "material_not_found"
+    if row["inserted_id"] is None:
         return "exists"
+    invalidate_materials_cache()
+    return "added"
 
 
 async def delete_material_thickness(material_name: str, thickness: Decimal) -> str:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     async with db_pool.acquire() as conn:
-        material_id = await conn.fetchval(
-            "SELECT id FROM plastic_material_types WHERE LOWER(name) = LOWER($1)",
-            material_name,
-        )
+        material_id = await conn.fetchval(_SQL_MATERIAL_ID_BY_NAME, material_name)
         if material_id is None:
             return "material_not_found"
         result = await conn.execute(
@@ -4490,85 +4788,88 @@ async def delete_material_thickness(material_name: str, thickness: Decimal) -> s
             material_id,
             thickness,
         )
-    if result.endswith(" 1"):
-        return "deleted"
-    return "not_found"
+    if _affected_rows(result) == 0:
+        return "not_found"
+    invalidate_materials_cache()
+    return "deleted"
 
 
 async def fetch_material_colors(material_name: str) -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT c.color
-            FROM plastic_material_colors c
-            JOIN plastic_material_types p ON p.id = c.material_id
-            WHERE LOWER(p.name) = LOWER($1)
-            ORDER BY LOWER(c.color)
-            """,
-            material_name,
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT c.color
+        FROM plastic_material_colors c
+        JOIN plastic_material_types p ON p.id = c.material_id
+        WHERE p.name_key = lower(normalize($1, NFC))
+        ORDER BY LOWER(c.color)
+        """,
+        material_name,
+    )
     return [row["color"] for row in rows]
 
 
 async def fetch_all_material_thicknesses() -> list[Decimal]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT DISTINCT thickness
-            FROM plastic_material_thicknesses
-            ORDER BY thickness
-            """
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT DISTINCT thickness
+        FROM plastic_material_thicknesses
+        ORDER BY thickness
+        """
+    )
     return [row["thickness"] for row in rows]
 
 
 async def fetch_all_material_colors() -> list[str]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT DISTINCT color
-            FROM plastic_material_colors
-            ORDER BY LOWER(color)
-            """
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT DISTINCT color
+        FROM plastic_material_colors
+        ORDER BY LOWER(color)
+        """
+    )
     return [row["color"] for row in rows]
 
 
 async def insert_material_color(material_name: str, color: str) -> str:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        material_id = await conn.fetchval(
-            "SELECT id FROM plastic_material_types WHERE LOWER(name) = LOWER($1)",
-            material_name,
-        )
-        if material_id is None:
-            return "material_not_found"
-        exists = await conn.fetchval(
-            """
-            SELECT 1
-            FROM plastic_material_colors
-            WHERE material_id = $1 AND LOWER(color) = LOWER($2)
-            """,
-            material_id,
-            color,
-        )
-        if exists:
-            return "exists"
-        await conn.execute(
-            """
+    # Как и для толщин — один запрос; цвет сверяется без учёта регистра.
+    row = await db_pool.fetchrow(
+        """
+        WITH m AS (
+            SELECT id
+            FROM plastic_material_types
+            WHERE name_key = lower(normalize($1, NFC))
+            LIMIT 1
+        ),
+        inserted AS (
             INSERT INTO plastic_material_colors (material_id, color)
-            VALUES ($1, $2)
-            """,
-            material_id,
-            color,
+            SELECT m.id, $2
+            FROM m
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM plastic_material_colors c
+                WHERE c.material_id = m.id AND c.color_key = lower(normalize($2, NFC))
+            )
+            ON CONFLICT (material_id, color) DO NOTHING
+            RETURNING id
         )
+        SELECT (SELECT id FROM m) AS material_id, (SELECT id FROM inserted) AS inserted_id
+        """,
+        material_name,
+        color,
+    )
+    if row["material_id"] is None:
+        return "material_not_found"
+    if row["inserted_id"] is None:
+        return "exists"
+    invalidate_materials_cache()
     return "added"
 
 
@@ -4576,23 +4877,21 @@ async def delete_material_color(material_name: str, color: str) -> str:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     async with db_pool.acquire() as conn:
-        material_id = await conn.fetchval(
-            "SELECT id FROM plastic_material_types WHERE LOWER(name) = LOWER($1)",
-            material_name,
-        )
+        material_id = await conn.fetchval(_SQL_MATERIAL_ID_BY_NAME, material_name)
         if material_id is None:
             return "material_not_found"
         result = await conn.execute(
             """
             DELETE FROM plastic_material_colors
-            WHERE material_id = $1 AND LOWER(color) = LOWER($2)
+            WHERE material_id = $1 AND color_key = lower(normalize($2, NFC))
             """,
             material_id,
             color,
         )
-    if result.endswith(" 1"):
-        return "deleted"
-    return "not_found"
+    if _affected_rows(result) == 0:
+        return "not_found"
+    invalidate_materials_cache()
+    return "deleted"
 
 
 async def insert_warehouse_plastic_record(
@@ -4610,57 +4909,123 @@ async def insert_warehouse_plastic_record(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     now_warsaw = datetime.now(WARSAW_TZ)
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO warehouse_plastics (
-                article,
-                material,
-                thickness,
-                color,
-                length,
-                width,
-                warehouse,
-                comment,
-                employee_id,
-                employee_name,
-                arrival_date,
-                arrival_at
-            )
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-            RETURNING
-                id,
-                article,
-                material,
-                thickness,
-                color,
-                length,
-                width,
-                warehouse,
-                comment,
-                employee_id,
-                employee_name,
-                arrival_date,
-                arrival_at
-            """,
+    row = await db_pool.fetchrow(
+        """
+        INSERT INTO warehouse_plastics (
             article,
             material,
             thickness,
             color,
-            length_mm,
-            width_mm,
+            length,
+            width,
             warehouse,
             comment,
             employee_id,
             employee_name,
-            now_warsaw.date(),
-            now_warsaw,
+            arrival_date,
+            arrival_at
         )
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+        RETURNING
+            id,
+            article,
+            material,
+            thickness,
+            color,
+            length,
+            width,
+            warehouse,
+            comment,
+            employee_id,
+            employee_name,
+            arrival_date,
+            arrival_at
+        """,
+        article,
+        material,
+        thickness,
+        color,
+        length_mm,
+        width_mm,
+        warehouse,
+        comment,
+        employee_id,
+        employee_name,
+        now_warsaw.date(),
+        now_warsaw,
+    )
     if row is None:
         return {}
     return dict(row)
 
 
+async def insert_warehouse_plastic_batch(
+    articles: list[str],
+    material: str,
+    thickness: Decimal,
+    color: str,
+    length_mm: Decimal,
+    width_mm: Decimal,
+    warehouse: str,
+    comment: Optional[str],
+    employee_id: Optional[int],
+    employee_name: Optional[str],
+) -> list[Dict[str, Any]]:
+    # Вся пачка добавляется одним запросом: листы разворачиваются из массива
+    # артикулов, поэтому пачка записывается целиком или не записывается вовсе.
+    if db_pool is None:
+        raise RuntimeError("Database pool is not initialised")
+    now_warsaw = datetime.now(WARSAW_TZ)
+    rows = await db_pool.fetch(
+        """
+        INSERT INTO warehouse_plastics (
+            article,
+            material,
+            thickness,
+            color,
+            length,
+            width,
+            warehouse,
+            comment,
+            employee_id,
+            employee_name,
+            arrival_date,
+            arrival_at
+        )
+        SELECT a.article, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12
+        FROM unnest($1::TEXT[]) WITH ORDINALITY AS a(article, position)
+        ORDER BY a.position
+        RETURNING
+            id,
+            article,
+            material,
+            thickness,
+            color,
+            length,
+            width,
+            warehouse,
+            comment,
+            employee_id,
+            employee_name,
+            arrival_date,
+            arrival_at
+        """,
+        articles,
+        material,
+        thickness,
+        color,
+        length_mm,
+        width_mm,
+        warehouse,
+        comment,
+        employee_id,
+        employee_name,
+        now_warsaw.date(),
+        now_warsaw,
+    )
+    return [dict(row) for row in rows]
+
+
 async def insert_warehouse_film_record(
     article: str,
     manufacturer: str,
@@ -4677,52 +5042,51 @@ async def insert_warehouse_film_record(
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     recorded_at = datetime.now(WARSAW_TZ)
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO warehouse_films (
-                article,
-                manufacturer,
-                series,
-                color_code,
-                color,
-                width,
-                length,
-                warehouse,
-                comment,
-                employee_id,
-                employee_nick,
-                recorded_at
-            )
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-            RETURNING
-                id,
-                article,
-                manufacturer,
-                series,
-                color_code,
-                color,
-                width,
-                length,
-                warehouse,
-                comment,
-                employee_id,
-                employee_nick,
-                recorded_at
-            """,
+    row = await db_pool.fetchrow(
+        """
+        INSERT INTO warehouse_films (
+            article,
+            manufacturer,
+            series,
+            color_code,
+            color,
+            width,
+            length,
+            warehouse,
+            comment,
+            employee_id,
+            employee_nick,
+            recorded_at
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+        RETURNING
+            id,
             article,
             manufacturer,
             series,
             color_code,
             color,
-            width_mm,
-            length_mm,
+            width,
+            length,
             warehouse,
             comment,
             employee_id,
             employee_nick,
-            recorded_at,
-        )
+            recorded_at
+        """,
+        article,
+        manufacturer,
+        series,
+        color_code,
+        color,
+        width_mm,
+        length_mm,
+        warehouse,
+        comment,
+        employee_id,
+        employee_nick,
+        recorded_at,
+    )
     if row is None:
         return {}
     return dict(row)
@@ -4732,114 +5096,110 @@ async def search_warehouse_plastic_records(query: str, limit: int = 5) -> list[D
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
     pattern = f"%{query}%"
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                id,
-                article,
-                material,
-                thickness,
-                color,
-                length,
-                width,
-                warehouse,
-                comment,
-                employee_name,
-                arrival_at
-            FROM warehouse_plastics
-            WHERE article ILIKE $1
-               OR material ILIKE $1
-               OR color ILIKE $1
-               OR warehouse ILIKE $1
-               OR comment ILIKE $1
-            ORDER BY arrival_at DESC NULLS LAST, id DESC
-            LIMIT $2
-            """,
-            pattern,
-            limit,
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT
+            id,
+            article,
+            material,
+            thickness,
+            color,
+            length,
+            width,
+            warehouse,
+            comment,
+            employee_name,
+            arrival_at
+        FROM warehouse_plastics
+        WHERE article ILIKE $1
+           OR material ILIKE $1
+           OR color ILIKE $1
+           OR warehouse ILIKE $1
+           OR comment ILIKE $1
+        ORDER BY arrival_at DESC NULLS LAST, id DESC
+        LIMIT $2
+        """,
+        pattern,
+        limit,
+    )
     return [dict(row) for row in rows]
 
 
 async def fetch_all_warehouse_plastics() -> list[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                id,
-                article,
-                material,
-                thickness,
-                color,
-                length,
-                width,
-                warehouse,
-                comment,
-                employee_name,
-                arrival_date,
-                arrival_at
-            FROM warehouse_plastics
-            ORDER BY arrival_at DESC NULLS LAST, id DESC
-            """
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT
+            id,
+            article,
+            material,
+            thickness,
+            color,
+            length,
+            width,
+            warehouse,
+            comment,
+            employee_name,
+            arrival_date,
+            arrival_at
+        FROM warehouse_plastics
+        ORDER BY arrival_at DESC NULLS LAST, id DESC
+        """
+    )
     return [dict(row) for row in rows]
 
 
 async def fetch_all_warehouse_films() -> list[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                id,
-                article,
-                manufacturer,
-                series,
-                color_code,
-                color,
-                width,
-                length,
-                warehouse,
-                comment,
-                employee_id,
-                employee_nick,
-                recorded_at
-            FROM warehouse_films
-            ORDER BY recorded_at DESC NULLS LAST, id DESC
-            """
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT
+            id,
+            article,
+            manufacturer,
+            series,
+            color_code,
+            color,
+            width,
+            length,
+            warehouse,
+            comment,
+            employee_id,
+            employee_nick,
+            recorded_at
+        FROM warehouse_films
+        ORDER BY recorded_at DESC NULLS LAST, id DESC
+        """
+    )
     return [dict(row) for row in rows]
 
 
 async def fetch_warehouse_plastic_by_article(article: str) -> Optional[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT
-                id,
-                article,
-                material,
-                thickness,
-                color,
-                length,
-                width,
-                warehouse,
-                comment,
-                employee_name,
-                arrival_at
-            FROM warehouse_plastics
-            WHERE article = $1
-            ORDER BY arrival_at DESC NULLS LAST, id DESC
-            LIMIT 1
-            """,
+    row = await db_pool.fetchrow(
+        """
+        SELECT
+            id,
             article,
-        )
+            material,
+            thickness,
+            color,
+            length,
+            width,
+            warehouse,
+            comment,
+            employee_name,
+            arrival_at
+        FROM warehouse_plastics
+        WHERE article = $1
+        ORDER BY arrival_at DESC NULLS LAST, id DESC
+        LIMIT 1
+        """,
+        article,
+    )
     if row is None:
         return None
     return dict(row)
@@ -4848,30 +5208,29 @@ async def fetch_warehouse_plastic_by_article(article: str) -> Optional[Dict[str,
 async def fetch_warehouse_film_by_article(article: str) -> Optional[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT
-                id,
-                article,
-                manufacturer,
-                series,
-                color_code,
-                color,
-                width,
-                length,
-                warehouse,
-                comment,
-                employee_id,
-                employee_nick,
-                recorded_at
-            FROM warehouse_films
-            WHERE article = $1
-            ORDER BY recorded_at DESC NULLS LAST, id DESC
-            LIMIT 1
-            """,
+    row = await db_pool.fetchrow(
+        """
+        SELECT
+            id,
             article,
-        )
+            manufacturer,
+            series,
+            color_code,
+            color,
+            width,
+            length,
+            warehouse,
+            comment,
+            employee_id,
+            employee_nick,
+            recorded_at
+        FROM warehouse_films
+        WHERE article = $1
+        ORDER BY recorded_at DESC NULLS LAST, id DESC
+        LIMIT 1
+        """,
+        article,
+    )
     if row is None:
         return None
     return dict(row)
@@ -4981,28 +5340,27 @@ async def write_off_warehouse_film(
 async def fetch_warehouse_film_by_id(record_id: int) -> Optional[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            SELECT
-                id,
-                article,
-                manufacturer,
-                series,
-                color_code,
-                color,
-                width,
-                length,
-                warehouse,
-                comment,
-                employee_id,
-                employee_nick,
-                recorded_at
-            FROM warehouse_films
-            WHERE id = $1
-            """,
-            record_id,
-        )
+    row = await db_pool.fetchrow(
+        """
+        SELECT
+            id,
+            article,
+            manufacturer,
+            series,
+            color_code,
+            color,
+            width,
+            length,
+            warehouse,
+            comment,
+            employee_id,
+            employee_nick,
+            recorded_at
+        FROM warehouse_films
+        WHERE id = $1
+        """,
+        record_id,
+    )
     if row is None:
         return None
     return dict(row)
@@ -5013,31 +5371,30 @@ async def search_warehouse_films_by_color_code(
 ) -> list[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                id,
-                article,
-                manufacturer,
-                series,
-                color_code,
-                color,
-                width,
-                length,
-                warehouse,
-                comment,
-                employee_id,
-                employee_nick,
-                recorded_at
-            FROM warehouse_films
-            WHERE color_code ILIKE '%' || $1 || '%'
-            ORDER BY recorded_at DESC NULLS LAST, id DESC
-            LIMIT $2
-            """,
+    rows = await db_pool.fetch(
+        """
+        SELECT
+            id,
+            article,
+            manufacturer,
+            series,
             color_code,
-            limit,
-        )
+            color,
+            width,
+            length,
+            warehouse,
+            comment,
+            employee_id,
+            employee_nick,
+            recorded_at
+        FROM warehouse_films
+        WHERE color_code ILIKE '%' || $1 || '%'
+        ORDER BY recorded_at DESC NULLS LAST, id DESC
+        LIMIT $2
+        """,
+        color_code,
+        limit,
+    )
     return [dict(row) for row in rows]
 
 
@@ -5046,31 +5403,30 @@ async def search_warehouse_films_by_color(
 ) -> list[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                id,
-                article,
-                manufacturer,
-                series,
-                color_code,
-                color,
-                width,
-                length,
-                warehouse,
-                comment,
-                employee_id,
-                employee_nick,
-                recorded_at
-            FROM warehouse_films
-            WHERE color ILIKE '%' || $1 || '%'
-            ORDER BY recorded_at DESC NULLS LAST, id DESC
-            LIMIT $2
-            """,
-            color_query,
-            limit,
-        )
+    rows = await db_pool.fetch(
+        """
+        SELECT
+            id,
+            article,
+            manufacturer,
+            series,
+            color_code,
+            color,
+            width,
+            length,
+            warehouse,
+            comment,
+            employee_id,
+            employee_nick,
+            recorded_at
+        FROM warehouse_films
+        WHERE color ILIKE '%' || $1 || '%'
+        ORDER BY recorded_at DESC NULLS LAST, id DESC
+        LIMIT $2
+        """,
+        color_query,
+        limit,
+    )
     return [dict(row) for row in rows]
 
 
@@ -5128,8 +5484,7 @@ async def search_warehouse_plastics_advanced(
         + where_clause
         + " ORDER BY length DESC NULLS LAST, width DESC NULLS LAST, arrival_at DESC NULLS LAST, id DESC"
     )
-    async with db_pool.acquire() as conn:
-        rows = await conn.fetch(query, *params)
+    rows = await db_pool.fetch(query, *params)
     return [dict(row) for row in rows]
 
 
@@ -5138,17 +5493,16 @@ async def update_warehouse_plastic_comment(
 ) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            """
-            UPDATE warehouse_plastics
-            SET comment = $2
-            WHERE id = $1
-            """,
-            record_id,
-            comment,
+    result = await db_pool.execute(
+        """
+        UPDATE warehouse_plastics
+        SET comment = $2
+        WHERE id = $1
+        """,
+        record_id,
+        comment,
     )
-    return result.endswith(" 1")
+    return _affected_rows(result) > 0
 
 
 async def update_warehouse_film_comment(
@@ -5156,17 +5510,16 @@ async def update_warehouse_film_comment(
 ) -> bool:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        result = await conn.execute(
-            """
-            UPDATE warehouse_films
-            SET comment = $2
-            WHERE id = $1
-            """,
-            record_id,
-            comment,
-        )
-    return result.endswith(" 1")
+    result = await db_pool.execute(
+        """
+        UPDATE warehouse_films
+        SET comment = $2
+        WHERE id = $1
+        """,
+        record_id,
+        comment,
+    )
+    return _affected_rows(result) > 0
 
 
 async def update_warehouse_film_location(
@@ -5177,34 +5530,33 @@ async def update_warehouse_film_location(
 ) -> Optional[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            UPDATE warehouse_films
-            SET warehouse = $2,
-                employee_id = COALESCE($3, employee_id),
-                employee_nick = COALESCE($4, employee_nick)
-            WHERE id = $1
-            RETURNING
-                id,
-                article,
-                manufacturer,
-                series,
-                color_code,
-                color,
-                width,
-                length,
-                warehouse,
-                comment,
-                employee_id,
-                employee_nick,
-                recorded_at
-            """,
-            record_id,
-            new_location,
+    row = await db_pool.fetchrow(
+        """
+        UPDATE warehouse_films
+        SET warehouse = $2,
+            employee_id = COALESCE($3, employee_id),
+            employee_nick = COALESCE($4, employee_nick)
+        WHERE id = $1
+        RETURNING
+            id,
+            article,
+            manufacturer,
+            series,
+            color_code,
+            color,
+            width,
+            length,
+            warehouse,
+            comment,
             employee_id,
             employee_nick,
-        )
+            recorded_at
+        """,
+        record_id,
+        new_location,
+        employee_id,
+        employee_nick,
+    )
     if row is None:
         return None
     return dict(row)
@@ -5218,32 +5570,31 @@ async def update_warehouse_plastic_location(
 ) -> Optional[Dict[str, Any]]:
     if db_pool is None:
         raise RuntimeError("Database pool is not initialised")
-    async with db_pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            UPDATE warehouse_plastics
-            SET warehouse = $2,
-                employee_id = COALESCE($3, employee_id),
-                employee_name = COALESCE($4, employee_name)
-            WHERE id = $1
-            RETURNING
-                id,
-                article,
-                material,
-                thickness,
-                color,
-                length,
-                width,
-                warehouse,
-                comment,
-                employee_name,
-                arrival_at
-            """,
-            record_id,
-            new_location,
-            employee_id,
+    row = await db_pool.fetchrow(
+        """
+        UPDATE warehouse_plastics
+        SET warehouse = $2,
+            employee_id = COALESCE($3, employee_id),
+            employee_name = COALESCE($4, employee_name)
+        WHERE id = $1
+        RETURNING
+            id,
+            article,
+            material,
+            thickness,
+            color,
+            length,
+            width,
+            warehouse,
+            comment,
             employee_name,
-        )
+            arrival_at
+        """,
+        record_id,
+        new_location,
+        employee_id,
+        employee_name,
+    )
     if row is None:
         return None
     return dict(row)
@@ -5353,19 +5704,19 @@ async def write_off_warehouse_plastic(
 def format_materials_list(materials: list[str]) -> str:
     if not materials:
         return "—"
-    return "\n".join(f"• {item}" for item in materials)
+    return "\n".join([f"• {item}" for item in materials])
 
 
 def format_order_types_list(order_types: list[str]) -> str:
     if not order_types:
         return "—"
-    return "\n".join(f"• {name}" for name in order_types)
+    return "\n".join([f"• {name}" for name in order_types])
 
 
 def format_task_types_list(task_types: list[str]) -> str:
     if not task_types:
         return "—"
-    return "\n".join(f"• {name}" for name in task_types)
+    return "\n".join([f"• {name}" for name in task_types])
 
 
 def _format_task_assignee_options(options: list[Dict[str, Any]]) -> str:
@@ -5489,31 +5840,31 @@ def format_user_record_for_message(record: Dict[str, Any], index: int) -> str:
     )
 
 
-def split_text_into_messages(text: str, limit: int = 4000) -> list[str]:
-    if len(text) <= limit:
-        return [text]
-    parts = text.split("\n\n")
+def pack_message_parts(parts: Iterable[str], limit: int = 4000) -> list[str]:
+    # Части складываются в сообщения по мере поступления, без сборки общего
+    # текста и повторного копирования уже набранной части сообщения.
     chunks: list[str] = []
-    current = ""
+    current: list[str] = []
+    size = 0
     for part in parts:
-        candidate = part if not current else f"{current}\n\n{part}"
-        if len(candidate) <= limit:
-            current = candidate
+        added = len(part) + 2 if current else len(part)
+        if size + added <= limit:
+            current.append(part)
+            size += added
             continue
         if current:
-            chunks.append(current)
+            chunks.append("\n\n".join(current))
         if len(part) > limit:
-            for start in range(0, len(part), limit):
-                chunks.append(part[start : start + limit])
-            current = ""
+            chunks.extend(part[start : start + limit] for start in range(0, len(part), limit))
+            current, size = [], 0
         else:
-            current = part
+            current, size = [part], len(part)
     if current:
-        chunks.append(current)
+        chunks.append("\n\n".join(current))
     return chunks
 
 
-def format_thickness_value(thickness: Decimal) -> str:
+def format_thickness_value(thickness: Decimal | float) -> str:
     as_str = format(thickness, "f").rstrip("0").rstrip(".")
     if not as_str:
         as_str = "0"
@@ -5529,10 +5880,10 @@ def format_dimension_value(value: Optional[Decimal]) -> str:
     return f"{as_str} мм"
 
 
-def format_thicknesses_list(thicknesses: list[Decimal]) -> str:
+def format_thicknesses_list(thicknesses: list[Decimal] | list[float]) -> str:
     if not thicknesses:
         return "—"
-    return ", ".join(format_thickness_value(value) for value in thicknesses)
+    return ", ".join([format_thickness_value(value) for value in thicknesses])
 
 
 def format_colors_list(colors: list[str]) -> str:
@@ -5550,7 +5901,7 @@ def format_series_list(series: list[str]) -> str:
 def format_storage_locations_list(locations: list[str]) -> str:
     if not locations:
         return "—"
-    return "\n".join(f"• {item}" for item in locations)
+    return "\n".join([f"• {item}" for item in locations])
 
 
 def format_power_supply_record_for_message(record: Dict[str, Any]) -> str:
@@ -5574,11 +5925,36 @@ def format_power_supply_records_list_for_message(
     return "\n".join(format_power_supply_record_for_message(record) for record in records)
 
 
-def build_plastics_export_file(records: list[Dict[str, Any]]) -> BufferedInputFile:
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Plastics"
+# Сборка и сохранение книги openpyxl — чисто синхронная работа, поэтому
+# экспорт выполняется в отдельном потоке, не останавливая цикл событий.
+# Книга пишется в режиме write_only: строки сразу уходят в XML, а не
+# хранятся объектами ячеек. Ширина колонок задаётся до записи строк,
+# поэтому считается заранее по значениям.
+def _build_export_file(
+    title: str, headers: list[str], rows: list[list[Any]], filename_prefix: str
+) -> BufferedInputFile:
+    widths = [0] * len(headers)
+    for row in (headers, *rows):
+        for index, value in enumerate(row):
+            if value is not None:
+                widths[index] = max(widths[index], len(str(value)))
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    for column_index, max_length in enumerate(widths, start=1):
+        adjusted_width = min(max(12, max_length + 2), 40)
+        sheet.column_dimensions[get_column_letter(column_index)].width = adjusted_width
+    for row in (headers, *rows):
+        sheet.append(row)
+
+    buffer = BytesIO()
+    workbook.save(buffer)
+    timestamp = datetime.now(WARSAW_TZ).strftime("%Y%m%d_%H%M%S")
+    filename = f"{filename_prefix}_{timestamp}.xlsx"
+    return BufferedInputFile(buffer.getvalue(), filename=filename)
 
+
+def build_plastics_export_file(records: list[Dict[str, Any]]) -> BufferedInputFile:
     headers = [
         "Артикул",
         "Материал",
@@ -5592,50 +5968,31 @@ def build_plastics_export_file(records: list[Dict[str, Any]]) -> BufferedInputFi
         "Дата прибытия",
         "Дата и время прибытия",
     ]
-    sheet.append(headers)
 
+    rows = []
     for record in records:
         arrival_at: Optional[datetime] = record.get("arrival_at")
         arrival_date: Optional[date] = record.get("arrival_date")
-        row = [
-            record.get("article"),
-            record.get("material"),
-            _decimal_to_excel_number(record.get("thickness")),
-            record.get("color"),
-            _decimal_to_excel_number(record.get("length")),
-            _decimal_to_excel_number(record.get("width")),
-            record.get("warehouse"),
-            record.get("comment"),
-            record.get("employee_name"),
-            _format_date_for_excel(arrival_date, arrival_at),
-            _format_datetime_for_excel(arrival_at),
-        ]
-        sheet.append(row)
-
-    for column_index, column_cells in enumerate(sheet.columns, start=1):
-        max_length = 0
-        for cell in column_cells:
-            value = cell.value
-            if value is None:
-                continue
-            max_length = max(max_length, len(str(value)))
-        adjusted_width = min(max(12, max_length + 2), 40)
-        column_letter = get_column_letter(column_index)
-        sheet.column_dimensions[column_letter].width = adjusted_width
-
-    buffer = BytesIO()
-    workbook.save(buffer)
-    buffer.seek(0)
-    timestamp = datetime.now(WARSAW_TZ).strftime("%Y%m%d_%H%M%S")
-    filename = f"plastics_export_{timestamp}.xlsx"
-    return BufferedInputFile(buffer.getvalue(), filename=filename)
+        rows.append(
+            [
+                record.get("article"),
+                record.get("material"),
+                _decimal_to_excel_number(record.get("thickness")),
+                record.get("color"),
+                _decimal_to_excel_number(record.get("length")),
+                _decimal_to_excel_number(record.get("width")),
+                record.get("warehouse"),
+                record.get("comment"),
+                record.get("employee_name"),
+                _format_date_for_excel(arrival_date, arrival_at),
+                _format_datetime_for_excel(arrival_at),
+            ]
+        )
 
+    return _build_export_file("Plastics", headers, rows, "plastics_export")
 
-def build_films_export_file(records: list[Dict[str, Any]]) -> BufferedInputFile:
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Films"
 
+def build_films_export_file(records: list[Dict[str, Any]]) -> BufferedInputFile:
     headers = [
         "Артикул",
         "Производитель",
@@ -5650,10 +6007,9 @@ def build_films_export_file(records: list[Dict[str, Any]]) -> BufferedInputFile:
         "ID сотрудника",
         "Дата и время записи",
     ]
-    sheet.append(headers)
 
-    for record in records:
-        row = [
+    rows = [
+        [
             record.get("article"),
             record.get("manufacturer"),
             record.get("series"),
@@ -5667,25 +6023,10 @@ def build_films_export_file(records: list[Dict[str, Any]]) -> BufferedInputFile:
             record.get("employee_id"),
             _format_datetime_for_excel(record.get("recorded_at")),
         ]
-        sheet.append(row)
-
-    for column_index, column_cells in enumerate(sheet.columns, start=1):
-        max_length = 0
-        for cell in column_cells:
-            value = cell.value
-            if value is None:
-                continue
-            max_length = max(max_length, len(str(value)))
-        adjusted_width = min(max(12, max_length + 2), 40)
-        column_letter = get_column_letter(column_index)
-        sheet.column_dimensions[column_letter].width = adjusted_width
+        for record in records
+    ]
 
-    buffer = BytesIO()
-    workbook.save(buffer)
-    buffer.seek(0)
-    timestamp = datetime.now(WARSAW_TZ).strftime("%Y%m%d_%H%M%S")
-    filename = f"films_export_{timestamp}.xlsx"
-    return BufferedInputFile(buffer.getvalue(), filename=filename)
+    return _build_export_file("Films", headers, rows, "films_export")
 
 
 def format_plastic_record_for_message(record: Dict[str, Any]) -> str:
@@ -5798,24 +6139,32 @@ def format_written_off_plastic_record(record: Dict[str, Any]) -> str:
     )
 
 
+THICKNESS_QUANTUM = Decimal("0.01")
+
+
 def parse_thickness_input(raw_text: str) -> Optional[Decimal]:
     if raw_text is None:
         return None
-    cleaned = raw_text.strip().lower()
-    for suffix in ("мм", "mm"):
-        if cleaned.endswith(suffix):
-            cleaned = cleaned[: -len(suffix)]
-            break
-    cleaned = cleaned.replace(" ", "").replace(",", ".")
-    if not cleaned:
-        return None
-    try:
-        value = Decimal(cleaned)
-    except (InvalidOperation, ValueError):
-        return None
+    # Обычно приходит уже чистое число вроде "3" или "3.5" — его можно
+    # разобрать сразу, без нормализации суффиксов и разделителей.
+    if raw_text.isascii() and raw_text.replace(".", "", 1).isdigit():
+        value = Decimal(raw_text)
+    else:
+        cleaned = raw_text.strip().lower()
+        for suffix in ("мм", "mm"):
+            if cleaned.endswith(suffix):
+                cleaned = cleaned[: -len(suffix)]
+                break
+        cleaned = cleaned.replace(" ", "").replace(",", ".")
+        if not cleaned:
+            return None
+        try:
+            value = Decimal(cleaned)
+        except (InvalidOperation, ValueError):
+            return None
     if value <= 0:
         return None
-    return value.quantize(Decimal("0.01"))
+    return value.quantize(THICKNESS_QUANTUM)
 
 
 def parse_dimension_filter_value(raw_text: str) -> Optional[Decimal]:
@@ -5870,14 +6219,22 @@ def parse_positive_integer(raw_text: str) -> Optional[int]:
     return value
 
 
-def build_materials_keyboard(materials: list[str]) -> ReplyKeyboardMarkup:
+# Клавиатуры выбора материала, толщины и цвета строятся на каждый шаг
+# сценария из одних и тех же списков, поэтому готовая разметка
+# запоминается по кортежу подписей кнопок.
+@lru_cache(maxsize=128)
+def _build_choice_keyboard(texts: tuple[str, ...]) -> ReplyKeyboardMarkup:
     rows: list[list[KeyboardButton]] = []
-    for name in materials:
-        rows.append([KeyboardButton(text=name)])
+    for text in texts:
+        rows.append([KeyboardButton(text=text)])
     rows.append([KeyboardButton(text=CANCEL_TEXT)])
     return ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
 
 
+def build_materials_keyboard(materials: list[str]) -> ReplyKeyboardMarkup:
+    return _build_choice_keyboard(tuple(materials))
+
+
 def build_manufacturers_keyboard(manufacturers: list[str]) -> ReplyKeyboardMarkup:
     rows: list[list[KeyboardButton]] = []
     for name in manufacturers:
@@ -5963,20 +6320,16 @@ def build_power_supply_overview_lines(
     return lines
 
 
-def build_thickness_keyboard(thicknesses: list[Decimal]) -> ReplyKeyboardMarkup:
-    rows: list[list[KeyboardButton]] = []
-    for value in thicknesses:
-        rows.append([KeyboardButton(text=format_thickness_value(value))])
-    rows.append([KeyboardButton(text=CANCEL_TEXT)])
-    return ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+def build_thickness_keyboard(
+    thicknesses: list[Decimal] | list[float]
+) -> ReplyKeyboardMarkup:
+    return _build_choice_keyboard(
+        tuple([format_thickness_value(value) for value in thicknesses])
+    )
 
 
 def build_colors_keyboard(colors: list[str]) -> ReplyKeyboardMarkup:
-    rows: list[list[KeyboardButton]] = []
-    for value in colors:
-        rows.append([KeyboardButton(text=value)])
-    rows.append([KeyboardButton(text=CANCEL_TEXT)])
-    return ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+    return _build_choice_keyboard(tuple(colors))
 
 
 def build_advanced_materials_keyboard(materials: list[str]) -> ReplyKeyboardMarkup:
@@ -6015,9 +6368,14 @@ def build_storage_locations_keyboard(locations: list[str]) -> ReplyKeyboardMarku
 
 
 # === Сервисные функции ===
-async def send_plastic_settings_overview(message: Message) -> None:
+async def build_plastic_materials_overview() -> str:
+    # Текст списка материалов меняется только вместе со справочником,
+    # поэтому хранится в том же кэше и сбрасывается вместе с ним.
+    cached = _MATERIALS_CACHE.get("overview")
+    if cached is not None:
+        return cached
+    version = _MATERIALS_VERSION
     materials = await fetch_materials_with_thicknesses()
-    storage_locations = await fetch_plastic_storage_locations()
     if materials:
         lines = []
         for material in materials:
@@ -6046,8 +6404,22 @@ async def send_plastic_settings_overview(message: Message) -> None:
             "⚙️ Настройки склада → Пластик.\n\n"
             "Материалы ещё не добавлены. Используйте кнопки ниже."
         )
+    if version == _MATERIALS_VERSION:
+        _MATERIALS_CACHE["overview"] = text
+    return text
+
+
+async def send_plastic_settings_overview(
+    message: Message, status: Optional[str] = None
+) -> None:
+    # Итог действия (добавлено/удалено) уходит тем же сообщением, что и
+    # обзор, чтобы не тратить на него отдельный запрос к Telegram.
+    text = await build_plastic_materials_overview()
+    storage_locations = await fetch_plastic_storage_locations()
     storage_text = format_storage_locations_list(storage_locations)
     text = f"{text}\n\nМеста хранения:\n{storage_text}"
+    if status:
+        text = f"{status}\n\n{text}"
     await message.answer(text, reply_markup=WAREHOUSE_SETTINGS_PLASTIC_KB)
 
 
@@ -6695,22 +7067,19 @@ async def send_power_supplies_settings_overview(message: Message) -> None:
 # === Команды ===
 @dp.message(CommandStart())
 async def handle_start(message: Message) -> None:
-    await message.answer("👋 Привет! Выберите действие:", reply_markup=MAIN_MENU_KB)
+    await answer_prepared(message, START_REPLY)
 
 
 @dp.message(Command("settings"))
-@dp.message(F.text == "⚙️ Настройки")
-async def handle_settings(message: Message) -> None:
-    if not await ensure_admin_access(message):
+@menu_button("⚙️ Настройки")
+async def handle_settings(message: Message, is_admin: Optional[bool] = None) -> None:
+    if not await ensure_admin_access(message, is_admin=is_admin):
         return
     await message.answer("⚙️ Настройки. Выберите действие:", reply_markup=SETTINGS_MENU_KB)
 
 
-@dp.message(F.text == "🔄 Перезагрузить")
+@menu_button("🔄 Перезагрузить", admin_only=True)
 async def handle_restart(message: Message) -> None:
-    if not await ensure_admin_access(message):
-        return
-
     if not UPDATE_SCRIPT_PATH.exists():
         await message.answer(
             "⚠️ Файл update.sh не найден на сервере.", reply_markup=SETTINGS_MENU_KB
@@ -6740,37 +7109,34 @@ async def handle_restart(message: Message) -> None:
     )
 
 
-@dp.message(F.text == "⚙️ Настройки склада")
+@menu_button("⚙️ Настройки склада", admin_only=True)
 async def handle_warehouse_settings(message: Message) -> None:
-    if not await ensure_admin_access(message):
-        return
     await message.answer("⚙️ Настройки склада. Выберите действие:", reply_markup=WAREHOUSE_SETTINGS_MENU_KB)
 
 
-@dp.message(F.text == "👥 Пользователи")
+@menu_button("👥 Пользователи", admin_only=True)
 async def handle_users_menu(message: Message) -> None:
-    if not await ensure_admin_access(message):
-        return
     await message.answer("👥 Пользователи. Выберите действие:", reply_markup=USERS_MENU_KB)
 
 
-@dp.message(F.text == "📋 Посмотреть всех пользователей")
+@menu_button("📋 Посмотреть всех пользователей", admin_only=True)
 async def handle_list_all_users(message: Message) -> None:
-    if not await ensure_admin_access(message):
-        return
     users = await fetch_all_users_from_db()
     if not users:
         await message.answer(
             "ℹ️ В базе пока нет пользователей.", reply_markup=USERS_MENU_KB
         )
         return
-    formatted_records = [
-        format_user_record_for_message(record, index)
-        for index, record in enumerate(users, start=1)
-    ]
     header = f"📋 Всего пользователей: {len(users)}"
-    full_text = f"{header}\n\n" + "\n\n".join(formatted_records)
-    chunks = split_text_into_messages(full_text)
+    chunks = pack_message_parts(
+        [
+            header,
+            *(
+                format_user_record_for_message(record, index)
+                for index, record in enumerate(users, start=1)
+            ),
+        ]
+    )
     for idx, chunk in enumerate(chunks):
         if idx == 0:
             await message.answer(chunk, reply_markup=USERS_MENU_KB)
@@ -6778,10 +7144,8 @@ async def handle_list_all_users(message: Message) -> None:
             await message.answer(chunk)
 
 
-@dp.message(F.text == "➕ Добавить пользователя")
+@menu_button("➕ Добавить пользователя", admin_only=True)
 async def handle_add_user_button(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await state.set_state(AddUserStates.waiting_for_tg_id)
     await message.answer(
@@ -6791,12 +7155,13 @@ async def handle_add_user_button(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddUserStates.waiting_for_tg_id)
-async def process_add_user_tg_id(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_user_tg_id(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_user_flow(message, state)
         return
-    if not text.isdigit():
+    # isdigit() принимает и надстрочные цифры вроде «²», которые int() не
+    # разбирает, поэтому строка дополнительно проверяется на ASCII.
+    if not (text.isascii() and text.isdigit()):
         await message.answer(
             "⚠️ Telegram ID должен содержать только цифры. Попробуйте снова.",
             reply_markup=CANCEL_KB,
@@ -6811,8 +7176,7 @@ async def process_add_user_tg_id(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddUserStates.waiting_for_username)
-async def process_add_user_username(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_user_username(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_user_flow(message, state)
         return
@@ -6831,8 +7195,7 @@ async def process_add_user_username(message: Message, state: FSMContext) -> None
 
 
 @dp.message(AddUserStates.waiting_for_position)
-async def process_add_user_position(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_user_position(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_user_flow(message, state)
         return
@@ -6851,8 +7214,7 @@ async def process_add_user_position(message: Message, state: FSMContext) -> None
 
 
 @dp.message(AddUserStates.waiting_for_role)
-async def process_add_user_role(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_user_role(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_user_flow(message, state)
         return
@@ -6873,8 +7235,7 @@ async def process_add_user_role(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddUserStates.waiting_for_created_at)
-async def process_add_user_created_at(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_user_created_at(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_user_flow(message, state)
         return
@@ -6943,19 +7304,19 @@ async def process_add_user_created_at(message: Message, state: FSMContext) -> No
     )
 
 
-@dp.message(F.text == "⬅️ Главное меню")
+@menu_button("⬅️ Главное меню")
 async def handle_back_to_main(message: Message) -> None:
-    await message.answer("Главное меню.", reply_markup=MAIN_MENU_KB)
+    await answer_prepared(message, BACK_TO_MAIN_REPLY)
 
 
-@dp.message(F.text == "Задачи")
+@menu_button("Задачи")
 async def handle_tasks_section(message: Message) -> None:
     await message.answer(
         "🧠 Раздел «Задачи». Выберите действие:", reply_markup=TASKS_MENU_KB
     )
 
 
-@dp.message(F.text == TASKS_CREATE_TASK_TEXT)
+@menu_button(TASKS_CREATE_TASK_TEXT)
 async def handle_tasks_create(message: Message, state: FSMContext) -> None:
     await state.clear()
     try:
@@ -7020,7 +7381,7 @@ async def handle_tasks_create(message: Message, state: FSMContext) -> None:
     await message.answer("\n".join(prompt_lines), reply_markup=CANCEL_KB)
 
 
-@dp.message(F.text == TASKS_VIEW_TASKS_TEXT)
+@menu_button(TASKS_VIEW_TASKS_TEXT)
 async def handle_tasks_view(message: Message) -> None:
     try:
         tasks = await fetch_tasks_overview()
@@ -7037,8 +7398,7 @@ async def handle_tasks_view(message: Message) -> None:
 
 
 @dp.message(CreateTaskStates.waiting_for_task_type)
-async def process_task_type_selection(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_task_type_selection(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_create_task_flow(message, state)
         return
@@ -7205,8 +7565,7 @@ async def process_task_assignee(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(CreateTaskStates.waiting_for_due_date)
-async def process_task_due_date(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_task_due_date(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_create_task_flow(message, state)
         return
@@ -7262,7 +7621,7 @@ async def process_task_due_date(message: Message, state: FSMContext) -> None:
     await _notify_task_assignee_about_new_task(message, task_row)
 
 
-@dp.message(F.text == TASKS_SETTINGS_TEXT)
+@menu_button(TASKS_SETTINGS_TEXT)
 async def handle_tasks_settings(message: Message) -> None:
     await message.answer(
         "⚙️ Настройки задач. Выберите нужный раздел:",
@@ -7270,7 +7629,7 @@ async def handle_tasks_settings(message: Message) -> None:
     )
 
 
-@dp.message(F.text == TASKS_SETTINGS_BACK_TEXT)
+@menu_button(TASKS_SETTINGS_BACK_TEXT)
 async def handle_tasks_settings_back(message: Message) -> None:
     await message.answer(
         "🧠 Раздел «Задачи». Выберите действие:",
@@ -7300,15 +7659,13 @@ async def send_task_type_settings_overview(message: Message) -> None:
     await message.answer("\n".join(lines), reply_markup=TASK_TYPES_MENU_KB)
 
 
-@dp.message(F.text == TASKS_SETTINGS_TASK_TYPES_TEXT)
+@menu_button(TASKS_SETTINGS_TASK_TYPES_TEXT, admin_only=True)
 async def handle_task_types_folder(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_task_type_settings_overview(message)
 
 
-@dp.message(F.text == TASK_TYPES_BACK_TEXT)
+@menu_button(TASK_TYPES_BACK_TEXT)
 async def handle_task_types_back(message: Message) -> None:
     await message.answer(
         "⚙️ Настройки задач. Выберите нужный раздел:",
@@ -7316,10 +7673,8 @@ async def handle_task_types_back(message: Message) -> None:
     )
 
 
-@dp.message(F.text == TASK_TYPES_ADD_TEXT)
+@menu_button(TASK_TYPES_ADD_TEXT, admin_only=True)
 async def handle_task_type_add(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageTaskTypeStates.waiting_for_new_type_name)
     task_types = await fetch_task_types()
     prompt_lines = ["Введите название нового вида задачи."]
@@ -7341,10 +7696,8 @@ async def handle_task_type_add(message: Message, state: FSMContext) -> None:
     await message.answer("\n".join(prompt_lines), reply_markup=CANCEL_KB)
 
 
-@dp.message(F.text == TASK_TYPES_DELETE_TEXT)
+@menu_button(TASK_TYPES_DELETE_TEXT, admin_only=True)
 async def handle_task_type_delete(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     task_types = await fetch_task_types()
     if not task_types:
         await message.answer(
@@ -7370,14 +7723,14 @@ async def handle_task_type_delete(message: Message, state: FSMContext) -> None:
     await message.answer(prompt, reply_markup=CANCEL_KB)
 
 
-@dp.message(F.text == "Клиенты")
+@menu_button("Клиенты")
 async def handle_clients_section(message: Message) -> None:
     await message.answer(
         "👥 Раздел «Клиенты». Выберите действие:", reply_markup=CLIENTS_MENU_KB
     )
 
 
-@dp.message(F.text == CLIENTS_ADD_CLIENT_TEXT)
+@menu_button(CLIENTS_ADD_CLIENT_TEXT)
 async def handle_clients_add(message: Message, state: FSMContext) -> None:
     await state.clear()
     await state.set_state(AddClientStates.waiting_for_name)
@@ -7387,7 +7740,7 @@ async def handle_clients_add(message: Message, state: FSMContext) -> None:
     )
 
 
-@dp.message(F.text == CLIENTS_SEARCH_CLIENT_TEXT)
+@menu_button(CLIENTS_SEARCH_CLIENT_TEXT)
 async def handle_clients_search(message: Message, state: FSMContext) -> None:
     await state.clear()
     await state.set_state(SearchClientStates.waiting_for_query)
@@ -7398,8 +7751,7 @@ async def handle_clients_search(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddClientStates.waiting_for_name)
-async def process_add_client_name(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_client_name(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_client_flow(message, state)
         return
@@ -7418,8 +7770,7 @@ async def process_add_client_name(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddClientStates.waiting_for_phone)
-async def process_add_client_phone(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_client_phone(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_client_flow(message, state)
         return
@@ -7437,8 +7788,7 @@ async def process_add_client_phone(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddClientStates.waiting_for_contact_person)
-async def process_add_client_contact_person(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_client_contact_person(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_client_flow(message, state)
         return
@@ -7456,8 +7806,7 @@ async def process_add_client_contact_person(message: Message, state: FSMContext)
 
 
 @dp.message(AddClientStates.waiting_for_address)
-async def process_add_client_address(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_client_address(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_client_flow(message, state)
         return
@@ -7475,8 +7824,7 @@ async def process_add_client_address(message: Message, state: FSMContext) -> Non
 
 
 @dp.message(AddClientStates.waiting_for_map_link)
-async def process_add_client_map_link(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_client_map_link(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_client_flow(message, state)
         return
@@ -7536,8 +7884,7 @@ async def process_add_client_map_link(message: Message, state: FSMContext) -> No
 
 
 @dp.message(SearchClientStates.waiting_for_query)
-async def process_clients_search_query(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_clients_search_query(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_client_flow(message, state)
         return
@@ -7596,7 +7943,7 @@ async def process_clients_search_query(message: Message, state: FSMContext) -> N
     await message.answer(response_text, reply_markup=CLIENTS_MENU_KB)
 
 
-@dp.message(F.text == "Заказы")
+@menu_button("Заказы")
 async def handle_orders_section(message: Message) -> None:
     await message.answer(
         "🧾 Раздел «Заказы». Выберите действие:", reply_markup=ORDERS_MENU_KB
@@ -7888,7 +8235,7 @@ async def _send_client_search_prompt(
     )
 
 
-@dp.message(F.text == ORDERS_IN_PROGRESS_TEXT)
+@menu_button(ORDERS_IN_PROGRESS_TEXT)
 async def handle_orders_in_progress(message: Message) -> None:
     try:
         orders = await fetch_all_orders()
@@ -7904,7 +8251,7 @@ async def handle_orders_in_progress(message: Message) -> None:
     await message.answer(overview_text, reply_markup=ORDERS_MENU_KB)
 
 
-@dp.message(F.text == ORDERS_NEW_ORDER_TEXT)
+@menu_button(ORDERS_NEW_ORDER_TEXT)
 async def handle_orders_new_order(message: Message, state: FSMContext) -> None:
     await state.clear()
     order_types = await fetch_order_types()
@@ -7927,8 +8274,7 @@ async def handle_orders_new_order(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(CreateOrderStates.waiting_for_client_query)
-async def process_order_client_query(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_order_client_query(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_create_order_flow(message, state)
         return
@@ -7942,8 +8288,7 @@ async def process_order_client_query(message: Message, state: FSMContext) -> Non
 
 
 @dp.message(CreateOrderStates.waiting_for_client_selection)
-async def process_order_client_selection(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_order_client_selection(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_create_order_flow(message, state)
         return
@@ -7981,8 +8326,7 @@ async def process_order_client_selection(message: Message, state: FSMContext) ->
 
 
 @dp.message(CreateOrderStates.waiting_for_order_name)
-async def process_order_name(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_order_name(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_create_order_flow(message, state)
         return
@@ -8015,8 +8359,7 @@ async def process_order_name(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(CreateOrderStates.waiting_for_order_type)
-async def process_order_type(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_order_type(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_create_order_flow(message, state)
         return
@@ -8065,8 +8408,7 @@ async def process_order_type(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(CreateOrderStates.waiting_for_folder_path)
-async def process_order_folder_path(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_order_folder_path(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_create_order_flow(message, state)
         return
@@ -8085,8 +8427,7 @@ async def process_order_folder_path(message: Message, state: FSMContext) -> None
 
 
 @dp.message(CreateOrderStates.waiting_for_due_date)
-async def process_order_due_date(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_order_due_date(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_create_order_flow(message, state)
         return
@@ -8169,7 +8510,7 @@ async def process_order_urgency(message: Message, state: FSMContext) -> None:
     await message.answer(summary, reply_markup=ORDERS_MENU_KB)
 
 
-@dp.message(F.text == ORDERS_SETTINGS_TEXT)
+@menu_button(ORDERS_SETTINGS_TEXT)
 async def handle_orders_settings(message: Message) -> None:
     await message.answer(
         "⚙️ Настройки заказов. Выберите категорию:",
@@ -8199,15 +8540,13 @@ async def send_order_type_settings_overview(message: Message) -> None:
     await message.answer("\n".join(lines), reply_markup=ORDERS_ORDER_TYPE_KB)
 
 
-@dp.message(F.text == ORDERS_SETTINGS_ORDER_TYPE_TEXT)
+@menu_button(ORDERS_SETTINGS_ORDER_TYPE_TEXT)
 async def handle_orders_settings_order_type(message: Message) -> None:
     await send_order_type_settings_overview(message)
 
 
-@dp.message(F.text == ORDER_TYPE_ADD_TEXT)
+@menu_button(ORDER_TYPE_ADD_TEXT, admin_only=True)
 async def handle_order_type_add(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageOrderTypeStates.waiting_for_new_type_name)
     order_types = await fetch_order_types()
     prompt_lines = ["Введите название нового типа заказа."]
@@ -8229,10 +8568,8 @@ async def handle_order_type_add(message: Message, state: FSMContext) -> None:
     await message.answer("\n".join(prompt_lines), reply_markup=CANCEL_KB)
 
 
-@dp.message(F.text == ORDER_TYPE_DELETE_TEXT)
+@menu_button(ORDER_TYPE_DELETE_TEXT, admin_only=True)
 async def handle_order_type_delete(message: Message) -> None:
-    if not await ensure_admin_access(message):
-        return
     await message.answer(
         "➖ Удаление типов заказов находится в разработке.",
         reply_markup=ORDERS_ORDER_TYPE_KB,
@@ -8240,12 +8577,10 @@ async def handle_order_type_delete(message: Message) -> None:
 
 
 @dp.message(ManageOrderTypeStates.waiting_for_new_type_name)
-async def process_new_order_type(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+async def process_new_order_type(message: Message, state: FSMContext, text: str) -> None:
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await insert_order_type(name):
         await message.answer(f"✅ Тип заказа «{name}» добавлен.")
@@ -8256,12 +8591,10 @@ async def process_new_order_type(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(ManageTaskTypeStates.waiting_for_new_type_name)
-async def process_new_task_type(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+async def process_new_task_type(message: Message, state: FSMContext, text: str) -> None:
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await insert_task_type(name):
         await message.answer(f"✅ Вид задачи «{name}» добавлен.")
@@ -8272,10 +8605,7 @@ async def process_new_task_type(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(ManageTaskTypeStates.waiting_for_type_to_delete)
-async def process_task_type_deletion(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    text = (message.text or "").strip()
+async def process_task_type_deletion(message: Message, state: FSMContext, text: str) -> None:
     if not text:
         await message.answer(
             "⚠️ Не удалось распознать ответ. Укажите номер или название вида задачи.",
@@ -8310,7 +8640,7 @@ async def process_task_type_deletion(message: Message, state: FSMContext) -> Non
     await send_task_type_settings_overview(message)
 
 
-@dp.message(F.text == ORDER_TYPE_BACK_TEXT)
+@menu_button(ORDER_TYPE_BACK_TEXT)
 async def handle_back_to_orders_settings(message: Message) -> None:
     await message.answer(
         "⚙️ Настройки заказов. Выберите категорию:",
@@ -8318,7 +8648,7 @@ async def handle_back_to_orders_settings(message: Message) -> None:
     )
 
 
-@dp.message(F.text == ORDERS_SETTINGS_BACK_TEXT)
+@menu_button(ORDERS_SETTINGS_BACK_TEXT)
 async def handle_back_to_orders(message: Message) -> None:
     await message.answer(
         "🧾 Раздел «Заказы». Выберите действие:",
@@ -8326,31 +8656,29 @@ async def handle_back_to_orders(message: Message) -> None:
     )
 
 
-@dp.message(F.text == "⬅️ Назад в настройки")
+@menu_button("⬅️ Назад в настройки", admin_only=True)
 async def handle_back_to_settings(message: Message) -> None:
-    if not await ensure_admin_access(message):
-        return
     await handle_settings(message)
 
 
-@dp.message(F.text == "⬅️ Назад к складу")
+@menu_button("⬅️ Назад к складу")
 async def handle_back_to_warehouse(message: Message, state: FSMContext) -> None:
     await state.clear()
     await handle_warehouse_menu(message)
 
 
 # === Склад ===
-@dp.message(F.text == "🏢 Склад")
+@menu_button("🏢 Склад")
 async def handle_warehouse_menu(message: Message) -> None:
     await message.answer("🏢 Склад. Выберите раздел:", reply_markup=WAREHOUSE_MENU_KB)
 
 
-@dp.message(F.text == "🧱 Пластики")
+@menu_button("🧱 Пластики")
 async def handle_warehouse_plastics(message: Message) -> None:
     await message.answer("📦 Раздел «Пластики». Выберите действие:", reply_markup=WAREHOUSE_PLASTICS_KB)
 
 
-@dp.message(F.text == "🎞️ Пленки")
+@menu_button("🎞️ Пленки")
 async def handle_warehouse_films(message: Message, state: FSMContext) -> None:
     await state.clear()
     await message.answer(
@@ -8359,7 +8687,7 @@ async def handle_warehouse_films(message: Message, state: FSMContext) -> None:
     )
 
 
-@dp.message(F.text == WAREHOUSE_ELECTRICS_TEXT)
+@menu_button(WAREHOUSE_ELECTRICS_TEXT)
 async def handle_warehouse_electrics(message: Message, state: FSMContext) -> None:
     await state.clear()
     await message.answer(
@@ -8368,7 +8696,7 @@ async def handle_warehouse_electrics(message: Message, state: FSMContext) -> Non
     )
 
 
-@dp.message(F.text == WAREHOUSE_ELECTRICS_LED_STRIPS_TEXT)
+@menu_button(WAREHOUSE_ELECTRICS_LED_STRIPS_TEXT)
 async def handle_warehouse_electrics_led_strips(
     message: Message, state: FSMContext
 ) -> None:
@@ -8379,7 +8707,7 @@ async def handle_warehouse_electrics_led_strips(
     )
 
 
-@dp.message(F.text == WAREHOUSE_ELECTRICS_LED_MODULES_TEXT)
+@menu_button(WAREHOUSE_ELECTRICS_LED_MODULES_TEXT)
 async def handle_warehouse_electrics_led_modules(
     message: Message, state: FSMContext
 ) -> None:
@@ -8390,7 +8718,7 @@ async def handle_warehouse_electrics_led_modules(
     )
 
 
-@dp.message(F.text == WAREHOUSE_LED_MODULES_STOCK_TEXT)
+@menu_button(WAREHOUSE_LED_MODULES_STOCK_TEXT)
 async def handle_led_module_stock(message: Message, state: FSMContext) -> None:
     await state.clear()
     stock = await fetch_led_module_stock_summary()
@@ -8416,7 +8744,7 @@ async def handle_led_module_stock(message: Message, state: FSMContext) -> None:
     )
 
 
-@dp.message(F.text == WAREHOUSE_LED_MODULES_ADD_TEXT)
+@menu_button(WAREHOUSE_LED_MODULES_ADD_TEXT)
 async def handle_add_warehouse_led_modules(message: Message, state: FSMContext) -> None:
     await state.clear()
     modules = await fetch_generated_led_modules_with_details()
@@ -8444,8 +8772,7 @@ async def handle_add_warehouse_led_modules(message: Message, state: FSMContext)
 
 
 @dp.message(AddWarehouseLedModuleStates.waiting_for_module)
-async def process_add_led_module_selection(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_led_module_selection(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_led_module_flow(message, state)
         return
@@ -8490,8 +8817,7 @@ async def process_add_led_module_selection(message: Message, state: FSMContext)
 
 
 @dp.message(AddWarehouseLedModuleStates.waiting_for_quantity)
-async def process_add_led_module_quantity(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_add_led_module_quantity(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_led_module_flow(message, state)
         return
@@ -8566,7 +8892,7 @@ async def process_add_led_module_quantity(message: Message, state: FSMContext) -
     )
 
 
-@dp.message(F.text == WAREHOUSE_LED_MODULES_WRITE_OFF_TEXT)
+@menu_button(WAREHOUSE_LED_MODULES_WRITE_OFF_TEXT)
 async def handle_write_off_warehouse_led_modules(
     message: Message, state: FSMContext
 ) -> None:
@@ -8602,9 +8928,8 @@ async def handle_write_off_warehouse_led_modules(
 
 @dp.message(WriteOffWarehouseLedModuleStates.waiting_for_module)
 async def process_write_off_led_module_selection(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    text = (message.text or "").strip()
     if text == CANCEL_TEXT:
         await _cancel_write_off_led_module_flow(message, state)
         return
@@ -8669,9 +8994,8 @@ async def process_write_off_led_module_selection(
 
 @dp.message(WriteOffWarehouseLedModuleStates.waiting_for_quantity)
 async def process_write_off_led_module_quantity(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    text = (message.text or "").strip()
     if text == CANCEL_TEXT:
         await _cancel_write_off_led_module_flow(message, state)
         return
@@ -8707,9 +9031,8 @@ async def process_write_off_led_module_quantity(
 
 @dp.message(WriteOffWarehouseLedModuleStates.waiting_for_project)
 async def process_write_off_led_module_project(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    text = (message.text or "").strip()
     if text == CANCEL_TEXT:
         await _cancel_write_off_led_module_flow(message, state)
         return
@@ -8795,7 +9118,7 @@ async def process_write_off_led_module_project(
     )
 
 
-@dp.message(F.text == WAREHOUSE_LED_MODULES_BACK_TO_ELECTRICS_TEXT)
+@menu_button(WAREHOUSE_LED_MODULES_BACK_TO_ELECTRICS_TEXT)
 async def handle_back_to_electrics_from_led_modules(
     message: Message, state: FSMContext
 ) -> None:
@@ -8806,7 +9129,7 @@ async def handle_back_to_electrics_from_led_modules(
     )
 
 
-@dp.message(F.text == WAREHOUSE_ELECTRICS_POWER_SUPPLIES_TEXT)
+@menu_button(WAREHOUSE_ELECTRICS_POWER_SUPPLIES_TEXT)
 async def handle_warehouse_electrics_power_supplies(
     message: Message, state: FSMContext
 ) -> None:
@@ -8817,7 +9140,7 @@ async def handle_warehouse_electrics_power_supplies(
     )
 
 
-@dp.message(F.text == WAREHOUSE_POWER_SUPPLIES_ADD_TEXT)
+@menu_button(WAREHOUSE_POWER_SUPPLIES_ADD_TEXT)
 async def handle_add_warehouse_power_supply(
     message: Message, state: FSMContext
 ) -> None:
@@ -8844,7 +9167,7 @@ async def handle_add_warehouse_power_supply(
     )
 
 
-@dp.message(F.text == WAREHOUSE_POWER_SUPPLIES_WRITE_OFF_TEXT)
+@menu_button(WAREHOUSE_POWER_SUPPLIES_WRITE_OFF_TEXT)
 async def handle_write_off_warehouse_power_supply(
     message: Message, state: FSMContext
 ) -> None:
@@ -8879,9 +9202,8 @@ async def handle_write_off_warehouse_power_supply(
 
 @dp.message(AddWarehousePowerSupplyStates.waiting_for_power_supply)
 async def process_add_power_supply_selection(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    text = (message.text or "").strip()
     if text == CANCEL_TEXT:
         await _cancel_add_power_supply_flow(message, state)
         return
@@ -8944,9 +9266,8 @@ async def process_add_power_supply_selection(
 
 @dp.message(AddWarehousePowerSupplyStates.waiting_for_quantity)
 async def process_add_power_supply_quantity(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    text = (message.text or "").strip()
     if text == CANCEL_TEXT:
         await _cancel_add_power_supply_flow(message, state)
         return
@@ -9022,9 +9343,8 @@ async def process_add_power_supply_quantity(
 
 @dp.message(WriteOffWarehousePowerSupplyStates.waiting_for_power_supply)
 async def process_write_off_power_supply_selection(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    text = (message.text or "").strip()
     if text == CANCEL_TEXT:
         await _cancel_write_off_power_supply_flow(message, state)
         return
@@ -9089,9 +9409,8 @@ async def process_write_off_power_supply_selection(
 
 @dp.message(WriteOffWarehousePowerSupplyStates.waiting_for_quantity)
 async def process_write_off_power_supply_quantity(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    text = (message.text or "").strip()
     if text == CANCEL_TEXT:
         await _cancel_write_off_power_supply_flow(message, state)
         return
@@ -9127,9 +9446,8 @@ async def process_write_off_power_supply_quantity(
 
 @dp.message(WriteOffWarehousePowerSupplyStates.waiting_for_order)
 async def process_write_off_power_supply_order(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    text = (message.text or "").strip()
     if text == CANCEL_TEXT:
         await _cancel_write_off_power_supply_flow(message, state)
         return
@@ -9214,7 +9532,7 @@ async def process_write_off_power_supply_order(
     )
 
 
-@dp.message(F.text == WAREHOUSE_POWER_SUPPLIES_STOCK_TEXT)
+@menu_button(WAREHOUSE_POWER_SUPPLIES_STOCK_TEXT)
 async def handle_stock_warehouse_power_supplies(
     message: Message, state: FSMContext
 ) -> None:
@@ -9244,17 +9562,6 @@ async def handle_stock_warehouse_power_supplies(
     )
 
 
-@dp.message(F.text == WAREHOUSE_POWER_SUPPLIES_BACK_TO_ELECTRICS_TEXT)
-async def handle_back_to_electrics_from_power_supplies(
-    message: Message, state: FSMContext
-) -> None:
-    await state.clear()
-    await message.answer(
-        "⚡ Раздел «Электрика». Выберите категорию:",
-        reply_markup=WAREHOUSE_ELECTRICS_KB,
-    )
-
-
 async def _reply_films_feature_in_development(message: Message, feature: str) -> None:
     await message.answer(
         f"⚙️ Функция «{feature}» для раздела «Пленки» находится в разработке.",
@@ -9262,7 +9569,7 @@ async def _reply_films_feature_in_development(message: Message, feature: str) ->
     )
 
 
-@dp.message(F.text == WAREHOUSE_FILMS_ADD_TEXT)
+@menu_button(WAREHOUSE_FILMS_ADD_TEXT)
 async def handle_add_warehouse_film(message: Message, state: FSMContext) -> None:
     await state.clear()
     manufacturers = await fetch_film_manufacturers()
@@ -9291,7 +9598,7 @@ async def handle_add_warehouse_film(message: Message, state: FSMContext) -> None
     )
 
 
-@dp.message(F.text == WAREHOUSE_FILMS_WRITE_OFF_TEXT)
+@menu_button(WAREHOUSE_FILMS_WRITE_OFF_TEXT)
 async def handle_write_off_warehouse_film(message: Message, state: FSMContext) -> None:
     await state.clear()
     await state.set_state(WriteOffWarehouseFilmStates.waiting_for_article)
@@ -9302,11 +9609,11 @@ async def handle_write_off_warehouse_film(message: Message, state: FSMContext) -
 
 
 @dp.message(WriteOffWarehouseFilmStates.waiting_for_article)
-async def process_write_off_film_article(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_write_off_film_article(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_write_off_film_flow(message, state)
         return
-    article = (message.text or "").strip()
+    article = text
     if not article.isdigit():
         await message.answer(
             "⚠️ Артикул должен содержать только цифры. Попробуйте снова.",
@@ -9332,11 +9639,11 @@ async def process_write_off_film_article(message: Message, state: FSMContext) ->
 
 
 @dp.message(WriteOffWarehouseFilmStates.waiting_for_project)
-async def process_write_off_film_project(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_write_off_film_project(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_write_off_film_flow(message, state)
         return
-    project = (message.text or "").strip()
+    project = text
     if not project:
         await message.answer(
             "⚠️ Название проекта не может быть пустым. Укажите проект.",
@@ -9384,7 +9691,7 @@ async def process_write_off_film_project(message: Message, state: FSMContext) ->
     )
 
 
-@dp.message(F.text == WAREHOUSE_FILMS_COMMENT_TEXT)
+@menu_button(WAREHOUSE_FILMS_COMMENT_TEXT)
 async def handle_comment_warehouse_film(message: Message, state: FSMContext) -> None:
     await state.clear()
     await state.set_state(CommentWarehouseFilmStates.waiting_for_article)
@@ -9394,7 +9701,7 @@ async def handle_comment_warehouse_film(message: Message, state: FSMContext) ->
     )
 
 
-@dp.message(F.text == WAREHOUSE_FILMS_MOVE_TEXT)
+@menu_button(WAREHOUSE_FILMS_MOVE_TEXT)
 async def handle_move_warehouse_film(message: Message, state: FSMContext) -> None:
     await state.clear()
     locations = await fetch_film_storage_locations()
@@ -9411,7 +9718,7 @@ async def handle_move_warehouse_film(message: Message, state: FSMContext) -> Non
     )
 
 
-@dp.message(F.text == WAREHOUSE_FILMS_SEARCH_TEXT)
+@menu_button(WAREHOUSE_FILMS_SEARCH_TEXT)
 async def handle_search_warehouse_film(message: Message, state: FSMContext) -> None:
     await state.clear()
     await state.set_state(SearchWarehouseFilmStates.choosing_mode)
@@ -9421,7 +9728,7 @@ async def handle_search_warehouse_film(message: Message, state: FSMContext) -> N
     )
 
 
-@dp.message(F.text == WAREHOUSE_FILMS_EXPORT_TEXT)
+@menu_button(WAREHOUSE_FILMS_EXPORT_TEXT)
 async def handle_export_warehouse_film(message: Message, state: FSMContext) -> None:
     await state.clear()
     await message.answer("⏳ Формирую файл экспорта. Пожалуйста, подождите...")
@@ -9443,7 +9750,7 @@ async def handle_export_warehouse_film(message: Message, state: FSMContext) -> N
         return
 
     try:
-        export_file = build_films_export_file(records)
+        export_file = await asyncio.to_thread(build_films_export_file, records)
     except Exception:
         logging.exception("Failed to build films export file")
         await message.answer(
@@ -9460,8 +9767,7 @@ async def handle_export_warehouse_film(message: Message, state: FSMContext) -> N
 
 
 @dp.message(SearchWarehouseFilmStates.choosing_mode)
-async def process_search_film_menu(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_search_film_menu(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_film_flow(message, state)
         return
@@ -9500,8 +9806,7 @@ async def process_search_film_menu(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(SearchWarehouseFilmStates.waiting_for_article)
-async def process_search_film_by_article(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_search_film_by_article(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_film_flow(message, state)
         return
@@ -9530,8 +9835,7 @@ async def process_search_film_by_article(message: Message, state: FSMContext) ->
 
 
 @dp.message(SearchWarehouseFilmStates.waiting_for_number)
-async def process_search_film_by_number(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_search_film_by_number(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_film_flow(message, state)
         return
@@ -9588,8 +9892,7 @@ async def process_search_film_by_number(message: Message, state: FSMContext) ->
 
 
 @dp.message(SearchWarehouseFilmStates.waiting_for_color)
-async def process_search_film_by_color(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_search_film_by_color(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_film_flow(message, state)
         return
@@ -9625,11 +9928,11 @@ async def process_search_film_by_color(message: Message, state: FSMContext) -> N
 
 
 @dp.message(CommentWarehouseFilmStates.waiting_for_article)
-async def process_film_comment_article(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_film_comment_article(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_comment_film_flow(message, state)
         return
-    article = (message.text or "").strip()
+    article = text
     if not article.isdigit():
         await message.answer(
             "⚠️ Артикул должен содержать только цифры. Попробуйте снова.",
@@ -9664,8 +9967,8 @@ async def process_film_comment_article(message: Message, state: FSMContext) -> N
 
 
 @dp.message(CommentWarehouseFilmStates.waiting_for_comment)
-async def process_film_comment_update(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_film_comment_update(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_comment_film_flow(message, state)
         return
     data = await state.get_data()
@@ -9675,7 +9978,7 @@ async def process_film_comment_update(message: Message, state: FSMContext) -> No
     if record_id is None or article is None:
         await _cancel_comment_film_flow(message, state)
         return
-    new_comment_raw = (message.text or "").strip()
+    new_comment_raw = text
     new_comment: Optional[str]
     if new_comment_raw:
         new_comment = new_comment_raw
@@ -9700,11 +10003,11 @@ async def process_film_comment_update(message: Message, state: FSMContext) -> No
 
 
 @dp.message(MoveWarehouseFilmStates.waiting_for_article)
-async def process_move_film_article(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_move_film_article(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_move_film_flow(message, state)
         return
-    article = (message.text or "").strip()
+    article = text
     if not article.isdigit():
         await message.answer(
             "⚠️ Артикул должен содержать только цифры. Попробуйте снова.",
@@ -9744,8 +10047,8 @@ async def process_move_film_article(message: Message, state: FSMContext) -> None
 
 
 @dp.message(MoveWarehouseFilmStates.waiting_for_new_location)
-async def process_move_film_new_location(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_move_film_new_location(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_move_film_flow(message, state)
         return
     locations = await fetch_film_storage_locations()
@@ -9756,7 +10059,7 @@ async def process_move_film_new_location(message: Message, state: FSMContext) ->
             reply_markup=WAREHOUSE_FILMS_KB,
         )
         return
-    raw_location = (message.text or "").strip()
+    raw_location = text
     match = next((item for item in locations if item.lower() == raw_location.lower()), None)
     if match is None:
         await message.answer(
@@ -9808,11 +10111,11 @@ async def process_move_film_new_location(message: Message, state: FSMContext) ->
 
 
 @dp.message(AddWarehouseFilmStates.waiting_for_article)
-async def process_film_article(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_film_article(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_film_flow(message, state)
         return
-    article = (message.text or "").strip()
+    article = text
     if not article.isdigit():
         data = await state.get_data()
         suggestion = data.get("article_suggestion")
@@ -9838,12 +10141,12 @@ async def process_film_article(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehouseFilmStates.waiting_for_manufacturer)
-async def process_film_manufacturer(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_film_manufacturer(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_film_flow(message, state)
         return
     manufacturers = await fetch_film_manufacturers()
-    raw = (message.text or "").strip()
+    raw = text
     match = next((item for item in manufacturers if item.lower() == raw.lower()), None)
     if match is None:
         await message.answer(
@@ -9868,8 +10171,8 @@ async def process_film_manufacturer(message: Message, state: FSMContext) -> None
 
 
 @dp.message(AddWarehouseFilmStates.waiting_for_series)
-async def process_film_series(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_film_series(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_film_flow(message, state)
         return
     data = await state.get_data()
@@ -9878,7 +10181,7 @@ async def process_film_series(message: Message, state: FSMContext) -> None:
         await _cancel_add_film_flow(message, state)
         return
     series_list = await fetch_film_series_by_manufacturer(manufacturer)
-    raw = (message.text or "").strip()
+    raw = text
     match = next((item for item in series_list if item.lower() == raw.lower()), None)
     if match is None:
         await message.answer(
@@ -9895,8 +10198,7 @@ async def process_film_series(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehouseFilmStates.waiting_for_color_code)
-async def process_film_color_code(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_film_color_code(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_film_flow(message, state)
         return
@@ -9915,8 +10217,7 @@ async def process_film_color_code(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehouseFilmStates.waiting_for_color)
-async def process_film_color(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_film_color(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_film_flow(message, state)
         return
@@ -9935,8 +10236,8 @@ async def process_film_color(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehouseFilmStates.waiting_for_width)
-async def process_film_width(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_film_width(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_film_flow(message, state)
         return
     value = parse_positive_decimal(message.text or "")
@@ -9955,8 +10256,8 @@ async def process_film_width(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehouseFilmStates.waiting_for_length)
-async def process_film_length(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_film_length(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_film_flow(message, state)
         return
     value = parse_positive_decimal(message.text or "")
@@ -9983,12 +10284,12 @@ async def process_film_length(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehouseFilmStates.waiting_for_storage)
-async def process_film_storage(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_film_storage(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_film_flow(message, state)
         return
     locations = await fetch_film_storage_locations()
-    raw = (message.text or "").strip()
+    raw = text
     match = next((item for item in locations if item.lower() == raw.lower()), None)
     if match is None:
         await message.answer(
@@ -10005,8 +10306,7 @@ async def process_film_storage(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehouseFilmStates.waiting_for_comment)
-async def process_film_comment(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_film_comment(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_film_flow(message, state)
         return
@@ -10053,7 +10353,7 @@ async def process_film_comment(message: Message, state: FSMContext) -> None:
     )
 
 
-@dp.message(F.text == "📤 Экспорт")
+@menu_button("📤 Экспорт")
 async def handle_export_warehouse_plastics(message: Message) -> None:
     await message.answer("⏳ Формирую файл экспорта. Пожалуйста, подождите...")
     try:
@@ -10074,7 +10374,7 @@ async def handle_export_warehouse_plastics(message: Message) -> None:
         return
 
     try:
-        export_file = build_plastics_export_file(records)
+        export_file = await asyncio.to_thread(build_plastics_export_file, records)
     except Exception:
         logging.exception("Failed to build plastics export file")
         await message.answer(
@@ -10090,7 +10390,7 @@ async def handle_export_warehouse_plastics(message: Message) -> None:
     )
 
 
-@dp.message(F.text == "🔍 Найти")
+@menu_button("🔍 Найти")
 async def handle_search_warehouse_plastic(message: Message, state: FSMContext) -> None:
     await state.set_state(SearchWarehousePlasticStates.choosing_mode)
     await message.answer(
@@ -10100,8 +10400,7 @@ async def handle_search_warehouse_plastic(message: Message, state: FSMContext) -
 
 
 @dp.message(SearchWarehousePlasticStates.choosing_mode)
-async def process_search_menu_choice(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_search_menu_choice(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_plastic_flow(message, state)
         return
@@ -10127,7 +10426,7 @@ async def process_search_menu_choice(message: Message, state: FSMContext) -> Non
     )
 
 
-@dp.message(F.text == "💬 Комментировать")
+@menu_button("💬 Комментировать")
 async def handle_comment_warehouse_plastic(message: Message, state: FSMContext) -> None:
     await state.clear()
     await state.set_state(CommentWarehousePlasticStates.waiting_for_article)
@@ -10137,7 +10436,7 @@ async def handle_comment_warehouse_plastic(message: Message, state: FSMContext)
     )
 
 
-@dp.message(F.text == "🔁 Переместить")
+@menu_button("🔁 Переместить")
 async def handle_move_warehouse_plastic(message: Message, state: FSMContext) -> None:
     await state.clear()
     await state.set_state(MoveWarehousePlasticStates.waiting_for_article)
@@ -10147,7 +10446,7 @@ async def handle_move_warehouse_plastic(message: Message, state: FSMContext) ->
     )
 
 
-@dp.message(F.text == "➖ Списать")
+@menu_button("➖ Списать")
 async def handle_write_off_warehouse_plastic(message: Message, state: FSMContext) -> None:
     await state.clear()
     await state.set_state(WriteOffWarehousePlasticStates.waiting_for_article)
@@ -10158,8 +10457,7 @@ async def handle_write_off_warehouse_plastic(message: Message, state: FSMContext
 
 
 @dp.message(SearchWarehousePlasticStates.waiting_for_article)
-async def process_search_plastic_by_article(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_search_plastic_by_article(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_plastic_flow(message, state)
         return
@@ -10308,13 +10606,11 @@ async def _perform_advanced_search(message: Message, state: FSMContext) -> None:
         if min_width is not None:
             header_parts.append(f"Мин. ширина: {format_dimension_value(min_width)}")
         header_text = "\n".join(header_parts)
-        records_text = []
-        for index, record in enumerate(records, start=1):
-            records_text.append(
-                f"{index}.\n{format_plastic_record_for_message(record)}"
-            )
-        full_text = f"{header_text}\n\n" + "\n\n".join(records_text)
-        chunks = split_text_into_messages(full_text)
+        records_text = [
+            f"{index}.\n{format_plastic_record_for_message(record)}"
+            for index, record in enumerate(records, start=1)
+        ]
+        chunks = pack_message_parts([header_text, *records_text])
         for idx, chunk in enumerate(chunks):
             if idx == 0:
                 await message.answer(chunk, reply_markup=WAREHOUSE_PLASTICS_KB)
@@ -10328,8 +10624,7 @@ async def _perform_advanced_search(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(SearchWarehousePlasticStates.waiting_for_material)
-async def process_advanced_search_material(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_advanced_search_material(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_plastic_flow(message, state)
         return
@@ -10338,7 +10633,7 @@ async def process_advanced_search_material(message: Message, state: FSMContext)
         await _prompt_advanced_thickness_choice(message, state, None)
         return
     materials = await fetch_plastic_material_types()
-    match = next((item for item in materials if item.lower() == text.lower()), None)
+    match = await find_plastic_material_type(text)
     if match is None:
         await message.answer(
             "ℹ️ Материал не найден. Выберите один из списка или нажмите «➡️ Далее».",
@@ -10350,8 +10645,7 @@ async def process_advanced_search_material(message: Message, state: FSMContext)
 
 
 @dp.message(SearchWarehousePlasticStates.waiting_for_thickness)
-async def process_advanced_search_thickness(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_advanced_search_thickness(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_plastic_flow(message, state)
         return
@@ -10379,8 +10673,7 @@ async def process_advanced_search_thickness(message: Message, state: FSMContext)
 
 
 @dp.message(SearchWarehousePlasticStates.waiting_for_color)
-async def process_advanced_search_color(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_advanced_search_color(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_plastic_flow(message, state)
         return
@@ -10406,8 +10699,7 @@ async def process_advanced_search_color(message: Message, state: FSMContext) ->
 
 
 @dp.message(SearchWarehousePlasticStates.waiting_for_min_length)
-async def process_advanced_search_min_length(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_advanced_search_min_length(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_plastic_flow(message, state)
         return
@@ -10427,8 +10719,7 @@ async def process_advanced_search_min_length(message: Message, state: FSMContext
 
 
 @dp.message(SearchWarehousePlasticStates.waiting_for_min_width)
-async def process_advanced_search_min_width(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_advanced_search_min_width(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_search_plastic_flow(message, state)
         return
@@ -10448,11 +10739,11 @@ async def process_advanced_search_min_width(message: Message, state: FSMContext)
 
 
 @dp.message(CommentWarehousePlasticStates.waiting_for_article)
-async def process_comment_article(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_comment_article(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_comment_plastic_flow(message, state)
         return
-    article = (message.text or "").strip()
+    article = text
     if not article.isdigit():
         await message.answer(
             "⚠️ Артикул должен содержать только цифры. Попробуйте снова.",
@@ -10486,8 +10777,8 @@ async def process_comment_article(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(CommentWarehousePlasticStates.waiting_for_comment)
-async def process_comment_update(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_comment_update(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_comment_plastic_flow(message, state)
         return
     data = await state.get_data()
@@ -10497,7 +10788,7 @@ async def process_comment_update(message: Message, state: FSMContext) -> None:
     if record_id is None or article is None:
         await _cancel_comment_plastic_flow(message, state)
         return
-    new_comment_raw = (message.text or "").strip()
+    new_comment_raw = text
     new_comment: Optional[str]
     if new_comment_raw:
         new_comment = new_comment_raw
@@ -10522,11 +10813,11 @@ async def process_comment_update(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(MoveWarehousePlasticStates.waiting_for_article)
-async def process_move_article(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_move_article(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_move_plastic_flow(message, state)
         return
-    article = (message.text or "").strip()
+    article = text
     if not article.isdigit():
         await message.answer(
             "⚠️ Артикул должен содержать только цифры. Попробуйте снова.",
@@ -10566,8 +10857,8 @@ async def process_move_article(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(MoveWarehousePlasticStates.waiting_for_new_location)
-async def process_move_new_location(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_move_new_location(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_move_plastic_flow(message, state)
         return
     locations = await fetch_plastic_storage_locations()
@@ -10578,7 +10869,7 @@ async def process_move_new_location(message: Message, state: FSMContext) -> None
             reply_markup=WAREHOUSE_PLASTICS_KB,
         )
         return
-    raw_location = (message.text or "").strip()
+    raw_location = text
     match = next((item for item in locations if item.lower() == raw_location.lower()), None)
     if match is None:
         await message.answer(
@@ -10628,11 +10919,11 @@ async def process_move_new_location(message: Message, state: FSMContext) -> None
 
 
 @dp.message(WriteOffWarehousePlasticStates.waiting_for_article)
-async def process_write_off_article(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_write_off_article(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_write_off_plastic_flow(message, state)
         return
-    article = (message.text or "").strip()
+    article = text
     if not article.isdigit():
         await message.answer(
             "⚠️ Артикул должен содержать только цифры. Попробуйте снова.",
@@ -10658,11 +10949,11 @@ async def process_write_off_article(message: Message, state: FSMContext) -> None
 
 
 @dp.message(WriteOffWarehousePlasticStates.waiting_for_project)
-async def process_write_off_project(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_write_off_project(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_write_off_plastic_flow(message, state)
         return
-    project = (message.text or "").strip()
+    project = text
     if not project:
         await message.answer(
             "⚠️ Название проекта не может быть пустым. Укажите проект.",
@@ -10710,7 +11001,7 @@ async def process_write_off_project(message: Message, state: FSMContext) -> None
     )
 
 
-@dp.message(F.text == "➕ Добавить")
+@menu_button("➕ Добавить")
 async def handle_add_warehouse_plastic(message: Message, state: FSMContext) -> None:
     await state.clear()
     await state.set_state(AddWarehousePlasticStates.waiting_for_article)
@@ -10733,11 +11024,11 @@ async def handle_add_warehouse_plastic(message: Message, state: FSMContext) -> N
 
 
 @dp.message(AddWarehousePlasticStates.waiting_for_article)
-async def process_plastic_article(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_article(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_flow(message, state)
         return
-    article = (message.text or "").strip()
+    article = text
     if not article.isdigit():
         data = await state.get_data()
         suggestion = data.get("article_suggestion")
@@ -10763,13 +11054,13 @@ async def process_plastic_article(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehousePlasticStates.waiting_for_material)
-async def process_plastic_material(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_material(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_flow(message, state)
         return
     materials = await fetch_plastic_material_types()
-    raw = (message.text or "").strip()
-    match = next((item for item in materials if item.lower() == raw.lower()), None)
+    raw = text
+    match = await find_plastic_material_type(raw)
     if match is None:
         await message.answer(
             "ℹ️ Такой материал не найден. Выберите один из списка.",
@@ -10793,8 +11084,8 @@ async def process_plastic_material(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehousePlasticStates.waiting_for_thickness)
-async def process_plastic_thickness(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_thickness(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_flow(message, state)
         return
     data = await state.get_data()
@@ -10827,8 +11118,8 @@ async def process_plastic_thickness(message: Message, state: FSMContext) -> None
 
 
 @dp.message(AddWarehousePlasticStates.waiting_for_color)
-async def process_plastic_color(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_color(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_flow(message, state)
         return
     data = await state.get_data()
@@ -10837,7 +11128,7 @@ async def process_plastic_color(message: Message, state: FSMContext) -> None:
         await _cancel_add_plastic_flow(message, state)
         return
     colors = await fetch_material_colors(material)
-    raw = (message.text or "").strip()
+    raw = text
     match = next((item for item in colors if item.lower() == raw.lower()), None)
     if match is None:
         await message.answer(
@@ -10854,8 +11145,8 @@ async def process_plastic_color(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehousePlasticStates.waiting_for_length)
-async def process_plastic_length(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_length(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_flow(message, state)
         return
     value = parse_positive_integer(message.text or "")
@@ -10874,8 +11165,8 @@ async def process_plastic_length(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehousePlasticStates.waiting_for_width)
-async def process_plastic_width(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_width(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_flow(message, state)
         return
     value = parse_positive_integer(message.text or "")
@@ -10902,12 +11193,12 @@ async def process_plastic_width(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehousePlasticStates.waiting_for_storage)
-async def process_plastic_storage(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_storage(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_flow(message, state)
         return
     locations = await fetch_plastic_storage_locations()
-    raw = (message.text or "").strip()
+    raw = text
     match = next((item for item in locations if item.lower() == raw.lower()), None)
     if match is None:
         await message.answer(
@@ -10924,8 +11215,7 @@ async def process_plastic_storage(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(AddWarehousePlasticStates.waiting_for_comment)
-async def process_plastic_comment(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_plastic_comment(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_plastic_flow(message, state)
         return
@@ -10990,7 +11280,7 @@ async def process_plastic_comment(message: Message, state: FSMContext) -> None:
     )
 
 
-@dp.message(F.text == "++добавить пачку")
+@menu_button("++добавить пачку")
 async def handle_add_warehouse_plastic_batch(
     message: Message, state: FSMContext
 ) -> None:
@@ -11012,8 +11302,8 @@ async def handle_add_warehouse_plastic_batch(
 
 
 @dp.message(AddWarehousePlasticBatchStates.waiting_for_quantity)
-async def process_plastic_batch_quantity(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_batch_quantity(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_batch_flow(message, state)
         return
     quantity = parse_positive_integer(message.text or "")
@@ -11040,13 +11330,13 @@ async def process_plastic_batch_quantity(message: Message, state: FSMContext) ->
 
 
 @dp.message(AddWarehousePlasticBatchStates.waiting_for_material)
-async def process_plastic_batch_material(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_batch_material(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_batch_flow(message, state)
         return
     materials = await fetch_plastic_material_types()
-    raw = (message.text or "").strip()
-    match = next((item for item in materials if item.lower() == raw.lower()), None)
+    raw = text
+    match = await find_plastic_material_type(raw)
     if match is None:
         await message.answer(
             "ℹ️ Такой материал не найден. Выберите один из списка.",
@@ -11070,8 +11360,8 @@ async def process_plastic_batch_material(message: Message, state: FSMContext) ->
 
 
 @dp.message(AddWarehousePlasticBatchStates.waiting_for_thickness)
-async def process_plastic_batch_thickness(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_batch_thickness(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_batch_flow(message, state)
         return
     data = await state.get_data()
@@ -11104,8 +11394,8 @@ async def process_plastic_batch_thickness(message: Message, state: FSMContext) -
 
 
 @dp.message(AddWarehousePlasticBatchStates.waiting_for_color)
-async def process_plastic_batch_color(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_batch_color(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_batch_flow(message, state)
         return
     data = await state.get_data()
@@ -11114,7 +11404,7 @@ async def process_plastic_batch_color(message: Message, state: FSMContext) -> No
         await _cancel_add_plastic_batch_flow(message, state)
         return
     colors = await fetch_material_colors(material)
-    raw = (message.text or "").strip()
+    raw = text
     match = next((item for item in colors if item.lower() == raw.lower()), None)
     if match is None:
         await message.answer(
@@ -11131,8 +11421,8 @@ async def process_plastic_batch_color(message: Message, state: FSMContext) -> No
 
 
 @dp.message(AddWarehousePlasticBatchStates.waiting_for_length)
-async def process_plastic_batch_length(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_batch_length(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_batch_flow(message, state)
         return
     value = parse_positive_integer(message.text or "")
@@ -11151,8 +11441,8 @@ async def process_plastic_batch_length(message: Message, state: FSMContext) -> N
 
 
 @dp.message(AddWarehousePlasticBatchStates.waiting_for_width)
-async def process_plastic_batch_width(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_batch_width(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_batch_flow(message, state)
         return
     value = parse_positive_integer(message.text or "")
@@ -11179,12 +11469,12 @@ async def process_plastic_batch_width(message: Message, state: FSMContext) -> No
 
 
 @dp.message(AddWarehousePlasticBatchStates.waiting_for_storage)
-async def process_plastic_batch_storage(message: Message, state: FSMContext) -> None:
-    if (message.text or "").strip() == CANCEL_TEXT:
+async def process_plastic_batch_storage(message: Message, state: FSMContext, text: str) -> None:
+    if text == CANCEL_TEXT:
         await _cancel_add_plastic_batch_flow(message, state)
         return
     locations = await fetch_plastic_storage_locations()
-    raw = (message.text or "").strip()
+    raw = text
     match = next((item for item in locations if item.lower() == raw.lower()), None)
     if match is None:
         await message.answer(
@@ -11201,8 +11491,7 @@ async def process_plastic_batch_storage(message: Message, state: FSMContext) ->
 
 
 @dp.message(AddWarehousePlasticBatchStates.waiting_for_comment)
-async def process_plastic_batch_comment(message: Message, state: FSMContext) -> None:
-    text = (message.text or "").strip()
+async def process_plastic_batch_comment(message: Message, state: FSMContext, text: str) -> None:
     if text == CANCEL_TEXT:
         await _cancel_add_plastic_batch_flow(message, state)
         return
@@ -11232,28 +11521,25 @@ async def process_plastic_batch_comment(message: Message, state: FSMContext) ->
     articles = [str(start_article + idx) for idx in range(quantity)]
     employee_id = message.from_user.id if message.from_user else None
     employee_name = message.from_user.full_name if message.from_user else None
-    records: list[Dict[str, Any]] = []
-    for article in articles:
-        record = await insert_warehouse_plastic_record(
-            article=article,
-            material=material,
-            thickness=thickness,
-            color=color,
-            length_mm=Decimal(length),
-            width_mm=Decimal(width),
-            warehouse=storage,
-            comment=comment,
-            employee_id=employee_id,
-            employee_name=employee_name,
+    records = await insert_warehouse_plastic_batch(
+        articles=articles,
+        material=material,
+        thickness=thickness,
+        color=color,
+        length_mm=Decimal(length),
+        width_mm=Decimal(width),
+        warehouse=storage,
+        comment=comment,
+        employee_id=employee_id,
+        employee_name=employee_name,
+    )
+    if len(records) != len(articles):
+        await state.clear()
+        await message.answer(
+            "⚠️ Не удалось добавить пластик. Попробуйте позже.",
+            reply_markup=WAREHOUSE_PLASTICS_KB,
         )
-        if not record:
-            await state.clear()
-            await message.answer(
-                "⚠️ Не удалось добавить пластик. Попробуйте позже.",
-                reply_markup=WAREHOUSE_PLASTICS_KB,
-            )
-            return
-        records.append(record)
+        return
     await state.clear()
     summary_comment = (records[0].get("comment") if records else comment) or "—"
     if records and records[0].get("employee_name"):
@@ -11287,34 +11573,26 @@ async def process_plastic_batch_comment(message: Message, state: FSMContext) ->
     )
 
 
-@dp.message(F.text == "🎞️ Пленки ⚙️")
+@menu_button("🎞️ Пленки ⚙️", admin_only=True)
 async def handle_warehouse_settings_films(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_film_settings_overview(message)
 
 
-@dp.message(F.text == "🏭 Производитель")
+@menu_button("🏭 Производитель", admin_only=True)
 async def handle_film_manufacturers_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_film_manufacturers_menu(message)
 
 
-@dp.message(F.text == "🏬 Склад")
+@menu_button("🏬 Склад", admin_only=True)
 async def handle_film_storage_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_film_storage_overview(message)
 
 
-@dp.message(F.text == "🎬 Серия")
+@menu_button("🎬 Серия", admin_only=True)
 async def handle_film_series_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     manufacturers = await fetch_film_manufacturers_with_series()
     if manufacturers:
@@ -11346,17 +11624,17 @@ async def handle_film_series_menu(message: Message, state: FSMContext) -> None:
 
 
 @dp.message(F.text == "⬅️ Назад к пленкам")
-async def handle_back_to_film_settings(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
+async def handle_back_to_film_settings(
+    message: Message, state: FSMContext, is_admin: Optional[bool] = None
+) -> None:
+    if not await ensure_admin_access(message, state, is_admin):
         return
     await state.clear()
     await send_film_settings_overview(message)
 
 
-@dp.message(F.text == "➕ Добавить производителя")
+@menu_button("➕ Добавить производителя", admin_only=True)
 async def handle_add_film_manufacturer_button(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(
         ManageFilmManufacturerStates.waiting_for_new_manufacturer_name
     )
@@ -11370,12 +11648,10 @@ async def handle_add_film_manufacturer_button(message: Message, state: FSMContex
 
 
 @dp.message(ManageFilmManufacturerStates.waiting_for_new_manufacturer_name)
-async def process_new_film_manufacturer(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+async def process_new_film_manufacturer(message: Message, state: FSMContext, text: str) -> None:
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await insert_film_manufacturer(name):
         await message.answer(f"✅ Производитель «{name}» добавлен.")
@@ -11385,10 +11661,8 @@ async def process_new_film_manufacturer(message: Message, state: FSMContext) ->
     await send_film_settings_overview(message)
 
 
-@dp.message(F.text == "➖ Удалить производителя")
+@menu_button("➖ Удалить производителя", admin_only=True)
 async def handle_remove_film_manufacturer_button(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     manufacturers = await fetch_film_manufacturers()
     if not manufacturers:
         await message.answer(
@@ -11407,12 +11681,10 @@ async def handle_remove_film_manufacturer_button(message: Message, state: FSMCon
 
 
 @dp.message(ManageFilmManufacturerStates.waiting_for_manufacturer_name_to_delete)
-async def process_remove_film_manufacturer(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+async def process_remove_film_manufacturer(message: Message, state: FSMContext, text: str) -> None:
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await delete_film_manufacturer(name):
         await message.answer(f"🗑 Производитель «{name}» удалён.")
@@ -11422,12 +11694,8 @@ async def process_remove_film_manufacturer(message: Message, state: FSMContext)
     await send_film_settings_overview(message)
 
 
-@dp.message(F.text == "➕ Добавить место хранения пленки")
-async def handle_add_film_storage_location_button(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button("➕ Добавить место хранения пленки", admin_only=True)
+async def handle_add_film_storage_location_button(message: Message, state: FSMContext) -> None:
     await state.set_state(
         ManageFilmStorageStates.waiting_for_new_storage_location_name
     )
@@ -11442,13 +11710,11 @@ async def handle_add_film_storage_location_button(
 
 @dp.message(ManageFilmStorageStates.waiting_for_new_storage_location_name)
 async def process_new_film_storage_location(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await insert_film_storage_location(name):
         await message.answer(f"✅ Место хранения «{name}» добавлено.")
@@ -11458,12 +11724,8 @@ async def process_new_film_storage_location(
     await send_film_storage_overview(message)
 
 
-@dp.message(F.text == "➖ Удалить место хранения пленки")
-async def handle_remove_film_storage_location_button(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button("➖ Удалить место хранения пленки", admin_only=True)
+async def handle_remove_film_storage_location_button(message: Message, state: FSMContext) -> None:
     locations = await fetch_film_storage_locations()
     if not locations:
         await message.answer(
@@ -11483,13 +11745,11 @@ async def handle_remove_film_storage_location_button(
 
 @dp.message(ManageFilmStorageStates.waiting_for_storage_location_to_delete)
 async def process_remove_film_storage_location(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await delete_film_storage_location(name):
         await message.answer(f"🗑 Место хранения «{name}» удалено.")
@@ -11499,10 +11759,8 @@ async def process_remove_film_storage_location(
     await send_film_storage_overview(message)
 
 
-@dp.message(F.text == "➕ Добавить серию")
+@menu_button("➕ Добавить серию", admin_only=True)
 async def handle_add_film_series_button(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     manufacturers = await fetch_film_manufacturers()
     if not manufacturers:
         await message.answer(
@@ -11522,11 +11780,9 @@ async def handle_add_film_series_button(message: Message, state: FSMContext) ->
 
 @dp.message(ManageFilmSeriesStates.waiting_for_manufacturer_for_new_series)
 async def process_choose_manufacturer_for_new_series(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    manufacturer_name = (message.text or "").strip()
+    manufacturer_name = text
     manufacturer = await get_film_manufacturer_by_name(manufacturer_name)
     if manufacturer is None:
         manufacturers = await fetch_film_manufacturers()
@@ -11554,10 +11810,8 @@ async def process_choose_manufacturer_for_new_series(
 
 
 @dp.message(ManageFilmSeriesStates.waiting_for_new_series_name)
-async def process_new_series_name(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    series_name = (message.text or "").strip()
+async def process_new_series_name(message: Message, state: FSMContext, text: str) -> None:
+    series_name = text
     if not series_name:
         await message.answer("⚠️ Название серии не может быть пустым. Попробуйте снова.")
         return
@@ -11592,10 +11846,8 @@ async def process_new_series_name(message: Message, state: FSMContext) -> None:
     await send_film_settings_overview(message)
 
 
-@dp.message(F.text == "➖ Удалить серию")
+@menu_button("➖ Удалить серию", admin_only=True)
 async def handle_remove_film_series_button(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     manufacturers = await fetch_film_manufacturers_with_series()
     manufacturers_with_series = [
         item["name"] for item in manufacturers if item.get("series")
@@ -11618,11 +11870,9 @@ async def handle_remove_film_series_button(message: Message, state: FSMContext)
 
 @dp.message(ManageFilmSeriesStates.waiting_for_manufacturer_for_series_deletion)
 async def process_choose_manufacturer_for_series_deletion(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    manufacturer_name = (message.text or "").strip()
+    manufacturer_name = text
     manufacturer = await get_film_manufacturer_by_name(manufacturer_name)
     if manufacturer is None:
         manufacturers = await fetch_film_manufacturers_with_series()
@@ -11668,10 +11918,8 @@ async def process_choose_manufacturer_for_series_deletion(
 
 
 @dp.message(ManageFilmSeriesStates.waiting_for_series_name_to_delete)
-async def process_remove_film_series(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    series_name = (message.text or "").strip()
+async def process_remove_film_series(message: Message, state: FSMContext, text: str) -> None:
+    series_name = text
     if not series_name:
         await message.answer("⚠️ Название серии не может быть пустым. Попробуйте снова.")
         return
@@ -11701,194 +11949,138 @@ async def process_remove_film_series(message: Message, state: FSMContext) -> Non
     await send_film_settings_overview(message)
 
 
-@dp.message(F.text == "🧱 Пластик")
+@menu_button("🧱 Пластик", admin_only=True)
 async def handle_warehouse_settings_plastic(message: Message) -> None:
-    if not await ensure_admin_access(message):
-        return
     await send_plastic_settings_overview(message)
 
 
-@dp.message(F.text == WAREHOUSE_SETTINGS_ELECTRICS_TEXT)
+@menu_button(WAREHOUSE_SETTINGS_ELECTRICS_TEXT, admin_only=True)
 async def handle_warehouse_settings_electrics(message: Message) -> None:
-    if not await ensure_admin_access(message):
-        return
     await send_electrics_settings_overview(message)
 
 
-@dp.message(F.text == WAREHOUSE_SETTINGS_ELECTRICS_LED_STRIPS_TEXT)
-async def handle_warehouse_settings_led_strips(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(WAREHOUSE_SETTINGS_ELECTRICS_LED_STRIPS_TEXT, admin_only=True)
+async def handle_warehouse_settings_led_strips(message: Message, state: FSMContext) -> None:
     await state.clear()
     await send_led_strips_settings_overview(message)
 
 
-@dp.message(F.text == LED_STRIPS_MANUFACTURERS_MENU_TEXT)
-async def handle_led_strips_manufacturers_menu(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_STRIPS_MANUFACTURERS_MENU_TEXT, admin_only=True)
+async def handle_led_strips_manufacturers_menu(message: Message, state: FSMContext) -> None:
     await state.clear()
     await send_led_strips_manufacturers_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_SERIES_MENU_TEXT)
+@menu_button(LED_STRIPS_SERIES_MENU_TEXT, admin_only=True)
 async def handle_led_strips_series_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_strips_series_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_COLORS_MENU_TEXT)
+@menu_button(LED_STRIPS_COLORS_MENU_TEXT, admin_only=True)
 async def handle_led_strips_colors_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_strips_colors_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_CUT_MENU_TEXT)
+@menu_button(LED_STRIPS_CUT_MENU_TEXT, admin_only=True)
 async def handle_led_strips_cut_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_strips_cut_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_TYPE_MENU_TEXT)
+@menu_button(LED_STRIPS_TYPE_MENU_TEXT, admin_only=True)
 async def handle_led_strips_type_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_strips_type_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_BUS_MENU_TEXT)
+@menu_button(LED_STRIPS_BUS_MENU_TEXT, admin_only=True)
 async def handle_led_strips_bus_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_strips_bus_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_LED_COUNT_MENU_TEXT)
+@menu_button(LED_STRIPS_LED_COUNT_MENU_TEXT, admin_only=True)
 async def handle_led_strips_led_count_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_strips_led_count_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_VOLTAGE_MENU_TEXT)
+@menu_button(LED_STRIPS_VOLTAGE_MENU_TEXT, admin_only=True)
 async def handle_led_strips_voltage_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_strips_voltage_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_IP_MENU_TEXT)
+@menu_button(LED_STRIPS_IP_MENU_TEXT, admin_only=True)
 async def handle_led_strips_ip_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_strips_ip_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_BACK_TEXT)
-async def handle_back_to_led_strips_settings(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_STRIPS_BACK_TEXT, admin_only=True)
+async def handle_back_to_led_strips_settings(message: Message, state: FSMContext) -> None:
     await state.clear()
     await send_led_strips_settings_overview(message)
 
 
-@dp.message(F.text == WAREHOUSE_SETTINGS_ELECTRICS_LED_MODULES_TEXT)
-async def handle_warehouse_settings_led_modules(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(WAREHOUSE_SETTINGS_ELECTRICS_LED_MODULES_TEXT, admin_only=True)
+async def handle_warehouse_settings_led_modules(message: Message, state: FSMContext) -> None:
     await state.clear()
     await send_led_modules_settings_overview(message)
 
 
-@dp.message(F.text == LED_MODULES_MANUFACTURERS_MENU_TEXT)
-async def handle_led_module_manufacturers_menu(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_MODULES_MANUFACTURERS_MENU_TEXT, admin_only=True)
+async def handle_led_module_manufacturers_menu(message: Message, state: FSMContext) -> None:
     await state.clear()
     await send_led_module_manufacturers_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_COLORS_MENU_TEXT)
+@menu_button(LED_MODULES_COLORS_MENU_TEXT, admin_only=True)
 async def handle_led_module_colors_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_module_colors_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_POWER_MENU_TEXT)
+@menu_button(LED_MODULES_POWER_MENU_TEXT, admin_only=True)
 async def handle_led_module_power_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_module_power_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_VOLTAGE_MENU_TEXT)
+@menu_button(LED_MODULES_VOLTAGE_MENU_TEXT, admin_only=True)
 async def handle_led_module_voltage_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_module_voltage_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_LENS_MENU_TEXT)
+@menu_button(LED_MODULES_LENS_MENU_TEXT, admin_only=True)
 async def handle_led_module_lens_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_module_lens_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_SERIES_MENU_TEXT)
+@menu_button(LED_MODULES_SERIES_MENU_TEXT, admin_only=True)
 async def handle_led_module_series_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_module_series_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_STORAGE_MENU_TEXT)
+@menu_button(LED_MODULES_STORAGE_MENU_TEXT, admin_only=True)
 async def handle_led_module_storage_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_module_storage_overview(message)
 
 
-@dp.message(F.text == LED_MODULES_BASE_MENU_TEXT)
+@menu_button(LED_MODULES_BASE_MENU_TEXT, admin_only=True)
 async def handle_led_module_base_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_led_module_base_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_GENERATE_TEXT)
+@menu_button(LED_MODULES_GENERATE_TEXT, admin_only=True)
 async def handle_generate_led_module(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     manufacturers_with_series = [
         item
@@ -11927,10 +12119,8 @@ async def handle_generate_led_module(message: Message, state: FSMContext) -> Non
 
 
 @dp.message(GenerateLedModuleStates.waiting_for_article)
-async def process_generate_led_module_article(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    article = (message.text or "").strip()
+async def process_generate_led_module_article(message: Message, state: FSMContext, text: str) -> None:
+    article = text
     if not article:
         await message.answer(
             "⚠️ Артикул не может быть пустым. Попробуйте снова.",
@@ -11969,10 +12159,8 @@ async def process_generate_led_module_article(message: Message, state: FSMContex
 
 @dp.message(GenerateLedModuleStates.waiting_for_manufacturer)
 async def process_generate_led_module_manufacturer(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
     manufacturers_with_series = [
         item
         for item in await fetch_led_module_manufacturers_with_series()
@@ -11986,7 +12174,7 @@ async def process_generate_led_module_manufacturer(
         )
         return
     manufacturer_names = [item["name"] for item in manufacturers_with_series]
-    raw = (message.text or "").strip()
+    raw = text
     match = next(
         (item for item in manufacturers_with_series if item["name"].lower() == raw.lower()),
         None,
@@ -12017,9 +12205,7 @@ async def process_generate_led_module_manufacturer(
 
 
 @dp.message(GenerateLedModuleStates.waiting_for_series)
-async def process_generate_led_module_series(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
+async def process_generate_led_module_series(message: Message, state: FSMContext, text: str) -> None:
     data = await state.get_data()
     manufacturer: Optional[dict[str, Any]] = data.get("generated_led_module_manufacturer")
     if not manufacturer:
@@ -12037,7 +12223,7 @@ async def process_generate_led_module_series(message: Message, state: FSMContext
             reply_markup=WAREHOUSE_SETTINGS_LED_MODULES_KB,
         )
         return
-    raw = (message.text or "").strip()
+    raw = text
     series_name = next((item for item in series_names if item.lower() == raw.lower()), None)
     if series_name is None:
         await message.answer(
@@ -12071,9 +12257,7 @@ async def process_generate_led_module_series(message: Message, state: FSMContext
 
 
 @dp.message(GenerateLedModuleStates.waiting_for_color)
-async def process_generate_led_module_color(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
+async def process_generate_led_module_color(message: Message, state: FSMContext, text: str) -> None:
     colors = await fetch_led_module_colors()
     if not colors:
         await state.clear()
@@ -12082,7 +12266,7 @@ async def process_generate_led_module_color(message: Message, state: FSMContext)
             reply_markup=WAREHOUSE_SETTINGS_LED_MODULES_KB,
         )
         return
-    raw = (message.text or "").strip()
+    raw = text
     color_name = next((item for item in colors if item.lower() == raw.lower()), None)
     if color_name is None:
         await message.answer(
@@ -12117,10 +12301,8 @@ async def process_generate_led_module_color(message: Message, state: FSMContext)
 
 @dp.message(GenerateLedModuleStates.waiting_for_lens_count)
 async def process_generate_led_module_lens_count(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
     lens_counts = await fetch_led_module_lens_counts()
     if not lens_counts:
         await state.clear()
@@ -12129,7 +12311,7 @@ async def process_generate_led_module_lens_count(
             reply_markup=WAREHOUSE_SETTINGS_LED_MODULES_KB,
         )
         return
-    raw = (message.text or "").strip()
+    raw = text
     parsed = parse_positive_integer(raw)
     if parsed is None or parsed not in lens_counts:
         await message.answer(
@@ -12163,9 +12345,7 @@ async def process_generate_led_module_lens_count(
 
 
 @dp.message(GenerateLedModuleStates.waiting_for_power)
-async def process_generate_led_module_power(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
+async def process_generate_led_module_power(message: Message, state: FSMContext, text: str) -> None:
     power_options = await fetch_led_module_power_options()
     if not power_options:
         await state.clear()
@@ -12174,7 +12354,7 @@ async def process_generate_led_module_power(message: Message, state: FSMContext)
             reply_markup=WAREHOUSE_SETTINGS_LED_MODULES_KB,
         )
         return
-    raw = (message.text or "").strip()
+    raw = text
     power_name = next((item for item in power_options if item.lower() == raw.lower()), None)
     if power_name is None:
         await message.answer(
@@ -12208,9 +12388,7 @@ async def process_generate_led_module_power(message: Message, state: FSMContext)
 
 
 @dp.message(GenerateLedModuleStates.waiting_for_voltage)
-async def process_generate_led_module_voltage(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
+async def process_generate_led_module_voltage(message: Message, state: FSMContext, text: str) -> None:
     voltage_options = await fetch_led_module_voltage_options()
     if not voltage_options:
         await state.clear()
@@ -12219,7 +12397,7 @@ async def process_generate_led_module_voltage(message: Message, state: FSMContex
             reply_markup=WAREHOUSE_SETTINGS_LED_MODULES_KB,
         )
         return
-    raw = (message.text or "").strip()
+    raw = text
     voltage_name = next((item for item in voltage_options if item.lower() == raw.lower()), None)
     if voltage_name is None:
         await message.answer(
@@ -12281,10 +12459,8 @@ async def process_generate_led_module_voltage(message: Message, state: FSMContex
     )
 
 
-@dp.message(F.text == LED_MODULES_DELETE_TEXT)
+@menu_button(LED_MODULES_DELETE_TEXT, admin_only=True)
 async def handle_delete_led_module(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await message.answer(
         "🗑️ Удаление Led модуля находится в разработке.",
@@ -12292,18 +12468,14 @@ async def handle_delete_led_module(message: Message, state: FSMContext) -> None:
     )
 
 
-@dp.message(F.text == POWER_SUPPLIES_BASE_MENU_TEXT)
+@menu_button(POWER_SUPPLIES_BASE_MENU_TEXT, admin_only=True)
 async def handle_power_supply_base_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_power_supply_base_menu(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_GENERATE_TEXT)
+@menu_button(POWER_SUPPLIES_GENERATE_TEXT, admin_only=True)
 async def handle_generate_power_supply(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     manufacturers_with_series = [
         item
@@ -12339,10 +12511,8 @@ async def handle_generate_power_supply(message: Message, state: FSMContext) -> N
 
 
 @dp.message(GeneratePowerSupplyStates.waiting_for_article)
-async def process_generate_power_supply_article(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    article = (message.text or "").strip()
+async def process_generate_power_supply_article(message: Message, state: FSMContext, text: str) -> None:
+    article = text
     if not article:
         await message.answer(
             "⚠️ Артикул не может быть пустым. Попробуйте снова.",
@@ -12381,10 +12551,8 @@ async def process_generate_power_supply_article(message: Message, state: FSMCont
 
 @dp.message(GeneratePowerSupplyStates.waiting_for_manufacturer)
 async def process_generate_power_supply_manufacturer(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
     manufacturers_with_series = [
         item
         for item in await fetch_power_supply_manufacturers_with_series()
@@ -12398,7 +12566,7 @@ async def process_generate_power_supply_manufacturer(
         )
         return
     manufacturer_names = [item["name"] for item in manufacturers_with_series]
-    raw = (message.text or "").strip()
+    raw = text
     match = next(
         (item for item in manufacturers_with_series if item["name"].lower() == raw.lower()),
         None,
@@ -12427,9 +12595,7 @@ async def process_generate_power_supply_manufacturer(
 
 
 @dp.message(GeneratePowerSupplyStates.waiting_for_series)
-async def process_generate_power_supply_series(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
+async def process_generate_power_supply_series(message: Message, state: FSMContext, text: str) -> None:
     data = await state.get_data()
     manufacturer: Optional[dict[str, Any]] = data.get("generated_power_supply_manufacturer")
     if not manufacturer:
@@ -12447,7 +12613,7 @@ async def process_generate_power_supply_series(message: Message, state: FSMConte
             reply_markup=WAREHOUSE_SETTINGS_POWER_SUPPLIES_KB,
         )
         return
-    raw = (message.text or "").strip()
+    raw = text
     series_name = next((item for item in series_names if item.lower() == raw.lower()), None)
     if series_name is None:
         await message.answer(
@@ -12479,9 +12645,7 @@ async def process_generate_power_supply_series(message: Message, state: FSMConte
 
 
 @dp.message(GeneratePowerSupplyStates.waiting_for_power)
-async def process_generate_power_supply_power(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
+async def process_generate_power_supply_power(message: Message, state: FSMContext, text: str) -> None:
     power_options = await fetch_power_supply_power_options()
     if not power_options:
         await state.clear()
@@ -12490,7 +12654,7 @@ async def process_generate_power_supply_power(message: Message, state: FSMContex
             reply_markup=WAREHOUSE_SETTINGS_POWER_SUPPLIES_KB,
         )
         return
-    raw = (message.text or "").strip()
+    raw = text
     power_name = next((item for item in power_options if item.lower() == raw.lower()), None)
     if power_name is None:
         await message.answer(
@@ -12522,9 +12686,7 @@ async def process_generate_power_supply_power(message: Message, state: FSMContex
 
 
 @dp.message(GeneratePowerSupplyStates.waiting_for_voltage)
-async def process_generate_power_supply_voltage(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
+async def process_generate_power_supply_voltage(message: Message, state: FSMContext, text: str) -> None:
     voltage_options = await fetch_power_supply_voltage_options()
     if not voltage_options:
         await state.clear()
@@ -12533,7 +12695,7 @@ async def process_generate_power_supply_voltage(message: Message, state: FSMCont
             reply_markup=WAREHOUSE_SETTINGS_POWER_SUPPLIES_KB,
         )
         return
-    raw = (message.text or "").strip()
+    raw = text
     voltage_name = next((item for item in voltage_options if item.lower() == raw.lower()), None)
     if voltage_name is None:
         await message.answer(
@@ -12565,9 +12727,7 @@ async def process_generate_power_supply_voltage(message: Message, state: FSMCont
 
 
 @dp.message(GeneratePowerSupplyStates.waiting_for_ip)
-async def process_generate_power_supply_ip(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
+async def process_generate_power_supply_ip(message: Message, state: FSMContext, text: str) -> None:
     ip_options = await fetch_power_supply_ip_options()
     if not ip_options:
         await state.clear()
@@ -12576,7 +12736,7 @@ async def process_generate_power_supply_ip(message: Message, state: FSMContext)
             reply_markup=WAREHOUSE_SETTINGS_POWER_SUPPLIES_KB,
         )
         return
-    raw = (message.text or "").strip()
+    raw = text
     ip_name = next((item for item in ip_options if item.lower() == raw.lower()), None)
     if ip_name is None:
         await message.answer(
@@ -12639,10 +12799,8 @@ async def process_generate_power_supply_ip(message: Message, state: FSMContext)
     )
 
 
-@dp.message(F.text == POWER_SUPPLIES_DELETE_TEXT)
+@menu_button(POWER_SUPPLIES_DELETE_TEXT, admin_only=True)
 async def handle_delete_power_supply(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await state.set_state(
         ManagePowerSupplyBaseStates.waiting_for_article_to_delete
@@ -12651,10 +12809,8 @@ async def handle_delete_power_supply(message: Message, state: FSMContext) -> Non
 
 
 @dp.message(ManagePowerSupplyBaseStates.waiting_for_article_to_delete)
-async def process_delete_power_supply(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    article = (message.text or "").strip()
+async def process_delete_power_supply(message: Message, state: FSMContext, text: str) -> None:
+    article = text
     if not article:
         await message.answer("⚠️ Укажите артикул блока питания из списка.")
         await send_power_supply_deletion_prompt(message, state)
@@ -12685,84 +12841,56 @@ async def process_delete_power_supply(message: Message, state: FSMContext) -> No
     await send_power_supply_base_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_BACK_TEXT)
-async def handle_back_to_led_module_settings(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_MODULES_BACK_TEXT, admin_only=True)
+async def handle_back_to_led_module_settings(message: Message, state: FSMContext) -> None:
     await state.clear()
     await send_led_modules_settings_overview(message)
 
 
-@dp.message(F.text == WAREHOUSE_SETTINGS_ELECTRICS_POWER_SUPPLIES_TEXT)
-async def handle_warehouse_settings_power_supplies(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(WAREHOUSE_SETTINGS_ELECTRICS_POWER_SUPPLIES_TEXT, admin_only=True)
+async def handle_warehouse_settings_power_supplies(message: Message, state: FSMContext) -> None:
     await state.clear()
     await send_power_supplies_settings_overview(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_MANUFACTURERS_MENU_TEXT)
-async def handle_power_supply_manufacturers_menu(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_MANUFACTURERS_MENU_TEXT, admin_only=True)
+async def handle_power_supply_manufacturers_menu(message: Message, state: FSMContext) -> None:
     await state.clear()
     await send_power_supply_manufacturers_menu(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_SERIES_MENU_TEXT)
+@menu_button(POWER_SUPPLIES_SERIES_MENU_TEXT, admin_only=True)
 async def handle_power_supply_series_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_power_supply_series_menu(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_POWER_MENU_TEXT)
+@menu_button(POWER_SUPPLIES_POWER_MENU_TEXT, admin_only=True)
 async def handle_power_supply_power_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_power_supply_power_menu(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_VOLTAGE_MENU_TEXT)
+@menu_button(POWER_SUPPLIES_VOLTAGE_MENU_TEXT, admin_only=True)
 async def handle_power_supply_voltage_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_power_supply_voltage_menu(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_IP_MENU_TEXT)
+@menu_button(POWER_SUPPLIES_IP_MENU_TEXT, admin_only=True)
 async def handle_power_supply_ip_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_power_supply_ip_menu(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_BACK_TEXT)
-async def handle_back_to_power_supply_settings(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_BACK_TEXT, admin_only=True)
+async def handle_back_to_power_supply_settings(message: Message, state: FSMContext) -> None:
     await state.clear()
     await send_power_supplies_settings_overview(message)
 
 
-@dp.message(F.text == LED_STRIPS_ADD_MANUFACTURER_TEXT)
-async def handle_add_led_strip_manufacturer(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_STRIPS_ADD_MANUFACTURER_TEXT, admin_only=True)
+async def handle_add_led_strip_manufacturer(message: Message, state: FSMContext) -> None:
     await state.set_state(
         ManageLedStripManufacturerStates.waiting_for_new_manufacturer_name
     )
@@ -12777,13 +12905,11 @@ async def handle_add_led_strip_manufacturer(
 
 @dp.message(ManageLedStripManufacturerStates.waiting_for_new_manufacturer_name)
 async def process_new_led_strip_manufacturer(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await insert_led_strip_manufacturer(name):
         await message.answer(f"✅ Производитель «{name}» добавлен.")
@@ -12793,12 +12919,8 @@ async def process_new_led_strip_manufacturer(
     await send_led_strips_settings_overview(message)
 
 
-@dp.message(F.text == LED_STRIPS_REMOVE_MANUFACTURER_TEXT)
-async def handle_remove_led_strip_manufacturer(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_STRIPS_REMOVE_MANUFACTURER_TEXT, admin_only=True)
+async def handle_remove_led_strip_manufacturer(message: Message, state: FSMContext) -> None:
     manufacturers = await fetch_led_strip_manufacturers()
     if not manufacturers:
         await message.answer(
@@ -12818,13 +12940,11 @@ async def handle_remove_led_strip_manufacturer(
 
 @dp.message(ManageLedStripManufacturerStates.waiting_for_manufacturer_name_to_delete)
 async def process_remove_led_strip_manufacturer(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await delete_led_strip_manufacturer(name):
         await message.answer(f"🗑 Производитель «{name}» удалён.")
@@ -12834,10 +12954,8 @@ async def process_remove_led_strip_manufacturer(
     await send_led_strips_settings_overview(message)
 
 
-@dp.message(F.text == LED_STRIPS_ADD_SERIES_TEXT)
+@menu_button(LED_STRIPS_ADD_SERIES_TEXT, admin_only=True)
 async def handle_add_led_strip_series(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     manufacturers = await fetch_led_strip_manufacturers()
     if not manufacturers:
         await message.answer(
@@ -12857,11 +12975,9 @@ async def handle_add_led_strip_series(message: Message, state: FSMContext) -> No
 
 @dp.message(ManageLedStripSeriesStates.waiting_for_manufacturer_for_new_series)
 async def process_choose_led_strip_manufacturer_for_new_series(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    manufacturer_name = (message.text or "").strip()
+    manufacturer_name = text
     manufacturer = await get_led_strip_manufacturer_by_name(manufacturer_name)
     if manufacturer is None:
         manufacturers = await fetch_led_strip_manufacturers()
@@ -12890,11 +13006,9 @@ async def process_choose_led_strip_manufacturer_for_new_series(
 
 @dp.message(ManageLedStripSeriesStates.waiting_for_new_series_name)
 async def process_new_led_strip_series_name(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    series_name = (message.text or "").strip()
+    series_name = text
     if not series_name:
         await message.answer("⚠️ Название серии не может быть пустым. Попробуйте снова.")
         return
@@ -12929,10 +13043,8 @@ async def process_new_led_strip_series_name(
     await send_led_strips_settings_overview(message)
 
 
-@dp.message(F.text == LED_STRIPS_REMOVE_SERIES_TEXT)
+@menu_button(LED_STRIPS_REMOVE_SERIES_TEXT, admin_only=True)
 async def handle_remove_led_strip_series(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     manufacturers = await fetch_led_strip_manufacturers_with_series()
     manufacturers_with_series = [
         item["name"] for item in manufacturers if item.get("series")
@@ -12957,11 +13069,9 @@ async def handle_remove_led_strip_series(message: Message, state: FSMContext) ->
     ManageLedStripSeriesStates.waiting_for_manufacturer_for_series_deletion
 )
 async def process_choose_led_strip_manufacturer_for_series_deletion(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    manufacturer_name = (message.text or "").strip()
+    manufacturer_name = text
     manufacturer = await get_led_strip_manufacturer_by_name(manufacturer_name)
     if manufacturer is None:
         manufacturers = await fetch_led_strip_manufacturers_with_series()
@@ -13010,11 +13120,9 @@ async def process_choose_led_strip_manufacturer_for_series_deletion(
 
 @dp.message(ManageLedStripSeriesStates.waiting_for_series_name_to_delete)
 async def process_remove_led_strip_series(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    series_name = (message.text or "").strip()
+    series_name = text
     if not series_name:
         await message.answer("⚠️ Название серии не может быть пустым. Попробуйте снова.")
         return
@@ -13045,10 +13153,8 @@ async def process_remove_led_strip_series(
     await send_led_strips_settings_overview(message)
 
 
-@dp.message(F.text == LED_STRIPS_ADD_COLOR_TEXT)
+@menu_button(LED_STRIPS_ADD_COLOR_TEXT, admin_only=True)
 async def handle_add_led_strip_color(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageLedStripColorStates.waiting_for_new_color_value)
     colors = await fetch_led_strip_colors()
     existing_text = format_materials_list(colors)
@@ -13060,12 +13166,10 @@ async def handle_add_led_strip_color(message: Message, state: FSMContext) -> Non
 
 
 @dp.message(ManageLedStripColorStates.waiting_for_new_color_value)
-async def process_new_led_strip_color(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    color_value = (message.text or "").strip()
+async def process_new_led_strip_color(message: Message, state: FSMContext, text: str) -> None:
+    color_value = text
     if not color_value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await insert_led_strip_color_option(color_value):
         await message.answer(f"✅ Цвет «{color_value}» добавлен.")
@@ -13075,10 +13179,8 @@ async def process_new_led_strip_color(message: Message, state: FSMContext) -> No
     await send_led_strips_colors_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_REMOVE_COLOR_TEXT)
+@menu_button(LED_STRIPS_REMOVE_COLOR_TEXT, admin_only=True)
 async def handle_remove_led_strip_color(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     colors = await fetch_led_strip_colors()
     if not colors:
         await message.answer(
@@ -13095,12 +13197,10 @@ async def handle_remove_led_strip_color(message: Message, state: FSMContext) ->
 
 
 @dp.message(ManageLedStripColorStates.waiting_for_color_value_to_delete)
-async def process_remove_led_strip_color(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    color_value = (message.text or "").strip()
+async def process_remove_led_strip_color(message: Message, state: FSMContext, text: str) -> None:
+    color_value = text
     if not color_value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await delete_led_strip_color_option(color_value):
         await message.answer(f"🗑 Цвет «{color_value}» удалён.")
@@ -13110,10 +13210,8 @@ async def process_remove_led_strip_color(message: Message, state: FSMContext) ->
     await send_led_strips_colors_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_ADD_CUT_TEXT)
+@menu_button(LED_STRIPS_ADD_CUT_TEXT, admin_only=True)
 async def handle_add_led_strip_cut_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageLedStripCutStates.waiting_for_new_cut_value)
     existing = await fetch_led_strip_cut_options()
     existing_text = format_materials_list(existing)
@@ -13125,12 +13223,10 @@ async def handle_add_led_strip_cut_option(message: Message, state: FSMContext) -
 
 
 @dp.message(ManageLedStripCutStates.waiting_for_new_cut_value)
-async def process_new_led_strip_cut_option(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+async def process_new_led_strip_cut_option(message: Message, state: FSMContext, text: str) -> None:
+    value = text
     if not value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await insert_led_strip_cut_option(value):
         await message.answer(f"✅ Кратность реза «{value}» добавлена.")
@@ -13140,10 +13236,8 @@ async def process_new_led_strip_cut_option(message: Message, state: FSMContext)
     await send_led_strips_cut_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_REMOVE_CUT_TEXT)
+@menu_button(LED_STRIPS_REMOVE_CUT_TEXT, admin_only=True)
 async def handle_remove_led_strip_cut_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     existing = await fetch_led_strip_cut_options()
     if not existing:
         await message.answer(
@@ -13160,12 +13254,10 @@ async def handle_remove_led_strip_cut_option(message: Message, state: FSMContext
 
 
 @dp.message(ManageLedStripCutStates.waiting_for_cut_value_to_delete)
-async def process_remove_led_strip_cut_option(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+async def process_remove_led_strip_cut_option(message: Message, state: FSMContext, text: str) -> None:
+    value = text
     if not value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await delete_led_strip_cut_option(value):
         await message.answer(f"🗑 Кратность реза «{value}» удалена.")
@@ -13175,10 +13267,8 @@ async def process_remove_led_strip_cut_option(message: Message, state: FSMContex
     await send_led_strips_cut_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_ADD_TYPE_TEXT)
+@menu_button(LED_STRIPS_ADD_TYPE_TEXT, admin_only=True)
 async def handle_add_led_strip_type_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageLedStripTypeStates.waiting_for_new_type_value)
     existing = await fetch_led_strip_type_options()
     existing_text = format_materials_list(existing)
@@ -13190,12 +13280,10 @@ async def handle_add_led_strip_type_option(message: Message, state: FSMContext)
 
 
 @dp.message(ManageLedStripTypeStates.waiting_for_new_type_value)
-async def process_new_led_strip_type_option(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+async def process_new_led_strip_type_option(message: Message, state: FSMContext, text: str) -> None:
+    value = text
     if not value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await insert_led_strip_type_option(value):
         await message.answer(f"✅ Тип «{value}» добавлен.")
@@ -13205,10 +13293,8 @@ async def process_new_led_strip_type_option(message: Message, state: FSMContext)
     await send_led_strips_type_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_REMOVE_TYPE_TEXT)
+@menu_button(LED_STRIPS_REMOVE_TYPE_TEXT, admin_only=True)
 async def handle_remove_led_strip_type_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     existing = await fetch_led_strip_type_options()
     if not existing:
         await message.answer(
@@ -13225,12 +13311,10 @@ async def handle_remove_led_strip_type_option(message: Message, state: FSMContex
 
 
 @dp.message(ManageLedStripTypeStates.waiting_for_type_value_to_delete)
-async def process_remove_led_strip_type_option(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+async def process_remove_led_strip_type_option(message: Message, state: FSMContext, text: str) -> None:
+    value = text
     if not value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await delete_led_strip_type_option(value):
         await message.answer(f"🗑 Тип «{value}» удалён.")
@@ -13240,10 +13324,8 @@ async def process_remove_led_strip_type_option(message: Message, state: FSMConte
     await send_led_strips_type_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_ADD_BUS_TEXT)
+@menu_button(LED_STRIPS_ADD_BUS_TEXT, admin_only=True)
 async def handle_add_led_strip_bus_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageLedStripBusStates.waiting_for_new_bus_value)
     existing = await fetch_led_strip_bus_options()
     existing_text = format_materials_list(existing)
@@ -13255,12 +13337,10 @@ async def handle_add_led_strip_bus_option(message: Message, state: FSMContext) -
 
 
 @dp.message(ManageLedStripBusStates.waiting_for_new_bus_value)
-async def process_new_led_strip_bus_option(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+async def process_new_led_strip_bus_option(message: Message, state: FSMContext, text: str) -> None:
+    value = text
     if not value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await insert_led_strip_bus_option(value):
         await message.answer(f"✅ Шина «{value}» добавлена.")
@@ -13270,10 +13350,8 @@ async def process_new_led_strip_bus_option(message: Message, state: FSMContext)
     await send_led_strips_bus_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_REMOVE_BUS_TEXT)
+@menu_button(LED_STRIPS_REMOVE_BUS_TEXT, admin_only=True)
 async def handle_remove_led_strip_bus_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     existing = await fetch_led_strip_bus_options()
     if not existing:
         await message.answer(
@@ -13290,12 +13368,10 @@ async def handle_remove_led_strip_bus_option(message: Message, state: FSMContext
 
 
 @dp.message(ManageLedStripBusStates.waiting_for_bus_value_to_delete)
-async def process_remove_led_strip_bus_option(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+async def process_remove_led_strip_bus_option(message: Message, state: FSMContext, text: str) -> None:
+    value = text
     if not value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await delete_led_strip_bus_option(value):
         await message.answer(f"🗑 Значение «{value}» удалено.")
@@ -13305,10 +13381,8 @@ async def process_remove_led_strip_bus_option(message: Message, state: FSMContex
     await send_led_strips_bus_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_ADD_LED_COUNT_TEXT)
+@menu_button(LED_STRIPS_ADD_LED_COUNT_TEXT, admin_only=True)
 async def handle_add_led_strip_led_count(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageLedStripLedCountStates.waiting_for_new_led_count)
     existing = await fetch_led_strip_led_counts()
     existing_text = format_materials_list([str(value) for value in existing])
@@ -13321,8 +13395,6 @@ async def handle_add_led_strip_led_count(message: Message, state: FSMContext) ->
 
 @dp.message(ManageLedStripLedCountStates.waiting_for_new_led_count)
 async def process_new_led_strip_led_count(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
     value = parse_positive_integer(message.text or "")
     if value is None:
         await message.answer(
@@ -13338,10 +13410,8 @@ async def process_new_led_strip_led_count(message: Message, state: FSMContext) -
     await send_led_strips_led_count_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_REMOVE_LED_COUNT_TEXT)
+@menu_button(LED_STRIPS_REMOVE_LED_COUNT_TEXT, admin_only=True)
 async def handle_remove_led_strip_led_count(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     existing = await fetch_led_strip_led_counts()
     if not existing:
         await message.answer(
@@ -13359,8 +13429,6 @@ async def handle_remove_led_strip_led_count(message: Message, state: FSMContext)
 
 @dp.message(ManageLedStripLedCountStates.waiting_for_led_count_to_delete)
 async def process_remove_led_strip_led_count(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
     value = parse_positive_integer(message.text or "")
     if value is None:
         await message.answer(
@@ -13379,10 +13447,8 @@ async def process_remove_led_strip_led_count(message: Message, state: FSMContext
         )
 
 
-@dp.message(F.text == LED_STRIPS_ADD_VOLTAGE_TEXT)
+@menu_button(LED_STRIPS_ADD_VOLTAGE_TEXT, admin_only=True)
 async def handle_add_led_strip_voltage_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageLedStripVoltageStates.waiting_for_new_voltage_value)
     existing = await fetch_led_strip_voltage_options()
     existing_text = format_materials_list(existing)
@@ -13394,12 +13460,10 @@ async def handle_add_led_strip_voltage_option(message: Message, state: FSMContex
 
 
 @dp.message(ManageLedStripVoltageStates.waiting_for_new_voltage_value)
-async def process_new_led_strip_voltage_option(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+async def process_new_led_strip_voltage_option(message: Message, state: FSMContext, text: str) -> None:
+    value = text
     if not value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await insert_led_strip_voltage_option(value):
         await message.answer(f"✅ Напряжение «{value}» добавлено.")
@@ -13409,10 +13473,8 @@ async def process_new_led_strip_voltage_option(message: Message, state: FSMConte
     await send_led_strips_voltage_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_REMOVE_VOLTAGE_TEXT)
+@menu_button(LED_STRIPS_REMOVE_VOLTAGE_TEXT, admin_only=True)
 async def handle_remove_led_strip_voltage_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     existing = await fetch_led_strip_voltage_options()
     if not existing:
         await message.answer(
@@ -13429,12 +13491,10 @@ async def handle_remove_led_strip_voltage_option(message: Message, state: FSMCon
 
 
 @dp.message(ManageLedStripVoltageStates.waiting_for_voltage_value_to_delete)
-async def process_remove_led_strip_voltage_option(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+async def process_remove_led_strip_voltage_option(message: Message, state: FSMContext, text: str) -> None:
+    value = text
     if not value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await delete_led_strip_voltage_option(value):
         await message.answer(f"🗑 Напряжение «{value}» удалено.")
@@ -13444,10 +13504,8 @@ async def process_remove_led_strip_voltage_option(message: Message, state: FSMCo
     await send_led_strips_voltage_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_ADD_IP_TEXT)
+@menu_button(LED_STRIPS_ADD_IP_TEXT, admin_only=True)
 async def handle_add_led_strip_ip_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageLedStripIpStates.waiting_for_new_ip_value)
     existing = await fetch_led_strip_ip_options()
     existing_text = format_materials_list(existing)
@@ -13459,12 +13517,10 @@ async def handle_add_led_strip_ip_option(message: Message, state: FSMContext) ->
 
 
 @dp.message(ManageLedStripIpStates.waiting_for_new_ip_value)
-async def process_new_led_strip_ip_option(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+async def process_new_led_strip_ip_option(message: Message, state: FSMContext, text: str) -> None:
+    value = text
     if not value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await insert_led_strip_ip_option(value):
         await message.answer(f"✅ IP «{value}» добавлен.")
@@ -13474,10 +13530,8 @@ async def process_new_led_strip_ip_option(message: Message, state: FSMContext) -
     await send_led_strips_ip_menu(message)
 
 
-@dp.message(F.text == LED_STRIPS_REMOVE_IP_TEXT)
+@menu_button(LED_STRIPS_REMOVE_IP_TEXT, admin_only=True)
 async def handle_remove_led_strip_ip_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     existing = await fetch_led_strip_ip_options()
     if not existing:
         await message.answer(
@@ -13494,12 +13548,10 @@ async def handle_remove_led_strip_ip_option(message: Message, state: FSMContext)
 
 
 @dp.message(ManageLedStripIpStates.waiting_for_ip_value_to_delete)
-async def process_remove_led_strip_ip_option(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+async def process_remove_led_strip_ip_option(message: Message, state: FSMContext, text: str) -> None:
+    value = text
     if not value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await delete_led_strip_ip_option(value):
         await message.answer(f"🗑 IP «{value}» удалён.")
@@ -13509,12 +13561,8 @@ async def process_remove_led_strip_ip_option(message: Message, state: FSMContext
     await send_led_strips_ip_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_ADD_MANUFACTURER_TEXT)
-async def handle_add_led_module_manufacturer(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_MODULES_ADD_MANUFACTURER_TEXT, admin_only=True)
+async def handle_add_led_module_manufacturer(message: Message, state: FSMContext) -> None:
     await state.set_state(
         ManageLedModuleManufacturerStates.waiting_for_new_manufacturer_name
     )
@@ -13529,13 +13577,11 @@ async def handle_add_led_module_manufacturer(
 
 @dp.message(ManageLedModuleManufacturerStates.waiting_for_new_manufacturer_name)
 async def process_new_led_module_manufacturer(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await insert_led_module_manufacturer(name):
         await message.answer(f"✅ Производитель «{name}» добавлен.")
@@ -13545,12 +13591,8 @@ async def process_new_led_module_manufacturer(
     await send_led_modules_settings_overview(message)
 
 
-@dp.message(F.text == LED_MODULES_REMOVE_MANUFACTURER_TEXT)
-async def handle_remove_led_module_manufacturer(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_MODULES_REMOVE_MANUFACTURER_TEXT, admin_only=True)
+async def handle_remove_led_module_manufacturer(message: Message, state: FSMContext) -> None:
     manufacturers = await fetch_led_module_manufacturers()
     if not manufacturers:
         await message.answer(
@@ -13568,12 +13610,8 @@ async def handle_remove_led_module_manufacturer(
     )
 
 
-@dp.message(F.text == LED_MODULES_ADD_STORAGE_TEXT)
-async def handle_add_led_module_storage_location(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_MODULES_ADD_STORAGE_TEXT, admin_only=True)
+async def handle_add_led_module_storage_location(message: Message, state: FSMContext) -> None:
     await state.set_state(
         ManageLedModuleStorageStates.waiting_for_new_storage_location_name
     )
@@ -13588,13 +13626,11 @@ async def handle_add_led_module_storage_location(
 
 @dp.message(ManageLedModuleStorageStates.waiting_for_new_storage_location_name)
 async def process_new_led_module_storage_location(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await insert_led_module_storage_location(name):
         await message.answer(f"✅ Место хранения «{name}» добавлено.")
@@ -13604,12 +13640,8 @@ async def process_new_led_module_storage_location(
     await send_led_module_storage_overview(message)
 
 
-@dp.message(F.text == LED_MODULES_REMOVE_STORAGE_TEXT)
-async def handle_remove_led_module_storage_location(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_MODULES_REMOVE_STORAGE_TEXT, admin_only=True)
+async def handle_remove_led_module_storage_location(message: Message, state: FSMContext) -> None:
     locations = await fetch_led_module_storage_locations()
     if not locations:
         await message.answer(
@@ -13629,13 +13661,11 @@ async def handle_remove_led_module_storage_location(
 
 @dp.message(ManageLedModuleStorageStates.waiting_for_storage_location_to_delete)
 async def process_remove_led_module_storage_location(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await delete_led_module_storage_location(name):
         await message.answer(f"🗑 Место хранения «{name}» удалено.")
@@ -13647,13 +13677,11 @@ async def process_remove_led_module_storage_location(
 
 @dp.message(ManageLedModuleManufacturerStates.waiting_for_manufacturer_name_to_delete)
 async def process_remove_led_module_manufacturer(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await delete_led_module_manufacturer(name):
         await message.answer(f"🗑 Производитель «{name}» удалён.")
@@ -13663,10 +13691,8 @@ async def process_remove_led_module_manufacturer(
     await send_led_modules_settings_overview(message)
 
 
-@dp.message(F.text == LED_MODULES_ADD_COLOR_TEXT)
+@menu_button(LED_MODULES_ADD_COLOR_TEXT, admin_only=True)
 async def handle_add_led_module_color(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageLedModuleColorStates.waiting_for_new_color_name)
     colors = await fetch_led_module_colors()
     existing_text = format_materials_list(colors)
@@ -13678,10 +13704,8 @@ async def handle_add_led_module_color(message: Message, state: FSMContext) -> No
 
 
 @dp.message(ManageLedModuleColorStates.waiting_for_new_color_name)
-async def process_new_led_module_color(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    color_name = (message.text or "").strip()
+async def process_new_led_module_color(message: Message, state: FSMContext, text: str) -> None:
+    color_name = text
     if not color_name:
         await message.answer("⚠️ Название цвета не может быть пустым. Попробуйте снова.")
         return
@@ -13693,10 +13717,8 @@ async def process_new_led_module_color(message: Message, state: FSMContext) -> N
     await send_led_module_colors_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_ADD_POWER_TEXT)
+@menu_button(LED_MODULES_ADD_POWER_TEXT, admin_only=True)
 async def handle_add_led_module_power_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageLedModulePowerStates.waiting_for_new_power_value)
     existing = await fetch_led_module_power_options()
     existing_text = format_materials_list(existing)
@@ -13709,13 +13731,11 @@ async def handle_add_led_module_power_option(message: Message, state: FSMContext
 
 @dp.message(ManageLedModulePowerStates.waiting_for_new_power_value)
 async def process_new_led_module_power_option(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+    value = text
     if not value:
-        await message.answer("⚠️ Значение не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_VALUE_REPLY)
         return
     if await insert_led_module_power_option(value):
         await message.answer(f"✅ Мощность «{value}» добавлена.")
@@ -13725,10 +13745,8 @@ async def process_new_led_module_power_option(
     await send_led_module_power_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_ADD_VOLTAGE_TEXT)
+@menu_button(LED_MODULES_ADD_VOLTAGE_TEXT, admin_only=True)
 async def handle_add_led_module_voltage_option(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageLedModuleVoltageStates.waiting_for_new_voltage_value)
     existing = await fetch_led_module_voltage_options()
     existing_text = format_materials_list(existing)
@@ -13741,11 +13759,9 @@ async def handle_add_led_module_voltage_option(message: Message, state: FSMConte
 
 @dp.message(ManageLedModuleVoltageStates.waiting_for_new_voltage_value)
 async def process_new_led_module_voltage_option(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+    value = text
     if not value:
         await message.answer(
             "⚠️ Значение не может быть пустым. Попробуйте снова.",
@@ -13760,10 +13776,8 @@ async def process_new_led_module_voltage_option(
     await send_led_module_voltage_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_REMOVE_COLOR_TEXT)
+@menu_button(LED_MODULES_REMOVE_COLOR_TEXT, admin_only=True)
 async def handle_remove_led_module_color(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     colors = await fetch_led_module_colors()
     if not colors:
         await message.answer(
@@ -13780,10 +13794,8 @@ async def handle_remove_led_module_color(message: Message, state: FSMContext) ->
 
 
 @dp.message(ManageLedModuleColorStates.waiting_for_color_name_to_delete)
-async def process_remove_led_module_color(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    color_name = (message.text or "").strip()
+async def process_remove_led_module_color(message: Message, state: FSMContext, text: str) -> None:
+    color_name = text
     if not color_name:
         await message.answer("⚠️ Название цвета не может быть пустым. Попробуйте снова.")
         return
@@ -13795,12 +13807,8 @@ async def process_remove_led_module_color(message: Message, state: FSMContext) -
     await send_led_module_colors_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_REMOVE_POWER_TEXT)
-async def handle_remove_led_module_power_option(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_MODULES_REMOVE_POWER_TEXT, admin_only=True)
+async def handle_remove_led_module_power_option(message: Message, state: FSMContext) -> None:
     power_options = await fetch_led_module_power_options()
     if not power_options:
         await message.answer(
@@ -13818,11 +13826,9 @@ async def handle_remove_led_module_power_option(
 
 @dp.message(ManageLedModulePowerStates.waiting_for_power_value_to_delete)
 async def process_remove_led_module_power_option(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+    value = text
     if not value:
         await message.answer(
             "⚠️ Значение не может быть пустым. Попробуйте снова.",
@@ -13840,12 +13846,8 @@ async def process_remove_led_module_power_option(
         )
 
 
-@dp.message(F.text == LED_MODULES_REMOVE_VOLTAGE_TEXT)
-async def handle_remove_led_module_voltage_option(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_MODULES_REMOVE_VOLTAGE_TEXT, admin_only=True)
+async def handle_remove_led_module_voltage_option(message: Message, state: FSMContext) -> None:
     voltage_options = await fetch_led_module_voltage_options()
     if not voltage_options:
         await message.answer(
@@ -13865,11 +13867,9 @@ async def handle_remove_led_module_voltage_option(
 
 @dp.message(ManageLedModuleVoltageStates.waiting_for_voltage_value_to_delete)
 async def process_remove_led_module_voltage_option(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+    value = text
     if not value:
         await message.answer(
             "⚠️ Значение не может быть пустым. Попробуйте снова.",
@@ -13887,10 +13887,8 @@ async def process_remove_led_module_voltage_option(
         )
 
 
-@dp.message(F.text == LED_MODULES_ADD_LENS_COUNT_TEXT)
+@menu_button(LED_MODULES_ADD_LENS_COUNT_TEXT, admin_only=True)
 async def handle_add_led_module_lens_count(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManageLedModuleLensStates.waiting_for_new_lens_count)
     existing = await fetch_led_module_lens_counts()
     existing_text = format_materials_list([str(value) for value in existing])
@@ -13905,8 +13903,6 @@ async def handle_add_led_module_lens_count(message: Message, state: FSMContext)
 async def process_new_led_module_lens_count(
     message: Message, state: FSMContext
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
     value = parse_positive_integer(message.text or "")
     if value is None:
         await message.answer(
@@ -13922,12 +13918,8 @@ async def process_new_led_module_lens_count(
     await send_led_module_lens_menu(message)
 
 
-@dp.message(F.text == LED_MODULES_REMOVE_LENS_COUNT_TEXT)
-async def handle_remove_led_module_lens_count(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(LED_MODULES_REMOVE_LENS_COUNT_TEXT, admin_only=True)
+async def handle_remove_led_module_lens_count(message: Message, state: FSMContext) -> None:
     existing = await fetch_led_module_lens_counts()
     if not existing:
         await message.answer(
@@ -13947,8 +13939,6 @@ async def handle_remove_led_module_lens_count(
 async def process_remove_led_module_lens_count(
     message: Message, state: FSMContext
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
     value = parse_positive_integer(message.text or "")
     if value is None:
         await message.answer(
@@ -13967,10 +13957,8 @@ async def process_remove_led_module_lens_count(
         )
 
 
-@dp.message(F.text == LED_MODULES_ADD_SERIES_TEXT)
+@menu_button(LED_MODULES_ADD_SERIES_TEXT, admin_only=True)
 async def handle_add_led_module_series(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     manufacturers = await fetch_led_module_manufacturers()
     if not manufacturers:
         await state.clear()
@@ -13990,11 +13978,9 @@ async def handle_add_led_module_series(message: Message, state: FSMContext) -> N
 
 @dp.message(ManageLedModuleSeriesStates.waiting_for_manufacturer_for_new_series)
 async def process_choose_led_module_manufacturer_for_series(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    manufacturer_name = (message.text or "").strip()
+    manufacturer_name = text
     manufacturer = await get_led_module_manufacturer_by_name(manufacturer_name)
     if manufacturer is None:
         manufacturers = await fetch_led_module_manufacturers()
@@ -14024,10 +14010,8 @@ async def process_choose_led_module_manufacturer_for_series(
 
 
 @dp.message(ManageLedModuleSeriesStates.waiting_for_new_series_name)
-async def process_new_led_module_series(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    series_name = (message.text or "").strip()
+async def process_new_led_module_series(message: Message, state: FSMContext, text: str) -> None:
+    series_name = text
     if not series_name:
         await message.answer("⚠️ Название серии не может быть пустым. Попробуйте снова.")
         return
@@ -14061,10 +14045,8 @@ async def process_new_led_module_series(message: Message, state: FSMContext) ->
     await send_led_modules_settings_overview(message)
 
 
-@dp.message(F.text == LED_MODULES_REMOVE_SERIES_TEXT)
+@menu_button(LED_MODULES_REMOVE_SERIES_TEXT, admin_only=True)
 async def handle_remove_led_module_series(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     manufacturers = await fetch_led_module_manufacturers_with_series()
     manufacturers_with_series = [
         item["name"] for item in manufacturers if item.get("series")
@@ -14087,11 +14069,9 @@ async def handle_remove_led_module_series(message: Message, state: FSMContext) -
 
 @dp.message(ManageLedModuleSeriesStates.waiting_for_manufacturer_for_series_deletion)
 async def process_choose_led_module_manufacturer_for_series_deletion(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    manufacturer_name = (message.text or "").strip()
+    manufacturer_name = text
     manufacturer = await get_led_module_manufacturer_by_name(manufacturer_name)
     if manufacturer is None:
         manufacturers = await fetch_led_module_manufacturers_with_series()
@@ -14137,10 +14117,8 @@ async def process_choose_led_module_manufacturer_for_series_deletion(
 
 
 @dp.message(ManageLedModuleSeriesStates.waiting_for_series_name_to_delete)
-async def process_remove_led_module_series(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    series_name = (message.text or "").strip()
+async def process_remove_led_module_series(message: Message, state: FSMContext, text: str) -> None:
+    series_name = text
     if not series_name:
         await message.answer("⚠️ Название серии не может быть пустым. Попробуйте снова.")
         return
@@ -14170,12 +14148,8 @@ async def process_remove_led_module_series(message: Message, state: FSMContext)
     await send_led_modules_settings_overview(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_ADD_MANUFACTURER_TEXT)
-async def handle_add_power_supply_manufacturer(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_ADD_MANUFACTURER_TEXT, admin_only=True)
+async def handle_add_power_supply_manufacturer(message: Message, state: FSMContext) -> None:
     await state.set_state(
         ManagePowerSupplyManufacturerStates.waiting_for_new_manufacturer_name
     )
@@ -14190,13 +14164,11 @@ async def handle_add_power_supply_manufacturer(
 
 @dp.message(ManagePowerSupplyManufacturerStates.waiting_for_new_manufacturer_name)
 async def process_new_power_supply_manufacturer(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await insert_power_supply_manufacturer(name):
         await message.answer(f"✅ Производитель «{name}» добавлен.")
@@ -14206,12 +14178,8 @@ async def process_new_power_supply_manufacturer(
     await send_power_supplies_settings_overview(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_REMOVE_MANUFACTURER_TEXT)
-async def handle_remove_power_supply_manufacturer(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_REMOVE_MANUFACTURER_TEXT, admin_only=True)
+async def handle_remove_power_supply_manufacturer(message: Message, state: FSMContext) -> None:
     manufacturers = await fetch_power_supply_manufacturers()
     if not manufacturers:
         await message.answer(
@@ -14233,13 +14201,11 @@ async def handle_remove_power_supply_manufacturer(
     ManagePowerSupplyManufacturerStates.waiting_for_manufacturer_name_to_delete
 )
 async def process_remove_power_supply_manufacturer(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await delete_power_supply_manufacturer(name):
         await message.answer(f"🗑 Производитель «{name}» удалён.")
@@ -14249,12 +14215,8 @@ async def process_remove_power_supply_manufacturer(
     await send_power_supplies_settings_overview(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_ADD_SERIES_TEXT)
-async def handle_add_power_supply_series_button(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_ADD_SERIES_TEXT, admin_only=True)
+async def handle_add_power_supply_series_button(message: Message, state: FSMContext) -> None:
     manufacturers = await fetch_power_supply_manufacturers()
     if not manufacturers:
         await message.answer(
@@ -14274,11 +14236,9 @@ async def handle_add_power_supply_series_button(
 
 @dp.message(ManagePowerSupplySeriesStates.waiting_for_manufacturer_for_new_series)
 async def process_choose_power_supply_manufacturer_for_new_series(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    manufacturer_name = (message.text or "").strip()
+    manufacturer_name = text
     manufacturer = await get_power_supply_manufacturer_by_name(manufacturer_name)
     if manufacturer is None:
         manufacturers = await fetch_power_supply_manufacturers()
@@ -14309,11 +14269,9 @@ async def process_choose_power_supply_manufacturer_for_new_series(
 
 @dp.message(ManagePowerSupplySeriesStates.waiting_for_new_series_name)
 async def process_new_power_supply_series_name(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    series_name = (message.text or "").strip()
+    series_name = text
     if not series_name:
         await message.answer("⚠️ Название серии не может быть пустым. Попробуйте снова.")
         return
@@ -14348,12 +14306,8 @@ async def process_new_power_supply_series_name(
     await send_power_supplies_settings_overview(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_REMOVE_SERIES_TEXT)
-async def handle_remove_power_supply_series_button(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_REMOVE_SERIES_TEXT, admin_only=True)
+async def handle_remove_power_supply_series_button(message: Message, state: FSMContext) -> None:
     manufacturers = await fetch_power_supply_manufacturers_with_series()
     manufacturers_with_series = [
         item["name"] for item in manufacturers if item.get("series")
@@ -14378,11 +14332,9 @@ async def handle_remove_power_supply_series_button(
     ManagePowerSupplySeriesStates.waiting_for_manufacturer_for_series_deletion
 )
 async def process_choose_power_supply_manufacturer_for_series_deletion(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    manufacturer_name = (message.text or "").strip()
+    manufacturer_name = text
     manufacturer = await get_power_supply_manufacturer_by_name(manufacturer_name)
     if manufacturer is None:
         manufacturers = await fetch_power_supply_manufacturers_with_series()
@@ -14431,11 +14383,9 @@ async def process_choose_power_supply_manufacturer_for_series_deletion(
 
 @dp.message(ManagePowerSupplySeriesStates.waiting_for_series_name_to_delete)
 async def process_remove_power_supply_series(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    series_name = (message.text or "").strip()
+    series_name = text
     if not series_name:
         await message.answer("⚠️ Название серии не может быть пустым. Попробуйте снова.")
         return
@@ -14465,12 +14415,8 @@ async def process_remove_power_supply_series(
     await send_power_supplies_settings_overview(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_ADD_POWER_TEXT)
-async def handle_add_power_supply_power_option(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_ADD_POWER_TEXT, admin_only=True)
+async def handle_add_power_supply_power_option(message: Message, state: FSMContext) -> None:
     await state.set_state(
         ManagePowerSupplyPowerStates.waiting_for_new_power_value
     )
@@ -14485,11 +14431,9 @@ async def handle_add_power_supply_power_option(
 
 @dp.message(ManagePowerSupplyPowerStates.waiting_for_new_power_value)
 async def process_new_power_supply_power_option(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+    value = text
     if not value:
         await message.answer(
             "⚠️ Значение не может быть пустым. Попробуйте снова.",
@@ -14504,12 +14448,8 @@ async def process_new_power_supply_power_option(
     await send_power_supply_power_menu(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_REMOVE_POWER_TEXT)
-async def handle_remove_power_supply_power_option(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_REMOVE_POWER_TEXT, admin_only=True)
+async def handle_remove_power_supply_power_option(message: Message, state: FSMContext) -> None:
     power_options = await fetch_power_supply_power_options()
     if not power_options:
         await message.answer(
@@ -14529,11 +14469,9 @@ async def handle_remove_power_supply_power_option(
 
 @dp.message(ManagePowerSupplyPowerStates.waiting_for_power_value_to_delete)
 async def process_remove_power_supply_power_option(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+    value = text
     if not value:
         await message.answer(
             "⚠️ Значение не может быть пустым. Попробуйте снова.",
@@ -14551,12 +14489,8 @@ async def process_remove_power_supply_power_option(
         )
 
 
-@dp.message(F.text == POWER_SUPPLIES_ADD_VOLTAGE_TEXT)
-async def handle_add_power_supply_voltage_option(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_ADD_VOLTAGE_TEXT, admin_only=True)
+async def handle_add_power_supply_voltage_option(message: Message, state: FSMContext) -> None:
     await state.set_state(
         ManagePowerSupplyVoltageStates.waiting_for_new_voltage_value
     )
@@ -14571,11 +14505,9 @@ async def handle_add_power_supply_voltage_option(
 
 @dp.message(ManagePowerSupplyVoltageStates.waiting_for_new_voltage_value)
 async def process_new_power_supply_voltage_option(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+    value = text
     if not value:
         await message.answer(
             "⚠️ Значение не может быть пустым. Попробуйте снова.",
@@ -14590,12 +14522,8 @@ async def process_new_power_supply_voltage_option(
     await send_power_supply_voltage_menu(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_REMOVE_VOLTAGE_TEXT)
-async def handle_remove_power_supply_voltage_option(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_REMOVE_VOLTAGE_TEXT, admin_only=True)
+async def handle_remove_power_supply_voltage_option(message: Message, state: FSMContext) -> None:
     voltage_options = await fetch_power_supply_voltage_options()
     if not voltage_options:
         await message.answer(
@@ -14615,11 +14543,9 @@ async def handle_remove_power_supply_voltage_option(
 
 @dp.message(ManagePowerSupplyVoltageStates.waiting_for_voltage_value_to_delete)
 async def process_remove_power_supply_voltage_option(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+    value = text
     if not value:
         await message.answer(
             "⚠️ Значение не может быть пустым. Попробуйте снова.",
@@ -14637,12 +14563,8 @@ async def process_remove_power_supply_voltage_option(
         )
 
 
-@dp.message(F.text == POWER_SUPPLIES_ADD_IP_TEXT)
-async def handle_add_power_supply_ip_option(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_ADD_IP_TEXT, admin_only=True)
+async def handle_add_power_supply_ip_option(message: Message, state: FSMContext) -> None:
     await state.set_state(ManagePowerSupplyIpStates.waiting_for_new_ip_value)
     existing = await fetch_power_supply_ip_options()
     existing_text = format_materials_list(existing)
@@ -14655,11 +14577,9 @@ async def handle_add_power_supply_ip_option(
 
 @dp.message(ManagePowerSupplyIpStates.waiting_for_new_ip_value)
 async def process_new_power_supply_ip_option(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+    value = text
     if not value:
         await message.answer(
             "⚠️ Значение не может быть пустым. Попробуйте снова.",
@@ -14674,12 +14594,8 @@ async def process_new_power_supply_ip_option(
     await send_power_supply_ip_menu(message)
 
 
-@dp.message(F.text == POWER_SUPPLIES_REMOVE_IP_TEXT)
-async def handle_remove_power_supply_ip_option(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(POWER_SUPPLIES_REMOVE_IP_TEXT, admin_only=True)
+async def handle_remove_power_supply_ip_option(message: Message, state: FSMContext) -> None:
     ip_options = await fetch_power_supply_ip_options()
     if not ip_options:
         await message.answer(
@@ -14697,11 +14613,9 @@ async def handle_remove_power_supply_ip_option(
 
 @dp.message(ManagePowerSupplyIpStates.waiting_for_ip_value_to_delete)
 async def process_remove_power_supply_ip_option(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    value = (message.text or "").strip()
+    value = text
     if not value:
         await message.answer(
             "⚠️ Значение не может быть пустым. Попробуйте снова.",
@@ -14719,20 +14633,14 @@ async def process_remove_power_supply_ip_option(
         )
 
 
-@dp.message(F.text == WAREHOUSE_SETTINGS_BACK_TO_ELECTRICS_TEXT)
-async def handle_back_to_electrics_settings(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button(WAREHOUSE_SETTINGS_BACK_TO_ELECTRICS_TEXT, admin_only=True)
+async def handle_back_to_electrics_settings(message: Message, state: FSMContext) -> None:
     await state.clear()
     await send_electrics_settings_overview(message)
 
 
-@dp.message(F.text == "📦 Материал")
+@menu_button("📦 Материал", admin_only=True)
 async def handle_plastic_materials_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await message.answer(
         "Выберите действие с материалами:",
@@ -14740,10 +14648,8 @@ async def handle_plastic_materials_menu(message: Message, state: FSMContext) ->
     )
 
 
-@dp.message(F.text == "📏 Толщина")
+@menu_button("📏 Толщина", admin_only=True)
 async def handle_plastic_thickness_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await message.answer(
         "Выберите действие с толщинами:",
@@ -14751,10 +14657,8 @@ async def handle_plastic_thickness_menu(message: Message, state: FSMContext) ->
     )
 
 
-@dp.message(F.text == "🎨 Цвет")
+@menu_button("🎨 Цвет", admin_only=True)
 async def handle_plastic_colors_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await message.answer(
         "Выберите действие с цветами:",
@@ -14762,28 +14666,20 @@ async def handle_plastic_colors_menu(message: Message, state: FSMContext) -> Non
     )
 
 
-@dp.message(F.text == "🏷️ Место хранения")
+@menu_button("🏷️ Место хранения", admin_only=True)
 async def handle_plastic_storage_menu(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.clear()
     await send_storage_locations_overview(message)
 
 
-@dp.message(F.text == "⬅️ Назад к пластику")
-async def handle_back_to_plastic_settings(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button("⬅️ Назад к пластику", admin_only=True)
+async def handle_back_to_plastic_settings(message: Message, state: FSMContext) -> None:
     await state.clear()
     await send_plastic_settings_overview(message)
 
 
-@dp.message(F.text == "➕ Добавить материал")
+@menu_button("➕ Добавить материал", admin_only=True)
 async def handle_add_plastic_material_button(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     await state.set_state(ManagePlasticMaterialStates.waiting_for_new_material_name)
     materials = await fetch_plastic_material_types()
     existing_text = format_materials_list(materials)
@@ -14795,25 +14691,21 @@ async def handle_add_plastic_material_button(message: Message, state: FSMContext
 
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_new_material_name)
-async def process_new_plastic_material(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+async def process_new_plastic_material(message: Message, state: FSMContext, text: str) -> None:
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await insert_plastic_material_type(name):
-        await message.answer(f"✅ Материал «{name}» добавлен.")
+        status = f"✅ Материал «{name}» добавлен."
     else:
-        await message.answer(f"ℹ️ Материал «{name}» уже есть в списке.")
+        status = f"ℹ️ Материал «{name}» уже есть в списке."
     await state.clear()
-    await send_plastic_settings_overview(message)
+    await send_plastic_settings_overview(message, status)
 
 
-@dp.message(F.text == "➖ Удалить материал")
+@menu_button("➖ Удалить материал", admin_only=True)
 async def handle_remove_plastic_material_button(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     materials = await fetch_plastic_material_types()
     if not materials:
         await message.answer(
@@ -14830,27 +14722,21 @@ async def handle_remove_plastic_material_button(message: Message, state: FSMCont
 
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_material_name_to_delete)
-async def process_remove_plastic_material(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+async def process_remove_plastic_material(message: Message, state: FSMContext, text: str) -> None:
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await delete_plastic_material_type(name):
-        await message.answer(f"🗑 Материал «{name}» удалён.")
+        status = f"🗑 Материал «{name}» удалён."
     else:
-        await message.answer(f"ℹ️ Материал «{name}» не найден в списке.")
+        status = f"ℹ️ Материал «{name}» не найден в списке."
     await state.clear()
-    await send_plastic_settings_overview(message)
+    await send_plastic_settings_overview(message, status)
 
 
-@dp.message(F.text == "➕ Добавить место хранения")
-async def handle_add_storage_location_button(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button("➕ Добавить место хранения", admin_only=True)
+async def handle_add_storage_location_button(message: Message, state: FSMContext) -> None:
     await state.set_state(
         ManagePlasticMaterialStates.waiting_for_new_storage_location_name
     )
@@ -14864,12 +14750,10 @@ async def handle_add_storage_location_button(
 
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_new_storage_location_name)
-async def process_new_storage_location(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+async def process_new_storage_location(message: Message, state: FSMContext, text: str) -> None:
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await insert_plastic_storage_location(name):
         await message.answer(f"✅ Место хранения «{name}» добавлено.")
@@ -14881,12 +14765,8 @@ async def process_new_storage_location(message: Message, state: FSMContext) -> N
     await send_storage_locations_overview(message)
 
 
-@dp.message(F.text == "➖ Удалить место хранения")
-async def handle_remove_storage_location_button(
-    message: Message, state: FSMContext
-) -> None:
-    if not await ensure_admin_access(message, state):
-        return
+@menu_button("➖ Удалить место хранения", admin_only=True)
+async def handle_remove_storage_location_button(message: Message, state: FSMContext) -> None:
     locations = await fetch_plastic_storage_locations()
     if not locations:
         await message.answer(
@@ -14905,12 +14785,10 @@ async def handle_remove_storage_location_button(
 
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_storage_location_to_delete)
-async def process_remove_storage_location(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+async def process_remove_storage_location(message: Message, state: FSMContext, text: str) -> None:
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     if await delete_plastic_storage_location(name):
         await message.answer(f"🗑 Место хранения «{name}» удалено.")
@@ -14922,10 +14800,8 @@ async def process_remove_storage_location(message: Message, state: FSMContext) -
     await send_storage_locations_overview(message)
 
 
-@dp.message(F.text == "➕ Добавить толщину")
+@menu_button("➕ Добавить толщину", admin_only=True)
 async def handle_add_thickness_button(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     materials = await fetch_plastic_material_types()
     if not materials:
         await message.answer(
@@ -14945,16 +14821,14 @@ async def handle_add_thickness_button(message: Message, state: FSMContext) -> No
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_material_name_to_add_thickness)
 async def process_add_thickness_material_selection(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     materials = await fetch_plastic_material_types()
-    match = next((item for item in materials if item.lower() == name.lower()), None)
+    match = await find_plastic_material_type(name)
     if match is None:
         await message.answer(
             "ℹ️ Такой материал не найден. Выберите один из списка.",
@@ -14975,8 +14849,6 @@ async def process_add_thickness_material_selection(
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_thickness_value_to_add)
 async def process_add_thickness_value(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
     data = await state.get_data()
     material = data.get("selected_material")
     if not material:
@@ -14995,28 +14867,17 @@ async def process_add_thickness_value(message: Message, state: FSMContext) -> No
         return
     status = await insert_material_thickness(material, value)
     if status == "material_not_found":
-        await message.answer(
-            "ℹ️ Материал больше не существует. Попробуйте снова.",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_THICKNESS_KB,
-        )
+        result_text = "ℹ️ Материал больше не существует. Попробуйте снова."
     elif status == "exists":
-        await message.answer(
-            f"ℹ️ Толщина {format_thickness_value(value)} уже добавлена для «{material}».",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_THICKNESS_KB,
-        )
+        result_text = f"ℹ️ Толщина {format_thickness_value(value)} уже добавлена для «{material}»."
     else:
-        await message.answer(
-            f"✅ Толщина {format_thickness_value(value)} добавлена для «{material}».",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_THICKNESS_KB,
-        )
+        result_text = f"✅ Толщина {format_thickness_value(value)} добавлена для «{material}»."
     await state.clear()
-    await send_plastic_settings_overview(message)
+    await send_plastic_settings_overview(message, result_text)
 
 
-@dp.message(F.text == "➕ Добавить цвет")
+@menu_button("➕ Добавить цвет", admin_only=True)
 async def handle_add_color_button(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     materials = await fetch_plastic_material_types()
     if not materials:
         await message.answer(
@@ -15034,16 +14895,14 @@ async def handle_add_color_button(message: Message, state: FSMContext) -> None:
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_material_name_to_add_color)
 async def process_add_color_material_selection(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     materials = await fetch_plastic_material_types()
-    match = next((item for item in materials if item.lower() == name.lower()), None)
+    match = await find_plastic_material_type(name)
     if match is None:
         await message.answer(
             "ℹ️ Такой материал не найден. Выберите один из списка.",
@@ -15062,9 +14921,7 @@ async def process_add_color_material_selection(
 
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_color_value_to_add)
-async def process_add_color_value(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
+async def process_add_color_value(message: Message, state: FSMContext, text: str) -> None:
     data = await state.get_data()
     material = data.get("selected_material")
     if not material:
@@ -15074,7 +14931,7 @@ async def process_add_color_value(message: Message, state: FSMContext) -> None:
             reply_markup=WAREHOUSE_SETTINGS_PLASTIC_COLORS_KB,
         )
         return
-    color = (message.text or "").strip()
+    color = text
     if not color:
         await message.answer(
             "⚠️ Цвет не может быть пустым. Укажите название цвета.",
@@ -15083,28 +14940,17 @@ async def process_add_color_value(message: Message, state: FSMContext) -> None:
         return
     status = await insert_material_color(material, color)
     if status == "material_not_found":
-        await message.answer(
-            "ℹ️ Материал больше не существует. Попробуйте снова.",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_COLORS_KB,
-        )
+        result_text = "ℹ️ Материал больше не существует. Попробуйте снова."
     elif status == "exists":
-        await message.answer(
-            f"ℹ️ Цвет «{color}» уже добавлен для «{material}».",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_COLORS_KB,
-        )
+        result_text = f"ℹ️ Цвет «{color}» уже добавлен для «{material}»."
     else:
-        await message.answer(
-            f"✅ Цвет «{color}» добавлен для «{material}».",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_COLORS_KB,
-        )
+        result_text = f"✅ Цвет «{color}» добавлен для «{material}»."
     await state.clear()
-    await send_plastic_settings_overview(message)
+    await send_plastic_settings_overview(message, result_text)
 
 
-@dp.message(F.text == "➖ Удалить толщину")
+@menu_button("➖ Удалить толщину", admin_only=True)
 async def handle_remove_thickness_button(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     materials = await fetch_materials_with_thicknesses()
     materials_with_data = [
         item["name"]
@@ -15129,25 +14975,14 @@ async def handle_remove_thickness_button(message: Message, state: FSMContext) ->
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_material_name_to_delete_thickness)
 async def process_remove_thickness_material_selection(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     materials = await fetch_materials_with_thicknesses()
-    match = next(
-        (
-            item
-            for item in materials
-            if item["name"].lower() == name.lower()
-            and item.get("thicknesses")
-            and len(item["thicknesses"]) > 0
-        ),
-        None,
-    )
+    match = await find_material_with_attribute(name, "thicknesses")
     if match is None:
         options = [
             item["name"]
@@ -15169,8 +15004,6 @@ async def process_remove_thickness_material_selection(
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_thickness_value_to_delete)
 async def process_remove_thickness_value(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
     data = await state.get_data()
     material = data.get("selected_material")
     if not material:
@@ -15189,28 +15022,17 @@ async def process_remove_thickness_value(message: Message, state: FSMContext) ->
         return
     status = await delete_material_thickness(material, value)
     if status == "material_not_found":
-        await message.answer(
-            "ℹ️ Материал больше не существует. Попробуйте снова.",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_THICKNESS_KB,
-        )
+        result_text = "ℹ️ Материал больше не существует. Попробуйте снова."
     elif status == "deleted":
-        await message.answer(
-            f"🗑 Толщина {format_thickness_value(value)} удалена у «{material}».",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_THICKNESS_KB,
-        )
+        result_text = f"🗑 Толщина {format_thickness_value(value)} удалена у «{material}»."
     else:
-        await message.answer(
-            f"ℹ️ Толщина {format_thickness_value(value)} не найдена у «{material}».",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_THICKNESS_KB,
-        )
+        result_text = f"ℹ️ Толщина {format_thickness_value(value)} не найдена у «{material}»."
     await state.clear()
-    await send_plastic_settings_overview(message)
+    await send_plastic_settings_overview(message, result_text)
 
 
-@dp.message(F.text == "➖ Удалить цвет")
+@menu_button("➖ Удалить цвет", admin_only=True)
 async def handle_remove_color_button(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
-        return
     materials = await fetch_materials_with_thicknesses()
     materials_with_colors = [
         item["name"]
@@ -15235,25 +15057,14 @@ async def handle_remove_color_button(message: Message, state: FSMContext) -> Non
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_material_name_to_delete_color)
 async def process_remove_color_material_selection(
-    message: Message, state: FSMContext
+    message: Message, state: FSMContext, text: str
 ) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
-    name = (message.text or "").strip()
+    name = text
     if not name:
-        await message.answer("⚠️ Название не может быть пустым. Попробуйте снова.")
+        await answer_prepared(message, EMPTY_NAME_REPLY)
         return
     materials = await fetch_materials_with_thicknesses()
-    match = next(
-        (
-            item
-            for item in materials
-            if item["name"].lower() == name.lower()
-            and item.get("colors")
-            and len(item["colors"]) > 0
-        ),
-        None,
-    )
+    match = await find_material_with_attribute(name, "colors")
     if match is None:
         options = [
             item["name"]
@@ -15274,9 +15085,7 @@ async def process_remove_color_material_selection(
 
 
 @dp.message(ManagePlasticMaterialStates.waiting_for_color_value_to_delete)
-async def process_remove_color_value(message: Message, state: FSMContext) -> None:
-    if await _process_cancel_if_requested(message, state):
-        return
+async def process_remove_color_value(message: Message, state: FSMContext, text: str) -> None:
     data = await state.get_data()
     material = data.get("selected_material")
     if not material:
@@ -15286,7 +15095,7 @@ async def process_remove_color_value(message: Message, state: FSMContext) -> Non
             reply_markup=WAREHOUSE_SETTINGS_PLASTIC_COLORS_KB,
         )
         return
-    color = (message.text or "").strip()
+    color = text
     if not color:
         await message.answer(
             "⚠️ Не удалось распознать цвет. Укажите название цвета.",
@@ -15295,27 +15104,20 @@ async def process_remove_color_value(message: Message, state: FSMContext) -> Non
         return
     status = await delete_material_color(material, color)
     if status == "material_not_found":
-        await message.answer(
-            "ℹ️ Материал больше не существует. Попробуйте снова.",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_COLORS_KB,
-        )
+        result_text = "ℹ️ Материал больше не существует. Попробуйте снова."
     elif status == "deleted":
-        await message.answer(
-            f"🗑 Цвет «{color}» удалён у «{material}».",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_COLORS_KB,
-        )
+        result_text = f"🗑 Цвет «{color}» удалён у «{material}»."
     else:
-        await message.answer(
-            f"ℹ️ Цвет «{color}» не найден у «{material}».",
-            reply_markup=WAREHOUSE_SETTINGS_PLASTIC_COLORS_KB,
-        )
+        result_text = f"ℹ️ Цвет «{color}» не найден у «{material}»."
     await state.clear()
-    await send_plastic_settings_overview(message)
+    await send_plastic_settings_overview(message, result_text)
 
 
 @dp.message(F.text == CANCEL_TEXT)
-async def handle_cancel(message: Message, state: FSMContext) -> None:
-    if not await ensure_admin_access(message, state):
+async def handle_cancel(
+    message: Message, state: FSMContext, is_admin: Optional[bool] = None
+) -> None:
+    if not await ensure_admin_access(message, state, is_admin):
         return
     current_state = await state.get_state()
     if current_state and current_state.startswith(AddUserStates.__name__):
@@ -15444,9 +15246,43 @@ async def handle_cancel(message: Message, state: FSMContext) -> None:
 # === Пользователи (добавление/просмотр) можно вернуть сюда позже ===
 
 
+def _orjson_dumps(value: Any) -> str:
+    return orjson.dumps(value).decode()
+
+
+class TelegramAiohttpSession(AiohttpSession):
+    # aiogram держит одну ClientSession на бота. Она собирается здесь, а не
+    # в базовом классе, чтобы задать коннектор: соединения с api.telegram.org
+    # не закрываются между всплесками сообщений, а адрес не резолвится заново
+    # каждые 10 секунд. Сертификаты и User-Agent те же, что у aiogram.
+    async def create_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(
+                    ssl=ssl.create_default_context(cafile=certifi.where()),
+                    ttl_dns_cache=TELEGRAM_DNS_CACHE_TTL,
+                    keepalive_timeout=TELEGRAM_KEEPALIVE_TIMEOUT,
+                ),
+                headers={hdrs.USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{AIOGRAM_VERSION}"},
+            )
+        return self._session
+
+
+def build_bot_session() -> AiohttpSession:
+    # orjson разбирает входящие обновления и собирает запросы к API быстрее
+    # стандартного json; без него сессия работает на json из stdlib.
+    if orjson is not None:
+        session = TelegramAiohttpSession(json_loads=orjson.loads, json_dumps=_orjson_dumps)
+    else:
+        session = TelegramAiohttpSession()
+    session.middleware(OutgoingRateLimitMiddleware(TelegramRateLimiter(TELEGRAM_RATE_LIMIT)))
+    session.middleware(StaticMarkupMiddleware())
+    return session
+
+
 async def main() -> None:
     """Запускает поллинг Telegram-бота."""
-    bot = Bot(BOT_TOKEN)
+    bot = Bot(BOT_TOKEN, session=build_bot_session())
     try:
         await dp.start_polling(bot)
     finally:
@@ -15454,4 +15290,13 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop быстрее стандартного цикла событий; там, где его нет
+    # (например, на Windows), бот работает на обычном asyncio.
+    try:
+        import uvloop
+    except ImportError:
+        loop_factory = None
+    else:
+        loop_factory = uvloop.new_event_loop
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())